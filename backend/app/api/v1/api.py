@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, documents, search, users, dashboard
+from app.api.v1.endpoints import auth, documents, search, users, dashboard, admin
 
 api_router = APIRouter()
 
@@ -16,4 +16,7 @@ api_router.include_router(documents.router, prefix="/documents", tags=["document
 api_router.include_router(search.router, prefix="/search", tags=["search"])
 
 # Dashboard endpoints
-api_router.include_router(dashboard.router, tags=["dashboard"]) 
\ No newline at end of file
+api_router.include_router(dashboard.router, tags=["dashboard"])
+
+# Admin endpoints
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,134 @@
+import os
+import re
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.security import get_current_active_user
+from app.models.user import User, UserRole
+
+router = APIRouter()
+
+
+def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
+    """Sadece admin kullanıcılara izin ver"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
+
+
+@router.post("/gc")
+async def garbage_collect(
+    dry_run: bool = True,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Yetim vektörleri ve dosyaları raporla (dry_run=false ise temizle)"""
+    from app.services.maintenance import collect_garbage
+
+    try:
+        return await run_in_threadpool(collect_garbage, db, dry_run)
+    except Exception as e:
+        logger.error(f"Error during garbage collection: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error during garbage collection"
+        )
+
+
+_SNAPSHOT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def _snapshot_dir(name: str) -> str:
+    if not _SNAPSHOT_NAME_PATTERN.match(name) or name.startswith("."):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid snapshot name"
+        )
+    return os.path.join(settings.SNAPSHOT_PATH, name)
+
+
+def _export_snapshot_task(snapshot_dir: str, dtype: str):
+    """Anlık görüntüyü kendi veritabanı oturumuyla dışa aktar (arka plan görevi)"""
+    from app.core.database import SessionLocal
+    from app.services.snapshot import export_snapshot
+
+    db = SessionLocal()
+    try:
+        export_snapshot(db, snapshot_dir, dtype=dtype)
+    except Exception as e:
+        logger.error(f"Snapshot export to {snapshot_dir} failed: {e}")
+    finally:
+        db.close()
+
+
+def _restore_snapshot_task(snapshot_dir: str):
+    from app.services.snapshot import restore_snapshot
+
+    try:
+        restore_snapshot(snapshot_dir)
+    except Exception as e:
+        logger.error(f"Snapshot restore from {snapshot_dir} failed: {e}")
+
+
+@router.get("/snapshots")
+async def list_snapshots(current_user: User = Depends(require_admin)):
+    """Mevcut vektör anlık görüntülerini listele"""
+    from app.services.snapshot import MANIFEST_FILE, read_manifest
+
+    if not os.path.isdir(settings.SNAPSHOT_PATH):
+        return {"snapshots": []}
+    snapshots = []
+    for name in sorted(os.listdir(settings.SNAPSHOT_PATH)):
+        snapshot_dir = os.path.join(settings.SNAPSHOT_PATH, name)
+        if os.path.exists(os.path.join(snapshot_dir, MANIFEST_FILE)):
+            snapshots.append({"name": name, **read_manifest(snapshot_dir)})
+    return {"snapshots": snapshots}
+
+
+@router.post("/snapshots/{name}/export")
+async def export_vector_snapshot(
+    name: str,
+    background_tasks: BackgroundTasks,
+    dtype: str = "float16",
+    current_user: User = Depends(require_admin)
+):
+    """Tüm chunk vektörlerini anlık görüntüye aktar (arka planda)"""
+    snapshot_dir = _snapshot_dir(name)
+    if os.path.exists(snapshot_dir):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Snapshot already exists"
+        )
+    if dtype not in ("float16", "float32"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="dtype must be float16 or float32"
+        )
+    background_tasks.add_task(_export_snapshot_task, snapshot_dir, dtype)
+    return {"message": f"Snapshot {name} export queued"}
+
+
+@router.post("/snapshots/{name}/restore")
+async def restore_vector_snapshot(
+    name: str,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(require_admin)
+):
+    """Anlık görüntüyü yapılandırılmış vektör deposuna yükle (arka planda)"""
+    from app.services.snapshot import MANIFEST_FILE
+
+    snapshot_dir = _snapshot_dir(name)
+    if not os.path.exists(os.path.join(snapshot_dir, MANIFEST_FILE)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found"
+        )
+    background_tasks.add_task(_restore_snapshot_task, snapshot_dir)
+    return {"message": f"Snapshot {name} restore queued"}
@@ -9,6 +9,7 @@ from app.core.security import get_current_active_user
 from app.models.user import User
 from app.models.document import Document
 from app.models.ActivityLog import  ActivityLog 
+from app.services.user_stats import dashboard_cache, get_user_stats
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,26 +21,24 @@ async def get_dashboard_stats(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Dashboard istatistikleri ve son aktiviteler"""
+    """Dashboard istatistikleri ve son aktiviteler.
+
+    Toplamlar yükleme, silme ve aktivite sırasında güncellenen `user_stats`
+    sayaçlarından okunur; son hafta ve son aktiviteler (user_id, zaman)
+    indeksleri üzerinden alınır. Yanıt kısa bir süre önbellekte tutulur.
+    """
+    cached = dashboard_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
     try:
-        total_documents = db.query(func.count(Document.id)).filter(
-            Document.user_id == current_user.id
-        ).scalar()
+        stats = get_user_stats(db, current_user.id)
         
         week_ago = datetime.utcnow() - timedelta(days=7)
         recent_documents = db.query(func.count(Document.id)).filter(
             Document.user_id == current_user.id,
             Document.created_at >= week_ago
         ).scalar()
-        
-        storage_used = db.query(func.sum(Document.file_size)).filter(
-            Document.user_id == current_user.id
-        ).scalar() or 0
-        
-        search_and_question_count = db.query(func.count(ActivityLog.id)).filter(
-            ActivityLog.user_id == current_user.id,
-            ActivityLog.activity_type.in_(['document_search', 'question_ask'])
-        ).scalar()
 
         recent_activities = db.query(ActivityLog, Document.title).filter(
             ActivityLog.user_id == current_user.id
@@ -79,13 +78,15 @@ async def get_dashboard_stats(
                 "documentTitle": doc_title 
             })
 
-        return {
-            "totalDocuments": total_documents,
+        response = {
+            "totalDocuments": stats.document_count,
             "recentDocuments": recent_documents,
-            "searchAndQuestionCount": search_and_question_count, 
-            "storageUsed": storage_used,
+            "searchAndQuestionCount": stats.search_question_count, 
+            "storageUsed": stats.storage_bytes,
             "recentActivities": formatted_activities 
         }
+        dashboard_cache.put(current_user.id, response)
+        return response
         
     except Exception as e:
         logger.error(f"Error getting dashboard stats: {e}")
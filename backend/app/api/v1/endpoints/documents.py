@@ -1,20 +1,40 @@
+import base64
+import hashlib
+import json
+import mimetypes
 import os
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
-from sqlalchemy.orm import Session
+from datetime import datetime
+from email.utils import formatdate
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, joinedload, undefer
 from loguru import logger
 
 from app.core.database import get_db
 from app.core.security import get_current_active_user
+from app.core.singleflight import SingleFlight
 from app.models.user import User
 from app.models.document import Document
-from app.schemas.document import Document as DocumentSchema, DocumentCreate, DocumentUpdate
+from app.models.document_content import DocumentContent
+from app.models.document_keyword import DocumentKeyword
+from app.schemas.document import Document as DocumentSchema, DocumentCreate, DocumentListItem, DocumentUpdate
+from app.services.blob_service import acquire_blob, release_blob
+from app.services.keyword_index import keyword_index, parse_keywords, set_document_keywords
 from app.services.storage_service import storage_service
+from app.services.user_stats import adjust_user_stats
 from app.services.ai_service import ai_service
 from app.core.config import settings
 
 router = APIRouter()
 
+# Aynı doküman için eşzamanlı işleme isteklerini tek pipeline çalışmasında birleştir
+document_flights = SingleFlight("document pipeline")
+
 @router.post("/upload", response_model=DocumentSchema)
 async def upload_document(
     background_tasks: BackgroundTasks,
@@ -40,28 +60,31 @@ async def upload_document(
                 detail=f"File size exceeds maximum limit of {settings.MAX_FILE_SIZE} bytes"
             )
         
-        # Dosyayı kaydet
-        file_path = storage_service.save_file(
+        # Dosyayı içerik adresli blob olarak kaydet (aynı içerik tekrar saklanmaz)
+        stored = await run_in_threadpool(
+            storage_service.save_file,
             file.file,
             file.filename,
             file.content_type
         )
+        file_path = stored.location
         
-        # Dosya boyutunu al
-        file_size = storage_service.get_file_size(file_path)
-        
-        # Doküman kaydını oluştur
+        # Doküman kaydını oluştur; blob referansı aynı transaction'da artırılır
+        compressed = acquire_blob(db, stored)
         document = Document(
             title=title or file.filename,
             filename=file.filename,
             file_path=file_path,
-            file_size=file_size,
+            file_size=stored.size,
             file_type=file_extension,
             user_id=current_user.id,
-            is_encrypted=storage_service.cipher is not None
+            is_encrypted=stored.encrypted,
+            is_compressed=compressed,
+            blob_digest=stored.digest
         )
         
         db.add(document)
+        adjust_user_stats(db, current_user.id, documents=1, storage_bytes=stored.size)
         db.commit()
         db.refresh(document)
         
@@ -99,12 +122,16 @@ async def reprocess_document(
             )
         
         # Dosya yolunu kontrol et
-        if not document.file_path or not os.path.exists(document.file_path):
+        if not storage_service.exists(document.file_path):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Document file not found"
             )
         
+        # Zaten işleniyorsa ikinci bir pipeline başlatma
+        if document_flights.in_flight(document.id):
+            return {"message": f"Document {document_id} is already being processed"}
+        
         # Arka planda yeniden işle
         background_tasks.add_task(process_document_ai, document.id, document.file_path, document.file_type)
         
@@ -117,19 +144,80 @@ async def reprocess_document(
             detail="Error reprocessing document"
         )
 
-@router.get("/", response_model=List[DocumentSchema])
+def _encode_list_cursor(created_at: datetime, document_id: int) -> str:
+    payload = {"c": created_at.isoformat(), "i": document_id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _decode_list_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """`fields=id,title` parametresini doğrula; sayfalama için id ve created_at her zaman okunur"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in DocumentListItem.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return requested
+
+
+@router.get("/", response_model=List[DocumentListItem])
 async def get_documents(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Kullanıcının dokümanlarını listele"""
-    documents = db.query(Document).filter(
-        Document.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
-    
-    return documents
+    """Kullanıcının dokümanlarını listele.
+
+    Çıkarılan metin listeye dahil edilmez. `cursor` verilirse sayfalama
+    (user_id, created_at, id) indeksi üzerinde keyset ile yapılır ve derinlikten
+    bağımsız çalışır; sonraki sayfanın imleci `X-Next-Cursor` başlığında döner.
+    `fields` ile yalnızca istenen sütunlar okunur ve döndürülür.
+    """
+    requested = _parse_fields(fields)
+    if requested is None:
+        query = db.query(Document)
+    else:
+        columns = dict.fromkeys(requested + ["id", "created_at"])
+        query = db.query(*[getattr(Document, column) for column in columns])
+
+    query = query.filter(Document.user_id == current_user.id).order_by(Document.created_at, Document.id)
+    if cursor:
+        created_at, document_id = _decode_list_cursor(cursor)
+        query = query.filter(tuple_(Document.created_at, Document.id) > (created_at, document_id))
+    else:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_list_cursor(rows[-1].created_at, rows[-1].id)
+
+    if requested is None:
+        response.headers.update(headers)
+        return rows
+    return JSONResponse(
+        content=jsonable_encoder([{field: getattr(row, field) for field in requested} for row in rows]),
+        headers=headers
+    )
 
 @router.get("/{document_id}", response_model=DocumentSchema)
 async def get_document(
@@ -138,7 +226,7 @@ async def get_document(
     db: Session = Depends(get_db)
 ):
     """Belirli bir dokümanı getir"""
-    document = db.query(Document).filter(
+    document = db.query(Document).options(joinedload(Document.content_record), undefer(Document.legacy_content)).filter(
         Document.id == document_id,
         Document.user_id == current_user.id
     ).first()
@@ -151,6 +239,118 @@ async def get_document(
     
     return document
 
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Tek aralıklı `bytes=` başlığını [başlangıç, bitiş] çiftine çevir.
+
+    Birden çok aralık istenirse None döner ve tüm dosya gönderilir. Karşılanamayan
+    aralıklarda 416 yükseltilir.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    start_text, _, end_text = ranges.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+        else:
+            start, end = max(size - int(end_text), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+def _stream_plaintext(file_path: str, compressed: bool, start: int, length: int) -> Iterator[bytes]:
+    """Dosyanın çözülmüş içeriğinden bir aralığı segment boyutunda parçalarla oku"""
+    with storage_service.open(file_path, compressed) as stream:
+        stream.seek(start)
+        while length > 0:
+            data = stream.read(min(settings.ENCRYPTION_SEGMENT_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+@router.get("/{document_id}/content")
+async def download_document_content(
+    document_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Dokümanın dosyasını indir (Range / If-Range destekli).
+
+    Şifresiz ve sıkıştırılmamış dosyalar `FileResponse` ile gönderilir;
+    sunucu destekliyorsa ASGI pathsend uzantısıyla dosya kopyalanmadan
+    aktarılır. Şifreli dosyalar yalnızca istenen aralığı kapsayan segmentler
+    çözülerek, sıkıştırılmış dosyalar okundukça açılarak akıtılır.
+    """
+    document = db.query(Document.file_path, Document.filename, Document.is_compressed).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    if not await run_in_threadpool(storage_service.exists, document.file_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document file not found"
+        )
+
+    media_type = mimetypes.guess_type(document.filename)[0] or "application/octet-stream"
+    local_path = storage_service.local_path(document.file_path)
+    compressed = bool(document.is_compressed)
+    if local_path and not await run_in_threadpool(storage_service.is_encoded, document.file_path, compressed):
+        return FileResponse(
+            local_path,
+            media_type=media_type,
+            filename=document.filename,
+            content_disposition_type="inline"
+        )
+
+    # Doğrulayıcılar depodaki dosyadan üretilir (FileResponse ile aynı yöntem)
+    modified_at = await run_in_threadpool(storage_service.modified_at, document.file_path)
+    stored_size = await run_in_threadpool(storage_service.stored_size, document.file_path)
+    etag = '"' + hashlib.md5(f"{modified_at}-{stored_size}".encode(), usedforsecurity=False).hexdigest() + '"'
+    last_modified = formatdate(modified_at, usegmt=True)
+    size = await run_in_threadpool(storage_service.get_file_size, document.file_path, compressed)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Content-Disposition": f"inline; filename*=utf-8''{quote(document.filename)}",
+    }
+    start, end = 0, size - 1
+    status_code = status.HTTP_200_OK
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and size > 0 and (if_range is None or if_range in (etag, last_modified)):
+        requested = _parse_range(range_header, size)
+        if requested is not None:
+            start, end = requested
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _stream_plaintext(document.file_path, compressed, start, end - start + 1),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
+
 @router.put("update/{document_id}", response_model=DocumentSchema)
 async def update_document(
     document_id: int,
@@ -174,6 +374,8 @@ async def update_document(
     update_data = document_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(document, field, value)
+    if "keywords" in update_data:
+        set_document_keywords(db, document.id, document.user_id, parse_keywords(document.keywords))
     
     db.commit()
     db.refresh(document)
@@ -183,6 +385,7 @@ async def update_document(
 @router.delete("/delete/{document_id}")
 async def delete_document(
     document_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -205,9 +408,20 @@ async def delete_document(
                 detail="Belge bulunamadı"
             )
 
+    # İçerik adresli dosyalar paylaşılabilir; referansı bırakılır, dosyayı blob GC'si siler
+    owner_id, blob_digest, file_size = document.user_id, document.blob_digest, document.file_size
+    file_path = None if blob_digest else document.file_path
     try:
+        if blob_digest:
+            release_blob(db, blob_digest)
+        # Metin satırı yüklenmeden silinir
+        db.query(DocumentContent).filter(DocumentContent.document_id == document_id).delete(synchronize_session=False)
+        db.query(DocumentKeyword).filter(DocumentKeyword.document_id == document_id).delete(synchronize_session=False)
         db.delete(document)
+        adjust_user_stats(db, owner_id, documents=-1, storage_bytes=-(file_size or 0))
         db.commit()
+        keyword_index.invalidate(owner_id)
+        ai_service.invalidate_document(document_id)
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -215,23 +429,46 @@ async def delete_document(
             detail="Belge veritabanından silinirken bir hata oluştu."
         )
 
+    # Vektörler ve dosya arka planda temizlenir; kalıntıları periyodik GC toplar
+    background_tasks.add_task(cleanup_document_artifacts, document_id, file_path, owner_id)
+
     return {"message": "Document deleted successfully"}
 
 
+def cleanup_document_artifacts(document_id: int, file_path: str, user_id: int):
+    """Silinen dokümanın vektörlerini ve dosyasını temizle (arka plan görevi)"""
+    try:
+        ai_service.remove_document(document_id, user_id=user_id)
+    except Exception as e:
+        logger.error(f"Error removing vectors of deleted document {document_id}: {e}")
+
+    if file_path and not storage_service.delete_file(file_path):
+        logger.warning(f"File of deleted document {document_id} could not be removed: {file_path}")
+
+
 async def process_document_ai(document_id: int, file_path: str, file_type: str):
-    """Dokümanı AI ile işle ve ChromaDB'ye kaydet (arka plan görevi)"""
+    """Dokümanı AI ile işle ve ChromaDB'ye kaydet (arka plan görevi).
+
+    Aynı doküman için süren bir işlem varsa yenisi başlatılmaz, onun sonucu beklenir.
+    """
+    await document_flights.do(
+        document_id,
+        lambda: run_in_threadpool(_process_document, document_id, file_path, file_type)
+    )
+
+
+def _process_document(document_id: int, file_path: str, file_type: str):
+    from app.core.database import SessionLocal
+    
+    db = SessionLocal()
     try:
-        from app.core.database import SessionLocal
-        
-        db = SessionLocal()
-        
         # Dokümanı al
         document = db.query(Document).filter(Document.id == document_id).first()
         if not document:
             return
         
         # Metin çıkar
-        text_content = ai_service.extract_text_from_file(file_path, file_type)
+        text_content = ai_service.extract_text_from_file(file_path, file_type, compressed=bool(document.is_compressed))
         
         # Metni parçalara ayır
         chunks = ai_service.chunk_text(text_content)
@@ -242,20 +479,23 @@ async def process_document_ai(document_id: int, file_path: str, file_type: str):
             # Dokümanı işlenmiş olarak işaretle ama ChromaDB'ye kaydetme
             document.content = text_content
             document.summary = ai_service.generate_summary(text_content) if text_content.strip() else ""
-            document.keywords = ",".join(ai_service.extract_keywords(text_content)) if text_content.strip() else ""
+            keywords = ai_service.extract_keywords(text_content) if text_content.strip() else []
+            document.keywords = ",".join(keywords)
+            set_document_keywords(db, document_id, document.user_id, keywords)
+            document.chunk_count = 0
+            document.vector_bytes = 0
             document.is_processed = True
             db.commit()
             return
         
-        # Embedding'ler oluştur
-        embeddings = ai_service.create_embeddings(chunks)
+        # Metin, chunk'lar karakter aralığıyla ona başvurmadan önce kaydedilir
+        document.content = text_content
+        db.commit()
         
-        # Embeddings boşsa işlemi durdur
-        if not embeddings:
-            logger.warning(f"No embeddings created for document {document_id}, skipping ChromaDB storage")
-        else:
-            # ChromaDB'ye kaydet
-            ai_service.store_document_chunks(document_id, chunks, embeddings)
+        # Embedding'leri batch'ler halinde oluştur ve ChromaDB'ye kaydet
+        chunk_count, vector_bytes = ai_service.embed_and_store_chunks(
+            document_id, chunks, user_id=document.user_id, offsets=ai_service.chunk_offsets(text_content, chunks)
+        )
         
         # Gemini ile özet oluştur
         summary = ai_service.generate_summary(text_content)
@@ -263,10 +503,19 @@ async def process_document_ai(document_id: int, file_path: str, file_type: str):
         # Anahtar kelimeleri çıkar
         keywords = ai_service.extract_keywords(text_content)
         
+        # İki aşamalı arama için doküman düzeyinde özet vektörü (başarısızlık işlemeyi durdurmaz)
+        try:
+            ai_service.store_document_summary(document_id, document.title, summary, keywords, user_id=document.user_id)
+        except Exception as e:
+            logger.warning(f"Could not store summary vector for document {document_id}: {e}")
+        
         # Dokümanı güncelle
-        document.content = text_content
         document.summary = summary
         document.keywords = ",".join(keywords) if keywords else ""
+        set_document_keywords(db, document_id, document.user_id, keywords or [])
+        document.chunk_count = chunk_count
+        document.vector_bytes = vector_bytes
+        document.embedding_model = settings.LOCAL_EMBEDDING_MODEL
         document.is_processed = True
         db.commit()
         
@@ -1,73 +1,287 @@
-from typing import List, Optional
+import asyncio
+import base64
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from loguru import logger
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import get_current_active_user
+from app.core.singleflight import SingleFlight
 from app.models.user import User
 from app.models.ActivityLog import ActivityLog 
 from app.models.document import Document
-from app.schemas.document import DocumentSearchResult
+from app.schemas.document import DocumentSearchResult, DocumentSearchGroup, DocumentSearchResponse
 from app.services.ai_service import ai_service
+from app.services.content_store import has_content
+from app.services.keyword_index import keyword_index
+from app.services.user_stats import adjust_user_stats
 
 router = APIRouter()
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 
 class SearchRequest(BaseModel):
     query: str
     document_id: Optional[int] = None
     limit: int = 5
+    cursor: Optional[str] = None
+    mode: Optional[str] = None
+    top_documents: Optional[int] = None  # İki aşamalı aramada aday doküman sayısı (0: düz arama)
+    stream: bool = False
+
+MAX_SEARCH_DEPTH = 1000
+
+# Aynı dokümana aynı anda sorulan aynı soruyu tek hesaplamada birleştir
+question_flights = SingleFlight("question")
+
+
+def _hit_score(hit: Dict[str, Any]) -> float:
+    return 1 - hit['distance'] if hit['distance'] is not None else hit.get('score', 0.0)
+
+
+def _hit_key(hit: Dict[str, Any]) -> Tuple[float, str]:
+    """Sonuçların kararlı sıralama anahtarı: skor azalan, eşitlikte chunk kimliği artan"""
+    return -_hit_score(hit), hit['id']
+
+
+def _query_hash(query: str) -> str:
+    return hashlib.sha1(query.encode()).hexdigest()[:12]
+
+
+def _encode_cursor(query: str, last_hit: Dict[str, Any], depth: int) -> str:
+    payload = {"s": _hit_score(last_hit), "i": last_hit['id'], "d": depth, "q": _query_hash(query)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _decode_cursor(query: str, cursor: Optional[str]) -> Tuple[Optional[Tuple[float, str]], int]:
+    """İmleçten (son sonucun sıralama anahtarı, taranan derinlik) çöz; imleç başka bir sorguya aitse reddet"""
+    if not cursor:
+        return None, 0
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if payload["q"] != _query_hash(query):
+            raise ValueError("cursor belongs to another query")
+        return (-float(payload["s"]), str(payload["i"])), int(payload["d"])
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _group_results(hits: List[Dict[str, Any]], documents: Dict[int, Any]) -> List[DocumentSearchGroup]:
+    """Sıralı chunk sonuçlarını ilk göründükleri sırayla dokümanlara göre grupla"""
+    groups: Dict[int, DocumentSearchGroup] = {}
+    for hit in hits:
+        document_id = int(hit['metadata']['document_id'])
+        document = documents.get(document_id)
+        if document is None:
+            # Silinmiş ya da başka kullanıcıya ait dokümanların chunk'ları gösterilmez
+            continue
+
+        score = _hit_score(hit)
+        group = groups.get(document_id)
+        if group is None:
+            group = DocumentSearchGroup(
+                document_id=document_id,
+                title=document.title,
+                filename=document.filename,
+                summary=document.summary,
+                best_score=score,
+                chunks=[]
+            )
+            groups[document_id] = group
+        group.chunks.append(DocumentSearchResult(
+            id=document_id,
+            title=document.title,
+            filename=document.filename,
+            summary=document.summary,
+            similarity_score=score,
+            chunk_text=hit['chunk_text'] or "",
+            chunk_index=hit['metadata'].get('chunk_index', 0)
+        ))
+    return list(groups.values())
+
+
+@router.post("/", response_model=DocumentSearchResponse)
+async def search_documents(
+    request: SearchRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Kullanıcının tüm dokümanlarında anlamsal arama (LLM çağrısı yapmaz).
+
+    Sayfalama (skor, chunk kimliği) anahtarlı imleçle yapılır: sonraki sayfa
+    son döndürülen sonuçtan sonra gelenlerdir, bu yüzden araya eklenen ya da
+    silinen chunk'lar sayfaların kaymasına (tekrar/atlama) yol açmaz. ANN
+    indeksleri bir konumdan devam ettirilemediği için her sayfada arama,
+    imlecin taşıdığı derinliğe kadar yeniden çalıştırılır ve MAX_SEARCH_DEPTH
+    ile sınırlanır. `stream=true` sayfayı doküman grubu başına bir NDJSON
+    satırı olarak yazar; arama ve sayfa yine tek seferde hesaplanır, akış
+    yalnızca istemcinin grupları geldikçe işlemesini sağlar.
+    """
+    limit = max(1, min(request.limit, 100))
+    after, depth = _decode_cursor(request.query, request.cursor)
+    if depth + limit > MAX_SEARCH_DEPTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Search results are limited to the first {MAX_SEARCH_DEPTH} chunks"
+        )
+
+    try:
+        db.add(ActivityLog(
+            user_id=current_user.id,
+            activity_type="document_search",
+            description=f"'{request.query}' için arama yapıldı.",
+            document_id=request.document_id
+        ))
+        adjust_user_stats(db, current_user.id, searches=1)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Failed to log search activity: {e}")
+
+    try:
+        # Bir fazlası istenir; böylece sonraki sayfanın varlığı ek sorgu olmadan bilinir
+        hits = await run_in_threadpool(
+            ai_service.search_similar_chunks,
+            query=request.query,
+            n_results=depth + limit + 1,
+            document_id=request.document_id,
+            user_id=current_user.id,
+            mode=request.mode,
+            top_documents=request.top_documents
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching documents: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error searching documents"
+        )
+
+    remaining = sorted(hits, key=_hit_key)
+    if after is not None:
+        remaining = [hit for hit in remaining if _hit_key(hit) > after]
+    page = remaining[:limit]
+    next_cursor = _encode_cursor(request.query, page[-1], depth + limit) if len(remaining) > limit else None
+
+    # Sayfadaki tüm dokümanların bilgileri tek sorguda alınır
+    document_ids = {int(hit['metadata']['document_id']) for hit in page}
+    documents = {
+        row.id: row
+        for row in db.query(Document.id, Document.title, Document.filename, Document.summary).filter(
+            Document.id.in_(document_ids),
+            Document.user_id == current_user.id
+        ).all()
+    } if document_ids else {}
+
+    if request.stream:
+        def stream_results():
+            for group in _group_results(page, documents):
+                yield group.model_dump_json() + "\n"
+            yield json.dumps({"next_cursor": next_cursor}) + "\n"
+
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+    return DocumentSearchResponse(
+        query=request.query,
+        results=_group_results(page, documents),
+        next_cursor=next_cursor
+    )
+
+VERIFY_BATCH_SIZE = 100
+
+
+def _count_chunks_by_document(collection, document_ids: List[int]) -> Dict[int, int]:
+    """Vektör deposundaki chunk sayılarını toplu `get` çağrılarıyla say"""
+    counts = {document_id: 0 for document_id in document_ids}
+    for start in range(0, len(document_ids), VERIFY_BATCH_SIZE):
+        batch = [str(document_id) for document_id in document_ids[start:start + VERIFY_BATCH_SIZE]]
+        results = collection.get(where={"document_id": {"$in": batch}}, include=[])
+        for chunk_id in results['ids']:
+            # Kimlik biçimi: doc_{document_id}_chunk_{index}
+            document_id = int(chunk_id.split("_")[1])
+            if document_id in counts:
+                counts[document_id] += 1
+    return counts
+
 
 @router.get("/debug/chromadb")
 async def debug_chromadb(
+    deep_verify: bool = False,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """ChromaDB durumunu kontrol et"""
+    """ChromaDB durumunu kontrol et (deep_verify ile vektör deposundaki sayıları doğrula)"""
     try:
         # ChromaDB koleksiyon bilgilerini al
+        collection = ai_service.get_collection(current_user.id)
         collection_info = {
-            "name": ai_service.collection.name,
-            "count": ai_service.collection.count(),
-            "metadata": ai_service.collection.metadata
+            "name": collection.name,
+            "count": collection.count(),
+            "metadata": collection.metadata
         }
         
-        # Kullanıcının işlenmiş dokümanlarını kontrol et
-        processed_docs = db.query(Document).filter(
+        # İşlenmiş dokümanların chunk istatistikleri tek sorguda alınır
+        processed_docs = db.query(
+            Document.id,
+            Document.title,
+            Document.filename,
+            Document.is_processed,
+            has_content().label("has_content"),
+            Document.summary.isnot(None).label("has_summary"),
+            Document.keywords.isnot(None).label("has_keywords"),
+            Document.chunk_count,
+            Document.vector_bytes,
+            Document.embedding_model
+        ).filter(
             Document.user_id == current_user.id,
             Document.is_processed == True
         ).all()
+
+        verified_counts = None
+        if deep_verify:
+            verified_counts = await run_in_threadpool(
+                _count_chunks_by_document, collection, [doc.id for doc in processed_docs]
+            )
         
         doc_info = []
+        embedding_models: Dict[str, int] = {}
         for doc in processed_docs:
-            # ChromaDB'de bu dokümanın chunk'larını ara
-            try:
-                chunks = ai_service.collection.query(
-                    query_embeddings=[[0.0] * 384],  # Dummy embedding
-                    n_results=1,
-                    where={"document_id": str(doc.id)}
-                )
-                chunk_count = len(chunks['ids'][0]) if chunks['ids'] else 0
-            except Exception as e:
-                chunk_count = f"Error: {e}"
-            
-            doc_info.append({
+            info = {
                 "id": doc.id,
                 "title": doc.title,
                 "filename": doc.filename,
                 "is_processed": doc.is_processed,
-                "has_content": bool(doc.content),
-                "has_summary": bool(doc.summary),
-                "has_keywords": bool(doc.keywords),
-                "chroma_chunks": chunk_count
-            })
+                "has_content": bool(doc.has_content),
+                "has_summary": bool(doc.has_summary),
+                "has_keywords": bool(doc.has_keywords),
+                "chroma_chunks": doc.chunk_count or 0,
+                "vector_bytes": doc.vector_bytes or 0,
+                "embedding_model": doc.embedding_model
+            }
+            if verified_counts is not None:
+                info["verified_chunks"] = verified_counts.get(doc.id, 0)
+                info["in_sync"] = info["verified_chunks"] == info["chroma_chunks"]
+            doc_info.append(info)
+            if doc.embedding_model:
+                embedding_models[doc.embedding_model] = embedding_models.get(doc.embedding_model, 0) + 1
         
         return {
             "chromadb_info": collection_info,
             "processed_documents": doc_info,
-            "total_processed": len(processed_docs)
+            "total_processed": len(processed_docs),
+            "total_chunks": sum(info["chroma_chunks"] for info in doc_info),
+            "total_vector_bytes": sum(info["vector_bytes"] for info in doc_info),
+            "embedding_models": embedding_models
         }
         
     except Exception as e:
@@ -76,7 +290,36 @@ async def debug_chromadb(
 
 class QuestionRequest(BaseModel):
     question: str
+    document_id: Optional[int] = None
+    document_ids: Optional[List[int]] = None  # Birden çok doküman üzerinde soru
+
+    @model_validator(mode="after")
+    def check_scope(self):
+        if (self.document_id is None) == (not self.document_ids):
+            raise ValueError("Either document_id or document_ids must be given")
+        return self
+
+
+class BatchQuestionRequest(BaseModel):
+    questions: List[str]
     document_id: int
+    stream: bool = False
+
+
+NO_ANSWER_MESSAGE = "Bu soru için uygun bilgi bulunamadı. Lütfen başka bir soru deneyin veya dokümanı kontrol edin."
+
+
+def _format_sources(search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "chunk_index": result['metadata'].get('chunk_index'), # .get() kullanarak None hatasını engelleriz
+            "similarity": 1 - result['distance'] if result['distance'] is not None else None,
+            "chunk_text": result['chunk_text']
+            # Frontend'de slice ettiğimiz için burada tam metni gönderiyoruz.
+            # Eğer backend'de kesmek istiyorsanız: result['chunk_text'][:500] + "..."
+        }
+        for result in search_results
+    ]
 
 @router.post("/question")
 async def ask_question(
@@ -84,9 +327,15 @@ async def ask_question(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    """Belirli dokümana (veya doküman listesine) soru sor ve cevabı döndür"""
     question = request.question
-    document_id = request.document_id
-    """Belirli dokümana soru sor ve cevabı döndür"""
+    multi_document = request.document_id is None
+    document_ids = list(dict.fromkeys(request.document_ids)) if multi_document else [request.document_id]
+    if len(document_ids) > settings.QUESTION_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.QUESTION_MAX_DOCUMENTS} documents can be queried at once"
+        )
     
     # Aktivite Loglamasını en başta yapıyoruz, hata olsa bile sorunun sorulduğunu bilelim
     # Ancak gerçek bir hata oluşursa işlemi geri almak isteyebiliriz.
@@ -95,75 +344,62 @@ async def ask_question(
     activity_log_entry = ActivityLog(
         user_id=current_user.id,
         activity_type="question_ask", # Aktivite tipi: soru sorma
-        description=f"'{question}' sorusu soruldu.", # Soruyu açıklamaya ekle
-        document_id=document_id # Hangi dokümana sorulduğu
+        description=f"'{question}' sorusu {len(document_ids)} dokümanda soruldu." if multi_document else f"'{question}' sorusu soruldu.",
+        document_id=None if multi_document else request.document_id # Hangi dokümana sorulduğu
     )
     
     try:
         db.add(activity_log_entry)
+        adjust_user_stats(db, current_user.id, searches=1)
         db.commit() # Aktivite kaydını hemen veritabanına kaydet
         db.refresh(activity_log_entry) # ID ve timestamp gibi alanları güncelle
-        logger.info(f"Activity logged for user {current_user.id}: '{question}' on document {document_id}")
+        logger.info(f"Activity logged for user {current_user.id}: '{question}' on documents {document_ids}")
     except Exception as e:
         logger.warning(f"Failed to log question activity: {e}")
         # Loglama hatası ana API işlemini etkilememeli
 
     try:
-        # Doküman kontrolü
-        document = db.query(Document).filter(
-            Document.id == document_id,
-            Document.user_id == current_user.id
-        ).first()
+        # Doküman kontrolü (tüm dokümanlar tek sorguda)
+        documents = {
+            row.id: row
+            for row in db.query(Document.id, Document.title).filter(
+                Document.id.in_(document_ids),
+                Document.user_id == current_user.id
+            ).all()
+        }
         
-        if not document:
+        if len(documents) != len(document_ids):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Document not found or you don't have access to it."
             )
         
-        # İlgili parçaları ara
-        try:
-            search_results = ai_service.search_similar_chunks(
-                query=question,
-                n_results=5, # 5 alakalı parça alıyoruz
-                document_id=document_id
-            )
-            logger.info(f"Found {len(search_results)} relevant chunks for question: {question}")
-        except Exception as e:
-            logger.error(f"Error searching for question chunks: {e}")
-            search_results = [] # Hata durumunda boş liste
-        
+        # Aynı dokümanlara aynı soru eşzamanlı sorulursa tek arama ve tek LLM çağrısı yapılır
+        search_results, answer = await question_flights.do(
+            _question_key(document_ids, question, multi_document),
+            lambda: _retrieve_and_answer(question, document_ids, documents if multi_document else None, current_user.id)
+        )
+
+        if multi_document:
+            return _multi_document_response(question, documents, search_results, answer)
+
+        document = documents[request.document_id]
         if not search_results:
             # Eğer ilgili parça bulunamazsa, özel bir cevap döndür
             return {
                 "question": question,
-                "answer": "Bu soru için uygun bilgi bulunamadı. Lütfen başka bir soru deneyin veya dokümanı kontrol edin.",
-                "document_id": document_id,
+                "answer": NO_ANSWER_MESSAGE,
+                "document_id": document.id,
                 "document_title": document.title,
                 "sources": [] # Kaynak yoksa boş liste döndür
             }
         
-        # Parça metinlerini al
-        context_chunks = [result['chunk_text'] for result in search_results]
-        
-        # Soruyu cevapla (AI servisi ile)
-        answer = ai_service.answer_question(question, context_chunks)
-        
         return {
             "question": question,
             "answer": answer,
-            "document_id": document_id,
+            "document_id": document.id,
             "document_title": document.title,
-            "sources": [
-                {
-                    "chunk_index": result['metadata'].get('chunk_index'), # .get() kullanarak None hatasını engelleriz
-                    "similarity": 1 - result['distance'],
-                    "chunk_text": result['chunk_text'] 
-                    # Frontend'de slice ettiğimiz için burada tam metni gönderiyoruz.
-                    # Eğer backend'de kesmek istiyorsanız: result['chunk_text'][:500] + "..."
-                }
-                for result in search_results
-            ]
+            "sources": _format_sources(search_results)
         }
         
     except HTTPException as http_exc:
@@ -178,30 +414,180 @@ async def ask_question(
         )
 
 
+def _question_key(document_ids: List[int], question: str, multi_document: bool) -> Tuple[Tuple[int, ...], str, bool]:
+    """Doküman kümesi, normalize edilmiş soru ve yanıt biçiminden oluşan birleştirme anahtarı.
+
+    Tek dokümanlık istek ile aynı tek dokümanı `document_ids` ile soran
+    istek farklı sayıda chunk ve farklı kaynak etiketleriyle yanıtlanır.
+    """
+    return tuple(sorted(document_ids)), " ".join(question.casefold().split()), multi_document
+
+
+async def _retrieve_and_answer(
+    question: str,
+    document_ids: List[int],
+    documents: Optional[Dict[int, Any]],
+    user_id: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """İlgili parçaları ara ve cevabı üret; `documents` verilirse kaynaklar başlıklarla etiketlenir"""
+    # İlgili parçaları ara (çoklu dokümanda tek `$in` sorgusu ve küresel top-k)
+    try:
+        search_results = await run_in_threadpool(
+            ai_service.search_similar_chunks,
+            query=question,
+            n_results=settings.QUESTION_MULTI_DOCUMENT_CHUNKS if documents else 5, # 5 alakalı parça alıyoruz
+            document_ids=document_ids,
+            user_id=user_id
+        )
+        logger.info(f"Found {len(search_results)} relevant chunks for question: {question}")
+    except Exception as e:
+        logger.error(f"Error searching for question chunks: {e}")
+        search_results = [] # Hata durumunda boş liste
+
+    if not search_results:
+        return [], None
+
+    # Parça metinlerini al ve soruyu cevapla (AI servisi ile)
+    context_chunks = [result['chunk_text'] for result in search_results]
+    if documents:
+        titles = [documents[int(result['metadata']['document_id'])].title for result in search_results]
+        answer = await run_in_threadpool(ai_service.answer_question, question, context_chunks, titles)
+    else:
+        answer = await run_in_threadpool(ai_service.answer_question, question, context_chunks)
+    return search_results, answer
+
+
+def _multi_document_response(
+    question: str,
+    documents: Dict[int, Any],
+    search_results: List[Dict[str, Any]],
+    answer: Optional[str]
+) -> Dict[str, Any]:
+    """Dokümanlar arası cevabı kaynak dokümanlarıyla birlikte döndür"""
+    return {
+        "question": question,
+        "answer": answer if search_results else NO_ANSWER_MESSAGE,
+        "document_ids": list(documents),
+        "documents": [{"id": row.id, "title": row.title} for row in documents.values()],
+        "sources": [
+            {
+                **source,
+                "document_id": int(result['metadata']['document_id']),
+                "document_title": documents[int(result['metadata']['document_id'])].title
+            }
+            for source, result in zip(_format_sources(search_results), search_results)
+        ]
+    }
+
+
+@router.post("/question/batch")
+async def ask_questions_batch(
+    request: BatchQuestionRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Aynı dokümana birden çok soru sor.
+
+    Tüm sorular tek embedding çağrısı ve tek çoklu vektör sorgusuyla aranır;
+    LLM cevapları QUESTION_BATCH_CONCURRENCY sınırıyla paralel üretilir.
+    Sonuçlar soru sırasıyla döner; `stream` ile her cevap hazır olduğunda
+    `index` alanıyla birlikte NDJSON satırı olarak gönderilir.
+    """
+    questions = [question.strip() for question in request.questions]
+    if not questions or any(not question for question in questions):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Questions must be non-empty"
+        )
+    if len(questions) > settings.QUESTION_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.QUESTION_BATCH_MAX} questions can be asked at once"
+        )
+
+    document = db.query(Document.id, Document.title).filter(
+        Document.id == request.document_id,
+        Document.user_id == current_user.id
+    ).first()
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found or you don't have access to it."
+        )
+
+    try:
+        db.add(ActivityLog(
+            user_id=current_user.id,
+            activity_type="question_ask",
+            description=f"{len(questions)} soru toplu olarak soruldu.",
+            document_id=document.id
+        ))
+        adjust_user_stats(db, current_user.id, searches=1)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Failed to log batch question activity: {e}")
+
+    try:
+        search_results = await run_in_threadpool(
+            ai_service.search_similar_chunks_batch,
+            questions,
+            n_results=5,
+            document_id=document.id,
+            user_id=current_user.id
+        )
+    except Exception as e:
+        logger.error(f"Error searching chunks for batch questions: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Soru cevaplama sırasında beklenmeyen bir hata oluştu."
+        )
+
+    semaphore = asyncio.Semaphore(settings.QUESTION_BATCH_CONCURRENCY)
+
+    async def answer(index: int) -> Dict[str, Any]:
+        question, results = questions[index], search_results[index]
+        item = {"index": index, "question": question, "answer": NO_ANSWER_MESSAGE, "sources": []}
+        if not results:
+            return item
+        try:
+            async with semaphore:
+                item["answer"] = await run_in_threadpool(
+                    ai_service.answer_question, question, [result['chunk_text'] for result in results]
+                )
+            item["sources"] = _format_sources(results)
+        except Exception as e:
+            logger.error(f"Error answering batch question {index}: {e}")
+            item["answer"] = None
+            item["error"] = "Soru cevaplanamadı."
+        return item
+
+    if request.stream:
+        async def stream_answers():
+            for finished in asyncio.as_completed([answer(index) for index in range(len(questions))]):
+                yield json.dumps(await finished, ensure_ascii=False) + "\n"
+            yield json.dumps({"done": True}) + "\n"
+
+        return StreamingResponse(stream_answers(), media_type="application/x-ndjson")
+
+    return {
+        "document_id": document.id,
+        "document_title": document.title,
+        "results": await asyncio.gather(*(answer(index) for index in range(len(questions))))
+    }
+
+
 @router.get("/suggestions")
 async def get_search_suggestions(
     query: str = Query(..., description="Partial search query"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Arama önerileri"""
+    """Arama önerileri (en çok dokümanda geçen anahtar kelimeler önce)"""
     try:
-        # Kullanıcının dokümanlarından anahtar kelimeleri topla
-        documents = db.query(Document).filter(
-            Document.user_id == current_user.id,
-            Document.keywords.isnot(None)
-        ).all()
-        
-        suggestions = []
-        for doc in documents:
-            if doc.keywords:
-                keywords = doc.keywords.split(",")
-                for keyword in keywords:
-                    keyword = keyword.strip()
-                    if keyword.lower().startswith(query.lower()) and keyword not in suggestions:
-                        suggestions.append(keyword)
-        
-        return {"suggestions": suggestions[:10]}  # En fazla 10 öneri
+        # Kullanıcının bellek içi önek indeksinden ikili aramayla okunur
+        suggestions = keyword_index.suggest(db, current_user.id, query, limit=10)
+        return {"suggestions": suggestions}  # En fazla 10 öneri
         
     except Exception as e:
         logger.error(f"Error getting search suggestions: {e}")
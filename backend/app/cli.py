@@ -0,0 +1,198 @@
+"""DMS yönetim komutları.
+
+Kullanım:
+    python -m app.cli <komut> [seçenekler]
+"""
+import argparse
+import json
+
+from app.core.database import SessionLocal
+
+
+def _print_report(report):
+    print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+
+
+def migrate_partitions(args):
+    """Ortak koleksiyonu kullanıcı koleksiyonlarına taşı"""
+    from app.core.config import settings
+    from app.services.maintenance import migrate_to_user_partitions
+
+    if not settings.VECTOR_PARTITION_BY_USER and not args.dry_run:
+        raise SystemExit("VECTOR_PARTITION_BY_USER must be enabled before migrating")
+
+    db = SessionLocal()
+    try:
+        _print_report(migrate_to_user_partitions(
+            db,
+            batch_size=args.batch_size,
+            delete_source=args.delete_source,
+            dry_run=args.dry_run
+        ))
+    finally:
+        db.close()
+
+
+def garbage_collect(args):
+    """Yetim vektörleri, indeks kayıtlarını ve dosyaları raporla/temizle"""
+    from app.services.maintenance import collect_garbage
+
+    db = SessionLocal()
+    try:
+        _print_report(collect_garbage(db, dry_run=not args.apply, batch_size=args.batch_size))
+    finally:
+        db.close()
+
+
+def snapshot_export(args):
+    """Chunk vektörlerini ve metadata'yı anlık görüntüye aktar"""
+    from app.services.snapshot import export_snapshot
+
+    db = SessionLocal()
+    try:
+        _print_report(export_snapshot(db, args.output, dtype=args.dtype, batch_size=args.batch_size))
+    finally:
+        db.close()
+
+
+def snapshot_restore(args):
+    """Anlık görüntüyü yapılandırılmış vektör deposuna yükle"""
+    from app.services.snapshot import restore_snapshot
+
+    _print_report(restore_snapshot(args.input, batch_size=args.batch_size, collection_name=args.collection))
+
+
+def reindex(args):
+    """Tüm dokümanları yeni bir indeks sürümüne yeniden indeksle"""
+    from app.services.reindex import reindex_all
+
+    db = SessionLocal()
+    try:
+        _print_report(reindex_all(
+            db,
+            workers=args.workers,
+            throttle_ratio=args.throttle,
+            activate=not args.no_activate
+        ))
+    finally:
+        db.close()
+
+
+def activate_index(args):
+    """Bir indeks sürümünü aktif yap (geri dönüş için de kullanılır)"""
+    from app.services.reindex import activate_index_version
+
+    db = SessionLocal()
+    try:
+        version = activate_index_version(db, args.collection)
+        _print_report({"collection": version.collection_name, "status": version.status})
+    finally:
+        db.close()
+
+
+def backfill_summaries(args):
+    """Mevcut dokümanlar için özet vektörlerini oluştur"""
+    from app.services.maintenance import backfill_document_summaries
+
+    db = SessionLocal()
+    try:
+        _print_report(backfill_document_summaries(db, batch_size=args.batch_size))
+    finally:
+        db.close()
+
+
+def migrate_content(args):
+    """Eski `documents.content` metinlerini `document_contents` tablosuna taşı"""
+    from app.services.content_store import migrate_legacy_content
+
+    db = SessionLocal()
+    try:
+        _print_report(migrate_legacy_content(db, batch_size=args.batch_size))
+    finally:
+        db.close()
+
+
+def rebuild_stats(args):
+    """Dashboard sayaçlarını kaynak tablolardan yeniden hesapla"""
+    from app.services.user_stats import rebuild_user_stats
+
+    db = SessionLocal()
+    try:
+        _print_report(rebuild_user_stats(db))
+    finally:
+        db.close()
+
+
+def backfill_keywords(args):
+    """Anahtar kelime tablosunu mevcut dokümanlardan oluştur"""
+    from app.services.keyword_index import backfill_document_keywords
+
+    db = SessionLocal()
+    try:
+        _print_report(backfill_document_keywords(db, batch_size=args.batch_size))
+    finally:
+        db.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="DMS yönetim komutları")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate-partitions", help="Ortak koleksiyonu kullanıcı koleksiyonlarına taşı")
+    migrate.add_argument("--batch-size", type=int, default=500)
+    migrate.add_argument("--delete-source", action="store_true", help="Taşınan chunk'ları ortak koleksiyondan sil")
+    migrate.add_argument("--dry-run", action="store_true", help="Sadece raporla, yazma yapma")
+    migrate.set_defaults(func=migrate_partitions)
+
+    gc = subparsers.add_parser("gc", help="Yetim vektörleri ve dosyaları bul (varsayılan: dry-run)")
+    gc.add_argument("--apply", action="store_true", help="Bulunan yetimleri gerçekten sil")
+    gc.add_argument("--batch-size", type=int, default=None)
+    gc.set_defaults(func=garbage_collect)
+
+    export = subparsers.add_parser("snapshot-export", help="Vektör indeksini anlık görüntüye aktar")
+    export.add_argument("output", help="Anlık görüntü dizini")
+    export.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    export.add_argument("--batch-size", type=int, default=1000)
+    export.set_defaults(func=snapshot_export)
+
+    restore = subparsers.add_parser("snapshot-restore", help="Anlık görüntüden vektör indeksini geri yükle")
+    restore.add_argument("input", help="Anlık görüntü dizini")
+    restore.add_argument("--collection", default=None, help="Tüm satırları bu koleksiyona yaz")
+    restore.add_argument("--batch-size", type=int, default=1000)
+    restore.set_defaults(func=snapshot_restore)
+
+    rebuild = subparsers.add_parser("reindex", help="Yeni koleksiyona yeniden indeksle ve atomik olarak geçiş yap")
+    rebuild.add_argument("--workers", type=int, default=None)
+    rebuild.add_argument("--throttle", type=float, default=None, help="Batch süresinin bu katı kadar bekle")
+    rebuild.add_argument("--no-activate", action="store_true", help="Yeni sürümü oluştur ama aktif yapma")
+    rebuild.set_defaults(func=reindex)
+
+    activate = subparsers.add_parser("activate-index", help="Bir indeks sürümünü aktif yap")
+    activate.add_argument("collection", help="Sürümün koleksiyon adı")
+    activate.set_defaults(func=activate_index)
+
+    summaries = subparsers.add_parser("backfill-summaries", help="Eksik doküman özet vektörlerini oluştur")
+    summaries.add_argument("--batch-size", type=int, default=100)
+    summaries.set_defaults(func=backfill_summaries)
+
+    content = subparsers.add_parser("migrate-content", help="Doküman metinlerini ayrı içerik tablosuna taşı")
+    content.add_argument("--batch-size", type=int, default=100)
+    content.set_defaults(func=migrate_content)
+
+    stats = subparsers.add_parser("rebuild-stats", help="Kullanıcı dashboard sayaçlarını yeniden hesapla")
+    stats.set_defaults(func=rebuild_stats)
+
+    keywords = subparsers.add_parser("backfill-keywords", help="Arama önerileri için anahtar kelime tablosunu doldur")
+    keywords.add_argument("--batch-size", type=int, default=500)
+    keywords.set_defaults(func=backfill_keywords)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
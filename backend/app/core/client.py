@@ -1,15 +1,17 @@
 import logging
+import threading
 import chromadb
 from app.core.config import settings
+from app.core.vector_store import ChromaVectorStore, LocalVectorStore, VectorStore
 from chromadb.config import Settings
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from app.services.embedding_service import get_embedding_function
 
 logger = logging.getLogger(__name__)
 
 class ClientWrapper:
     _instance = None
     def __init__(self):
-        self.embedding_function = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+        self.embedding_function = get_embedding_function()
 
     def __new__(cls):
         if cls._instance is None:
@@ -18,6 +20,18 @@ class ClientWrapper:
         return cls._instance
 
     def _initialize(self):
+        self.backend = settings.VECTOR_STORE_BACKEND
+        self.client = None
+        self._local_stores = {}
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+        if self.backend == "local":
+            logger.info(f"Using local vector store at {settings.VECTOR_STORE_PATH}")
+            return
+        if self.backend != "chroma":
+            raise ValueError(f"Unsupported vector store backend: {self.backend}")
+
         try:
             self.client = chromadb.HttpClient(
                 host=settings.CHROMA_HOST,
@@ -32,25 +46,64 @@ class ClientWrapper:
             logger.error(f"Failed to initialize ChromaDB client: {e}")
             raise
 
-    def get_or_create_collection(self, name, metadata=None):
+    def _local_store(self, name, metadata=None) -> VectorStore:
+        with self._lock:
+            store = self._local_stores.get(name)
+            if store is None:
+                store = LocalVectorStore(settings.VECTOR_STORE_PATH, name, metadata=metadata)
+                self._local_stores[name] = store
+            return store
+
+    def get_or_create_collection(self, name, metadata=None) -> VectorStore:
         try:
-            collection = self.client.get_or_create_collection(
-                name=name,
-                embedding_function=self.embedding_function,
-                metadata=metadata 
-            )
+            if self.backend == "local":
+                collection = self._local_store(name, metadata)
+            else:
+                collection = ChromaVectorStore(self.client.get_or_create_collection(
+                    name=name,
+                    embedding_function=self.embedding_function,
+                    metadata=metadata 
+                ))
             logger.info(f"Collection '{name}' retrieved/created successfully")
             return collection
         except Exception as e:
             logger.error(f"Failed to get/create collection '{name}': {e}")
             raise
 
-    def get_collection(self, name):
+    @staticmethod
+    def partition_name(base_name: str, user_id: int) -> str:
+        """Kullanıcıya ait bölümlenmiş koleksiyonun adını döndür"""
+        return f"{base_name}_u{user_id}"
+
+    def get_partition(self, base_name, user_id=None, metadata=None) -> VectorStore:
+        """Kullanıcının koleksiyonunu döndür (bölümleme kapalıysa ortak koleksiyon).
+
+        Koleksiyon nesneleri önbelleğe alınır; böylece her istekte
+        get_or_create çağrısı için ek bir ağ turu yapılmaz.
+        """
+        if not settings.VECTOR_PARTITION_BY_USER or user_id is None:
+            name = base_name
+        else:
+            name = self.partition_name(base_name, user_id)
+
+        collection = self._partitions.get(name)
+        if collection is None:
+            collection = self.get_or_create_collection(name, metadata=metadata)
+            with self._lock:
+                self._partitions[name] = collection
+        return collection
+
+    def get_collection(self, name) -> VectorStore:
         try:
-            collection = self.client.get_collection(
-                name=name,
-                embedding_function=self.embedding_function
-            )
+            if self.backend == "local":
+                if name not in self._local_stores and not LocalVectorStore.exists(settings.VECTOR_STORE_PATH, name):
+                    raise ValueError(f"Collection {name} does not exist.")
+                collection = self._local_store(name)
+            else:
+                collection = ChromaVectorStore(self.client.get_collection(
+                    name=name,
+                    embedding_function=self.embedding_function
+                ))
             logger.info(f"Collection '{name}' retrieved successfully")
             return collection
         except Exception as e:
@@ -59,10 +112,18 @@ class ClientWrapper:
 
     def delete_collection(self, name):
         try:
-            self.client.delete_collection(
-                name=name
-            )
-            logger.info(f"Created or retrieved collection: {name}")
+            if self.backend == "local":
+                with self._lock:
+                    store = self._local_stores.pop(name, None)
+                    self._partitions.pop(name, None)
+                (store or LocalVectorStore(settings.VECTOR_STORE_PATH, name)).drop()
+            else:
+                self.client.delete_collection(
+                    name=name
+                )
+                with self._lock:
+                    self._partitions.pop(name, None)
+            logger.info(f"Deleted collection: {name}")
         except Exception as e:
-            logger.error(f"Collection creation error'{name}': {e}")
+            logger.error(f"Collection deletion error '{name}': {e}")
             raise
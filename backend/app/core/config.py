@@ -24,12 +24,75 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: Optional[str] = None
     
     # Depolama ayarları
-    STORAGE_TYPE: str = "disk"  
-    STORAGE_PATH: str = "./uploads"
+    STORAGE_TYPE: str = "disk"  # disk | s3
+    STORAGE_PATH: str = "./uploads"  # s3 modunda yüklemelerin hazırlandığı yerel dizin
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
     ALLOWED_EXTENSIONS: List[str] = [".pdf", ".docx", ".txt", ".md", ".jpg", ".jpeg", ".png", ".gif"]
 
+    # S3 uyumlu nesne deposu (AWS S3, MinIO) ayarları
+    S3_BUCKET: Optional[str] = None
+    S3_PREFIX: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None  # MinIO vb. için, ör. http://localhost:9000
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_MAX_POOL_CONNECTIONS: int = 32  # Paylaşılan istemcinin HTTP bağlantı havuzu
+    S3_MULTIPART_THRESHOLD: int = 16 * 1024 * 1024  # Bu boyuttan büyük dosyalar multipart yüklenir
+    S3_MULTIPART_CHUNKSIZE: int = 16 * 1024 * 1024
+    S3_UPLOAD_CONCURRENCY: int = 8  # Dosya başına paralel yüklenen parça sayısı
+    S3_READ_BLOCK_SIZE: int = 1024 * 1024  # Ranged GET başına okunan bayt
+
+    # Uzak depolama için yerel disk önbelleği (0: kapalı)
+    STORAGE_CACHE_PATH: str = "./storage_cache"
+    STORAGE_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # Sıkıştırma (zstd) ayarları
+    COMPRESSION_ENABLED: bool = True  # Uygun uzantılı yüklemeleri şifrelemeden önce sıkıştır
+    COMPRESSION_LEVEL: int = 3
+    COMPRESSIBLE_EXTENSIONS: List[str] = [".txt", ".md"]  # DOCX zaten deflate ile sıkıştırılmış bir zip
+    CONTENT_COMPRESSION_ENABLED: bool = True  # Çıkarılan metni veritabanında sıkıştır
+    CONTENT_COMPRESSION_MIN_CHARS: int = 4096
     
+    # Vektör deposu ayarları
+    VECTOR_COLLECTION_NAME: str = "documents"  # Sürüm kaydı yokken kullanılan temel koleksiyon
+    VECTOR_STORE_BACKEND: str = "chroma"  # chroma: Chroma HTTP sunucusu, local: süreç içi mmap indeks
+    VECTOR_STORE_PATH: str = "./vector_store"
+    VECTOR_PARTITION_BY_USER: bool = False  # Her kullanıcının chunk'larını ayrı koleksiyonda tut
+    VECTOR_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # Doküman vektör önbelleği (0: kapalı)
+    VECTOR_CACHE_MAX_DOCUMENT_CHUNKS: int = 2000
+    VECTOR_CACHE_TTL_SECONDS: int = 300
+    VECTOR_STORE_CHUNK_TEXT: bool = True  # False: chunk metni vektör deposunda tutulmaz, karakter aralığıyla doküman metninden okunur
+
+    # Sözcüksel (BM25) arama ayarları
+    RETRIEVAL_MODE: str = "vector"  # vector | lexical | hybrid
+    LEXICAL_INDEX_PATH: str = "./lexical_index/bm25.idx"
+    LEXICAL_DECISIVE_RATIO: float = 2.0  # İlk skor ikinciden bu kadar büyükse embedding atlanır
+    LEXICAL_MIN_DECISIVE_SCORE: float = 5.0
+    RRF_K: int = 60
+
+    # İki aşamalı arama: önce özet indeksinden en iyi M doküman seçilir (0: düz chunk araması)
+    SEARCH_TOP_DOCUMENTS: int = 0
+
+    # Yeniden indeksleme (mavi/yeşil) ayarları
+    REINDEX_WORKERS: int = 2
+    REINDEX_THROTTLE_RATIO: float = 0.0  # Her batch süresinin bu katı kadar bekle (0: kısıtlama yok)
+    INDEX_VERSION_CHECK_SECONDS: int = 30  # API süreçlerinin aktif sürümü yeniden okuma aralığı
+
+    # Arama önerileri için kullanıcı başına anahtar kelime önek indeksi
+    KEYWORD_INDEX_MAX_USERS: int = 1000
+    KEYWORD_INDEX_TTL_SECONDS: int = 300
+
+    # Dashboard yanıtlarının kullanıcı başına önbellek süresi (0: kapalı)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 10
+
+    # Vektör anlık görüntüleri (snapshot)
+    SNAPSHOT_PATH: str = "./snapshots"
+
+    # Çöp toplama (GC) ayarları
+    GC_INTERVAL_SECONDS: int = 0  # 0: periyodik GC kapalı
+    GC_GRACE_SECONDS: int = 3600  # Bu süreden yeni dosyalar yetim sayılmaz (yükleme sürüyor olabilir)
+    GC_BATCH_SIZE: int = 1000
+
     # ChromaDB ayarları
     CHROMA_HOST: str
     CHROMA_PORT: int
@@ -38,6 +101,7 @@ class Settings(BaseSettings):
     CHROMA_SERVER_AUTH_PROVIDER: str
     # Dosya şifreleme
     ENCRYPTION_KEY: Optional[str] = None
+    ENCRYPTION_SEGMENT_SIZE: int = 64 * 1024  # Şifreli dosyalarda bağımsız çözülebilen segment boyutu
     
     # Log ayarları
     LOG_LEVEL: str = "INFO"
@@ -48,6 +112,25 @@ class Settings(BaseSettings):
     CHUNK_OVERLAP: int = 50
     EMBEDDING_MODEL: str = "gemini-embedding-001"
     LLM_MODEL: str = "gemini-2.0-flash"
+    LOCAL_EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_DIMENSION: int = 384
+    QUESTION_BATCH_MAX: int = 50  # Toplu soru isteğindeki en fazla soru
+    QUESTION_BATCH_CONCURRENCY: int = 4  # Aynı anda çalışan LLM cevap çağrısı
+    QUESTION_MAX_DOCUMENTS: int = 20  # Tek soruda sorgulanabilecek en fazla doküman
+    QUESTION_MULTI_DOCUMENT_CHUNKS: int = 8  # Çoklu doküman sorularında bağlama giren parça sayısı
+
+    # Vektör yazma ayarları
+    VECTOR_WRITE_BATCH_SIZE: int = 256
+    VECTOR_WRITE_BATCH_BYTES: int = 4 * 1024 * 1024
+    VECTOR_WRITE_RETRIES: int = 3
+    VECTOR_WRITE_BACKOFF_SECONDS: float = 0.5
+
+    # Embedding servisi ayarları
+    EMBEDDING_SERVICE_MODE: str = "local"  # local: süreç içi model, remote: paylaşımlı embedding servisi
+    EMBEDDING_SERVICE_SOCKET: str = "/tmp/dms-embedding.sock"
+    EMBEDDING_SERVICE_WORKERS: int = 1
+    EMBEDDING_SERVICE_MAX_BATCH: int = 64
+    EMBEDDING_SERVICE_TIMEOUT: float = 30.0
     
     # Pydantic V2 için yapılandırma
     model_config = SettingsConfigDict(
@@ -1,5 +1,5 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from loguru import logger
 
 from app.core.config import settings
@@ -34,6 +34,14 @@ def get_db():
     finally:
         db.close()
 
+def run_after_commit(db: Session, callback):
+    """Çağıranın transaction'ı commit edildikten sonra `callback`'i çalıştır.
+
+    Süreç içi önbellekler commit'ten önce düşürülürse eşzamanlı bir okuma
+    eski değeri yeniden önbelleğe alabilir.
+    """
+    event.listen(db, "after_commit", lambda session: callback(), once=True)
+
 def init_db():
     """Veritabanını başlat"""
     try:
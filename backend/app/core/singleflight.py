@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from loguru import logger
+
+
+class SingleFlight:
+    """Aynı anahtarla eşzamanlı gelen çağrıları tek bir hesaplamada birleştirir.
+
+    İlk çağrı hesaplamayı bir görev olarak başlatır; hesaplama sürerken aynı
+    anahtarla gelen çağrılar yeni iş başlatmak yerine o görevin sonucunu
+    (veya hatasını) bekler. Sonuç saklanmaz: görev bittiğinde anahtar serbest
+    kalır. Birleştirme süreç içidir; farklı worker süreçleri kendi
+    hesaplamalarını yapar.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            logger.debug(f"Joining in-flight {self.name} call for {key!r}")
+
+        # Bekleyen bir istemci iptal edilirse ortak hesaplama iptal edilmez
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]"):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"{self.name} call for {key!r} failed: {task.exception()}")
@@ -0,0 +1,506 @@
+import json
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from loguru import logger
+
+# Chroma'nın varsayılan include değerleri
+QUERY_INCLUDE = ["metadatas", "documents", "distances"]
+GET_INCLUDE = ["metadatas", "documents"]
+
+
+class VectorStore(ABC):
+    """Vektör koleksiyonu arayüzü.
+
+    Metot imzaları Chroma koleksiyon API'sinin kullandığımız alt kümesiyle
+    aynıdır; böylece `AIService.collection` arka uçtan bağımsız kalır.
+    """
+
+    name: str
+    metadata: Optional[Dict[str, Any]]
+
+    @abstractmethod
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        ...
+
+    @abstractmethod
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        ...
+
+    @abstractmethod
+    def query(self, query_embeddings, n_results: int = 10, where=None, include=None) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def delete(self, ids=None, where=None):
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+
+class ChromaVectorStore(VectorStore):
+    """Chroma HTTP koleksiyonu üzerinde ince sarmalayıcı"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    @property
+    def name(self) -> str:
+        return self._collection.name
+
+    @property
+    def metadata(self) -> Optional[Dict[str, Any]]:
+        return self._collection.metadata
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        return self._collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        return self._collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def query(self, query_embeddings, n_results: int = 10, where=None, include=None) -> Dict[str, Any]:
+        return self._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=include if include is not None else QUERY_INCLUDE
+        )
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None) -> Dict[str, Any]:
+        return self._collection.get(
+            ids=ids,
+            where=where,
+            limit=limit,
+            offset=offset,
+            include=include if include is not None else GET_INCLUDE
+        )
+
+    def delete(self, ids=None, where=None):
+        return self._collection.delete(ids=ids, where=where)
+
+    def count(self) -> int:
+        return self._collection.count()
+
+
+class LocalVectorStore(VectorStore):
+    """Süreç içi düz (flat) vektör indeksi.
+
+    Vektörler normalize edilmiş float32 olarak mmap'lenmiş bir `.npy`
+    dosyasında, kimlik/metin/metadata kayıtları ise yalnızca eklenen bir
+    JSONL günlüğünde tutulur. Sorgular tam (exact) kosinüs benzerliği ile
+    yanıtlanır; `document_id` filtreleri bir satır indeksinden karşılanır.
+    Dosyalar tek bir süreç tarafından yazılmak üzere tasarlanmıştır.
+    """
+
+    _INITIAL_CAPACITY = 1024
+
+    def __init__(self, root_path: str, name: str, metadata: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.path = os.path.join(root_path, name)
+        self._manifest_path = os.path.join(self.path, "store.json")
+        self._generation = 0
+        self._vectors_path, self._log_path = self._data_paths(self._generation)
+        self._lock = threading.RLock()
+
+        self.metadata = metadata
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._size = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        self._document_rows: Dict[str, Set[int]] = {}
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    # --- Kalıcılık ---
+
+    @staticmethod
+    def exists(root_path: str, name: str) -> bool:
+        return os.path.exists(os.path.join(root_path, name, "store.json"))
+
+    def _data_paths(self, generation: int):
+        """Nesil numarasına göre vektör ve günlük dosyası yolları (0: ilk sürümdeki adlar)"""
+        if generation == 0:
+            return os.path.join(self.path, "vectors.npy"), os.path.join(self.path, "records.jsonl")
+        return (
+            os.path.join(self.path, f"vectors.{generation}.npy"),
+            os.path.join(self.path, f"records.{generation}.jsonl")
+        )
+
+    def _load(self):
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._dim = manifest.get("dim")
+            self._generation = manifest.get("generation", 0)
+            self._vectors_path, self._log_path = self._data_paths(self._generation)
+            if self.metadata is None:
+                self.metadata = manifest.get("metadata")
+        else:
+            self._write_manifest()
+
+        if self._dim is not None and os.path.exists(self._vectors_path):
+            self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+
+        if os.path.exists(self._log_path):
+            with open(self._log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record["op"] == "put":
+                        self._apply_put(record["row"], record["id"], record.get("document"), record.get("metadata"))
+                    elif record["op"] == "del":
+                        self._apply_delete(record["row"])
+
+    def _write_manifest(self):
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self._dim, "metadata": self.metadata, "generation": self._generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path)
+
+    def _ensure_capacity(self, required: int, dim: int):
+        if self._dim is None:
+            self._dim = dim
+            self._write_manifest()
+        elif dim != self._dim:
+            raise ValueError(f"Embedding dimension {dim} does not match collection dimension {self._dim}")
+
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if required <= capacity:
+            return
+
+        new_capacity = max(self._INITIAL_CAPACITY, capacity)
+        while new_capacity < required:
+            new_capacity *= 2
+
+        tmp_path = f"{self._vectors_path}.tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, self._dim))
+        if self._vectors is not None:
+            grown[:capacity] = self._vectors
+        grown.flush()
+        del grown
+        self._vectors = None
+        os.replace(tmp_path, self._vectors_path)
+        self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+
+        if len(self._alive) < new_capacity:
+            alive = np.zeros(new_capacity, dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            self._alive = alive
+
+    def _append_log(self, records: Iterable[Dict[str, Any]]):
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # --- Bellek içi durum ---
+
+    def _apply_put(self, row: int, id: str, document: Optional[str], metadata: Optional[Dict[str, Any]]):
+        while len(self._ids) <= row:
+            self._ids.append(None)
+            self._documents.append(None)
+            self._metadatas.append(None)
+        if len(self._alive) <= row:
+            alive = np.zeros(max(row + 1, len(self._alive) * 2), dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            self._alive = alive
+        if self._alive[row]:
+            self._apply_delete(row)
+
+        self._ids[row] = id
+        self._documents[row] = document
+        self._metadatas[row] = metadata
+        self._alive[row] = True
+        self._rows[id] = row
+        self._size = max(self._size, row + 1)
+
+        document_id = (metadata or {}).get("document_id")
+        if document_id is not None:
+            self._document_rows.setdefault(str(document_id), set()).add(row)
+
+    def _apply_delete(self, row: int):
+        if row >= len(self._ids) or not self._alive[row]:
+            return
+        self._alive[row] = False
+        self._rows.pop(self._ids[row], None)
+        document_id = (self._metadatas[row] or {}).get("document_id")
+        if document_id is not None:
+            rows = self._document_rows.get(str(document_id))
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._document_rows[str(document_id)]
+
+    # --- Yazma işlemleri ---
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        with self._lock:
+            duplicates = [id for id in ids if id in self._rows]
+            if duplicates:
+                raise ValueError(f"IDs already exist in collection '{self.name}': {duplicates[:5]}")
+            self._write(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        with self._lock:
+            self._write(ids, embeddings, documents, metadatas)
+
+    def _write(self, ids, embeddings, documents, metadatas):
+        if not ids:
+            return
+        matrix = _normalize(np.asarray(embeddings, dtype=np.float32))
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError("Embeddings must be a 2D array with one row per id")
+
+        rows = []
+        assigned = {}
+        next_row = self._size
+        for id in ids:
+            if id in assigned:
+                rows.append(assigned[id])
+            elif id in self._rows:
+                rows.append(self._rows[id])
+            else:
+                rows.append(next_row)
+                next_row += 1
+            assigned[id] = rows[-1]
+
+        self._ensure_capacity(next_row, matrix.shape[1])
+        self._vectors[rows] = matrix
+        self._vectors.flush()
+
+        records = [
+            {
+                "op": "put",
+                "row": int(row),
+                "id": id,
+                "document": documents[i] if documents is not None else None,
+                "metadata": metadatas[i] if metadatas is not None else None
+            }
+            for i, (id, row) in enumerate(zip(ids, rows))
+        ]
+        # Önce günlük yazılır; yazma başarısız olursa bellekteki durum değişmez
+        self._append_log(records)
+        for record in records:
+            self._apply_put(record["row"], record["id"], record["document"], record["metadata"])
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[id] for id in ids if id in self._rows]
+                if where is not None:
+                    rows = [row for row in rows if _matches(self._metadatas[row], where)]
+            elif where is not None:
+                rows = list(self._candidate_rows(where))
+            else:
+                return
+
+            # NumPy tamsayıları JSON'a yazılamaz; günlük bellekteki durumdan önce yazılır
+            rows = [int(row) for row in rows]
+            self._append_log({"op": "del", "row": row} for row in rows)
+            for row in rows:
+                self._apply_delete(row)
+
+    # --- Okuma işlemleri ---
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def _candidate_rows(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Filtreye uyan canlı satırları döndür"""
+        document_ids = _document_id_filter(where)
+        if document_ids is not None:
+            rows = sorted(row for document_id in document_ids for row in self._document_rows.get(document_id, ()))
+            rows = np.asarray(rows, dtype=np.int64)
+        else:
+            rows = np.flatnonzero(self._alive[:self._size])
+
+        if where:
+            rows = np.asarray([row for row in rows if _matches(self._metadatas[row], where)], dtype=np.int64)
+        return rows
+
+    def query(self, query_embeddings, n_results: int = 10, where=None, include=None) -> Dict[str, Any]:
+        include = include if include is not None else QUERY_INCLUDE
+        queries = _normalize(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+
+        with self._lock:
+            rows = self._candidate_rows(where)
+            result = {"ids": [], "distances": [], "documents": [], "metadatas": [], "embeddings": []}
+            if len(rows) == 0 or self._vectors is None:
+                for _ in range(len(queries)):
+                    for key in result:
+                        result[key].append([])
+                return _select(result, include, always=("ids",))
+
+            vectors = self._vectors[rows]
+            scores = queries @ vectors.T
+            k = min(n_results, len(rows))
+
+            for query_scores in scores:
+                if k < len(rows):
+                    top = np.argpartition(-query_scores, k - 1)[:k]
+                else:
+                    top = np.arange(len(rows))
+                top = top[np.argsort(-query_scores[top], kind="stable")]
+                hit_rows = rows[top]
+                result["ids"].append([self._ids[row] for row in hit_rows])
+                result["distances"].append([float(1.0 - query_scores[i]) for i in top])
+                result["documents"].append([self._documents[row] for row in hit_rows])
+                result["metadatas"].append([self._metadatas[row] for row in hit_rows])
+                result["embeddings"].append([vectors[i].tolist() for i in top])
+
+        return _select(result, include, always=("ids",))
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None) -> Dict[str, Any]:
+        include = include if include is not None else GET_INCLUDE
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[id] for id in ids if id in self._rows]
+                if where is not None:
+                    rows = [row for row in rows if _matches(self._metadatas[row], where)]
+            else:
+                rows = list(self._candidate_rows(where))
+
+            start = offset or 0
+            rows = rows[start:start + limit] if limit is not None else rows[start:]
+            result = {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._documents[row] for row in rows],
+                "metadatas": [self._metadatas[row] for row in rows],
+                "embeddings": [self._vectors[row].tolist() for row in rows] if "embeddings" in include else None,
+            }
+        return _select(result, include, always=("ids",))
+
+    def compact(self):
+        """Silinmiş satırları atarak vektör dosyasını ve günlüğü yeniden yaz.
+
+        Sıkıştırılmış dosyalar yeni bir nesil adıyla yazılır ve manifest'in
+        atomik olarak değiştirilmesiyle devreye alınır. İşlem yarıda kalırsa
+        manifest hâlâ eski nesli gösterir; indeks kaybolmaz.
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            generation = self._generation + 1
+            vectors_path, log_path = self._data_paths(generation)
+
+            if len(rows):
+                capacity = max(self._INITIAL_CAPACITY, len(rows))
+                compacted = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(capacity, self._dim))
+                compacted[:len(rows)] = self._vectors[rows]
+                compacted.flush()
+                del compacted
+            with open(log_path, "w", encoding="utf-8") as f:
+                for new_row, row in enumerate(rows):
+                    record = {
+                        "op": "put",
+                        "row": new_row,
+                        "id": self._ids[row],
+                        "document": self._documents[row],
+                        "metadata": self._metadatas[row]
+                    }
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            old_paths = (self._vectors_path, self._log_path)
+            self._vectors = None
+            self._generation = generation
+            self._vectors_path, self._log_path = vectors_path, log_path
+            self._write_manifest()
+            for path in old_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+            self._size = 0
+            self._alive = np.zeros(0, dtype=bool)
+            self._ids, self._documents, self._metadatas = [], [], []
+            self._rows, self._document_rows = {}, {}
+            self._load()
+            logger.info(f"Compacted local vector store '{self.name}' to {len(rows)} vectors")
+
+    def drop(self):
+        """Koleksiyonu diskten tamamen sil"""
+        with self._lock:
+            self._vectors = None
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def _select(result: Dict[str, Any], include: List[str], always=()) -> Dict[str, Any]:
+    return {key: (value if key in include or key in always else None) for key, value in result.items()}
+
+
+def _document_id_filter(where: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """Filtreden `document_id` kısıtını çıkar (varsa)"""
+    if not where:
+        return None
+    if "document_id" in where:
+        condition = where["document_id"]
+        if isinstance(condition, dict):
+            if "$eq" in condition:
+                return [str(condition["$eq"])]
+            if "$in" in condition:
+                return [str(value) for value in condition["$in"]]
+            return None
+        return [str(condition)]
+    for clause in where.get("$and", []):
+        document_ids = _document_id_filter(clause)
+        if document_ids is not None:
+            return document_ids
+    return None
+
+
+_OPERATORS = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$gt": lambda value, target: value is not None and value > target,
+    "$gte": lambda value, target: value is not None and value >= target,
+    "$lt": lambda value, target: value is not None and value < target,
+    "$lte": lambda value, target: value is not None and value <= target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+
+def _matches(metadata: Optional[Dict[str, Any]], where: Dict[str, Any]) -> bool:
+    """Chroma `where` sözdiziminin temel alt kümesini değerlendir"""
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, target in condition.items():
+                if operator not in _OPERATORS:
+                    raise ValueError(f"Unsupported where operator: {operator}")
+                if not _OPERATORS[operator](value, target):
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
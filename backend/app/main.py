@@ -1,5 +1,7 @@
+import asyncio
 from fastapi import FastAPI, HTTPException, status, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 import uvicorn
 from loguru import logger
@@ -10,6 +12,32 @@ from app.api.v1.api import api_router
 from app.core.security import get_current_user 
 from prometheus_fastapi_instrumentator import Instrumentator
 from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from app.services.storage_service import PROFILE_PICTURE_PATTERN
+
+
+class ProfilePictureFiles(StaticFiles):
+    """Depolama dizininden yalnızca profil resimlerini sunar.
+
+    Doküman dosyaları yetkilendirilmiş `/documents/{id}/content` üzerinden indirilir.
+    """
+
+    async def get_response(self, path: str, scope):
+        if not PROFILE_PICTURE_PATTERN.match(path):
+            raise StarletteHTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+
+async def periodic_garbage_collection(interval: int):
+    """Yetim vektör ve dosyaları belirli aralıklarla temizle"""
+    from app.services.maintenance import run_garbage_collection
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(run_garbage_collection)
+        except Exception as e:
+            logger.error(f"Periodic garbage collection failed: {e}")
 
 
 @asynccontextmanager
@@ -20,8 +48,15 @@ async def lifespan(app: FastAPI):
         logger.info("Database tables created successfully (if not already existing)")
     except Exception as e:
         logger.warning(f"Database initialization failed (this is normal in test environment): {e}")
+
+    gc_task = None
+    if settings.GC_INTERVAL_SECONDS > 0:
+        gc_task = asyncio.create_task(periodic_garbage_collection(settings.GC_INTERVAL_SECONDS))
     
     yield
+
+    if gc_task is not None:
+        gc_task.cancel()
     
     logger.info("Shutting down DMS application...")
 
@@ -41,9 +76,11 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Sayfalama imleci yanıt başlığında döner; tarayıcıların okuyabilmesi için açılır
+        expose_headers=["X-Next-Cursor"],
     )
 
-    app_instance.mount("/uploads", StaticFiles(directory=settings.STORAGE_PATH), name="uploads")
+    app_instance.mount("/uploads", ProfilePictureFiles(directory=settings.STORAGE_PATH), name="uploads")
 
     instrumentator = Instrumentator()
     instrumentator.instrument(app_instance).expose(app_instance)
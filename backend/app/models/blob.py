@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    digest = Column(String(64), primary_key=True)  # Düz içeriğin SHA-256 özeti
+    location = Column(String, nullable=False)  # Depolama arka ucundaki konum
+    size = Column(BigInteger, nullable=False)  # Düz içerik boyutu
+    ref_count = Column(Integer, nullable=False, default=0)  # Bu blob'a referans veren doküman sayısı
+    compressed = Column(Boolean, nullable=False, default=False)  # Depodaki baytlar zstd ile sıkıştırılmış mı
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<Blob(digest='{self.digest[:12]}', ref_count={self.ref_count})>"
@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.core.database import Base
+from app.models.document_content import DocumentContent
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Liste uç noktasının keyset sayfalaması (user_id, created_at, id) sırasıyla ilerler
+        Index("ix_documents_user_created_id", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -13,7 +18,9 @@ class Document(Base):
     file_path = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)
     file_type = Column(String, nullable=False)
-    content = Column(Text, nullable=True)  # Çıkarılan metin içeriği
+    # Eski satırlardaki metin; yeni metinler `document_contents` tablosunda tutulur (bkz. migrate-content)
+    legacy_content = deferred(Column("content", Text, nullable=True))
+    content_record = relationship("DocumentContent", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
     summary = Column(Text, nullable=True)  # AI özeti
     keywords = Column(Text, nullable=True)  # JSON formatında anahtar kelimeler
     activity_logs = relationship("ActivityLog", back_populates="document")
@@ -25,8 +32,31 @@ class Document(Base):
     # Meta veriler
     is_processed = Column(Boolean, default=False)  # RAG işlemi tamamlandı mı?
     is_encrypted = Column(Boolean, default=False)
+    is_compressed = Column(Boolean, default=False)  # Dosya zstd ile sıkıştırılmış saklanıyor (blob kaydından kopyalanır)
+    blob_digest = Column(String(64), ForeignKey("blobs.digest"), nullable=True, index=True)  # İçerik adresli dosya (eski yüklemelerde boş)
+    chunk_count = Column(Integer, default=0)  # Vektör deposundaki chunk sayısı
+    vector_bytes = Column(BigInteger, default=0)  # Chunk vektörlerinin toplam boyutu
+    embedding_model = Column(String, nullable=True)  # Vektörleri üreten embedding modeli
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    @property
+    def content(self):
+        """Çıkarılan metin; ilk erişimde ayrı tablodan yüklenir"""
+        if self.content_record is not None:
+            return self.content_record.text
+        return self.legacy_content
+
+    @content.setter
+    def content(self, value):
+        if value is None:
+            self.content_record = None
+        elif self.content_record is None:
+            self.content_record = DocumentContent(text=value, char_count=len(value))
+        else:
+            self.content_record.text = value
+            self.content_record.char_count = len(value)
+        self.legacy_content = None
+
     def __repr__(self):
         return f"<Document(id={self.id}, title='{self.title}', filename='{self.filename}')>" 
\ No newline at end of file
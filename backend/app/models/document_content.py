@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, LargeBinary, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+from app.models.types import decode_text, encode_text
+
+class DocumentContent(Base):
+    __tablename__ = "document_contents"
+
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    # Çıkarılan tam metin ya düz ya da (uzunsa) zstd ile sıkıştırılmış sütunda tutulur;
+    # kodlamayı hangi sütunun dolu olduğu belirler, içerik yorumlanmaz
+    plain_text = Column("text", Text, nullable=True)
+    compressed_text = Column(LargeBinary, nullable=True)
+    char_count = Column(Integer, nullable=False, default=0)  # Chunk karakter aralıkları bu metne göredir
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    @property
+    def text(self):
+        return decode_text(self.plain_text, self.compressed_text)
+
+    @text.setter
+    def text(self, value):
+        self.plain_text, self.compressed_text = encode_text(value)
+
+    def __repr__(self):
+        return f"<DocumentContent(document_id={self.document_id}, char_count={self.char_count})>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, UniqueConstraint
+
+from app.core.database import Base
+
+class DocumentKeyword(Base):
+    __tablename__ = "document_keywords"
+    __table_args__ = (
+        UniqueConstraint("document_id", "normalized", name="uq_document_keywords_document_normalized"),
+        # Öneri indeksi kullanıcının anahtar kelimelerini bu indeks üzerinden gruplar
+        Index("ix_document_keywords_user_normalized", "user_id", "normalized"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    keyword = Column(String, nullable=False)  # Gösterilen biçim
+    normalized = Column(String, nullable=False)  # Karşılaştırma için küçük harfe çevrilmiş biçim
+
+    def __repr__(self):
+        return f"<DocumentKeyword(document_id={self.document_id}, keyword='{self.keyword}')>"
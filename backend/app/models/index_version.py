@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class VectorIndexVersion(Base):
+    __tablename__ = "vector_index_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    collection_name = Column(String, unique=True, nullable=False)
+    embedding_model = Column(String, nullable=False)
+    chunker_version = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="building", index=True)  # building | active | retired | failed
+    document_count = Column(Integer, default=0)
+    chunk_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    activated_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<VectorIndexVersion(id={self.id}, collection='{self.collection_name}', status='{self.status}')>"
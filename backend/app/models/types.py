@@ -0,0 +1,23 @@
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.services.compression import compress_text, decompress_text
+
+
+def encode_text(value: Optional[str]) -> Tuple[Optional[str], Optional[bytes]]:
+    """Metni (düz, sıkıştırılmış) sütun çiftine ayır; yalnızca biri dolu olur.
+
+    CONTENT_COMPRESSION_MIN_CHARS'tan kısa değerler düz yazılır.
+    """
+    if value is None:
+        return None, None
+    if not settings.CONTENT_COMPRESSION_ENABLED or len(value) < settings.CONTENT_COMPRESSION_MIN_CHARS:
+        return value, None
+    return None, compress_text(value, settings.COMPRESSION_LEVEL)
+
+
+def decode_text(plain: Optional[str], compressed: Optional[bytes]) -> Optional[str]:
+    """`encode_text` ile ayrılan sütun çiftinden metni geri oluştur"""
+    if compressed is not None:
+        return decompress_text(compressed)
+    return plain
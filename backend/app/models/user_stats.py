@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    document_count = Column(Integer, nullable=False, default=0)
+    storage_bytes = Column(BigInteger, nullable=False, default=0)  # Dokümanların toplam (düz) boyutu
+    search_question_count = Column(Integer, nullable=False, default=0)  # Arama ve soru aktiviteleri
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UserStats(user_id={self.user_id}, documents={self.document_count})>"
@@ -34,6 +34,24 @@ class DocumentInDBBase(DocumentBase):
 class Document(DocumentInDBBase):
     pass
 
+class DocumentListItem(DocumentBase):
+    """Liste görünümü: çıkarılan metin (`content`) hariç doküman alanları"""
+    id: int
+    filename: str
+    file_path: str
+    file_size: int
+    file_type: str
+    summary: Optional[str] = None
+    keywords: Optional[str] = None
+    user_id: int
+    is_processed: bool
+    is_encrypted: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 class DocumentSearchResult(BaseModel):
     id: int
     title: str
@@ -44,6 +62,19 @@ class DocumentSearchResult(BaseModel):
     chunk_text: str
     chunk_index: int
 
+class DocumentSearchGroup(BaseModel):
+    document_id: int
+    title: str
+    filename: str
+    summary: Optional[str] = None
+    best_score: float
+    chunks: List[DocumentSearchResult]
+
+class DocumentSearchResponse(BaseModel):
+    query: str
+    results: List[DocumentSearchGroup]
+    next_cursor: Optional[str] = None
+
 class DocumentSummary(BaseModel):
     id: int
     title: str
@@ -1,13 +1,24 @@
 import google.generativeai as genai
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-import chromadb
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
 import json
-from typing import List, Dict, Any, Optional
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Dict, Any, Optional, Tuple
 from loguru import logger
 from app.core.client import ClientWrapper
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document as DocumentRecord
+from app.models.index_version import VectorIndexVersion
+from app.services.content_store import load_document_texts
+from app.services.embedding_service import get_embedding_function
+from app.services.vector_cache import CachedDocument, DocumentVectorCache
+from app.services.lexical_index import BM25Index
+from app.services.storage_service import storage_service
 
 # Gemini API yapılandırması
 genai.configure(api_key=settings.GOOGLE_API_KEY)
@@ -15,7 +26,7 @@ genai.configure(api_key=settings.GOOGLE_API_KEY)
 class AIService:
     def __init__(self):
         try:
-            self.embedding_function = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+            self.embedding_function = get_embedding_function()
             self.text_splitter = RecursiveCharacterTextSplitter(
                 chunk_size=settings.CHUNK_SIZE,
                 chunk_overlap=settings.CHUNK_OVERLAP,
@@ -24,12 +35,30 @@ class AIService:
             self.chroma_client = ClientWrapper()
 
             
-            # Koleksiyon oluştur veya al
+            # Koleksiyon oluştur veya al (aktif indeks sürümü aşağıda çözülür)
+            self.collection_name = settings.VECTOR_COLLECTION_NAME
+            self.collection_metadata = {"hnsw:space": "cosine"}
             self.collection = self.chroma_client.get_or_create_collection(
-                name="documents",
-                metadata={"hnsw:space": "cosine"}
+                name=self.collection_name,
+                metadata=self.collection_metadata
             )
             
+            # Sık sorgulanan dokümanların vektörleri için süreç içi önbellek
+            self.vector_cache = DocumentVectorCache(
+                max_bytes=settings.VECTOR_CACHE_MAX_BYTES,
+                ttl_seconds=settings.VECTOR_CACHE_TTL_SECONDS
+            )
+            self._uncacheable_documents: Dict[int, Any] = {}  # doküman -> sürüm
+            
+            # Chunk'lar üzerinde BM25 ters indeksi
+            self.lexical_index = BM25Index(self._lexical_index_path(self.collection_name))
+            self._lexical_indexes = {}
+            
+            # Mavi/yeşil yeniden indeksleme sonrası aktif koleksiyonu izle
+            self._version_checked_at = 0.0
+            self._version_lock = threading.Lock()
+            self.refresh_active_collection(force=True)
+            
             # Gemini model
             self.model = genai.GenerativeModel('gemini-2.0-flash')
             
@@ -38,43 +67,45 @@ class AIService:
             logger.error(f"Error initializing AIService: {e}")
             raise
 
-    def extract_text_from_file(self, file_path: str, file_type: str) -> str:
+    def extract_text_from_file(self, file_path: str, file_type: str, compressed: bool = False) -> str:
         """Dosyadan metin çıkar"""
         try:
             # Dosya türünü temizle (.docx -> docx)
             clean_file_type = file_type.lower().lstrip('.')
             
-            if clean_file_type == "pdf":
-                return self._extract_from_pdf(file_path)
-            elif clean_file_type in ["docx", "doc"]:
-                return self._extract_from_docx(file_path)
-            elif clean_file_type in ["txt", "md"]:
-                return self._extract_from_text(file_path)
-            else:
+            if clean_file_type not in ["pdf", "docx", "doc", "txt", "md"]:
                 raise ValueError(f"Unsupported file type: {file_type}")
+            
+            # Dosya depolama servisinden akış olarak açılır (şifreliyse okundukça çözülür)
+            with storage_service.open(file_path, compressed) as stream:
+                if clean_file_type == "pdf":
+                    return self._extract_from_pdf(stream)
+                elif clean_file_type in ["docx", "doc"]:
+                    return self._extract_from_docx(stream)
+                else:
+                    return self._extract_from_text(stream)
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {e}")
             raise
 
-    def _extract_from_pdf(self, file_path: str) -> str:
+    def _extract_from_pdf(self, stream: BinaryIO) -> str:
         """PDF'den metin çıkar"""
         try:
             import PyPDF2
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            pdf_reader = PyPDF2.PdfReader(stream)
+            text = ""
+            for page in pdf_reader.pages:
+                text += page.extract_text() + "\n"
+            return text
         except Exception as e:
             logger.error(f"Error extracting from PDF: {e}")
             raise
 
-    def _extract_from_docx(self, file_path: str) -> str:
+    def _extract_from_docx(self, stream: BinaryIO) -> str:
         """DOCX'den metin çıkar"""
         try:
             from docx import Document
-            doc = Document(file_path)
+            doc = Document(stream)
             text = ""
             for paragraph in doc.paragraphs:
                 text += paragraph.text + "\n"
@@ -86,18 +117,17 @@ class AIService:
             logger.error(f"Error extracting from DOCX: {e}")
             raise
 
-    def _extract_from_text(self, file_path: str) -> str:
+    def _extract_from_text(self, stream: BinaryIO) -> str:
         """TXT/MD'den metin çıkar"""
+        content = stream.read()
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            return content.decode('utf-8')
         except UnicodeDecodeError:
             # Farklı kodlamaları dene
             encodings = ['latin-1', 'cp1252', 'iso-8859-1']
             for encoding in encodings:
                 try:
-                    with open(file_path, 'r', encoding=encoding) as file:
-                        return file.read()
+                    return content.decode(encoding)
                 except UnicodeDecodeError:
                     continue
             raise ValueError("Could not decode file with any encoding")
@@ -124,6 +154,25 @@ class AIService:
             logger.error(f"Error chunking text: {e}")
             raise
 
+    def chunk_offsets(self, text: str, chunks: List[str]) -> List[Optional[Tuple[int, int]]]:
+        """Chunk'ların metindeki [başlangıç, bitiş) karakter aralıkları.
+
+        Ayırıcı birleştirme yüzünden metinde birebir geçmeyen chunk'lar için
+        None döner; bunların metni vektör deposunda tutulmaya devam eder.
+        """
+        offsets = []
+        position = 0
+        for chunk in chunks:
+            start = text.find(chunk, position)
+            if start < 0:
+                start = text.find(chunk)
+            if start < 0:
+                offsets.append(None)
+                continue
+            offsets.append((start, start + len(chunk)))
+            position = start + 1
+        return offsets
+
     def create_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Metin parçalarından embedding oluştur"""
         try:
@@ -149,69 +198,534 @@ class AIService:
             logger.error(f"Error creating embeddings: {e}")
             raise
 
-    def store_document_chunks(self, document_id: int, chunks: List[str], embeddings: List[List[float]]):
-        """Doküman parçalarını ChromaDB'ye kaydet"""
+    @property
+    def chunker_version(self) -> str:
+        """Chunk'lama ayarlarını tanımlayan sürüm etiketi"""
+        return f"recursive-{settings.CHUNK_SIZE}-{settings.CHUNK_OVERLAP}"
+
+    @staticmethod
+    def _lexical_index_path(collection_name: str) -> str:
+        if collection_name == settings.VECTOR_COLLECTION_NAME:
+            return settings.LEXICAL_INDEX_PATH
+        return os.path.join(os.path.dirname(settings.LEXICAL_INDEX_PATH), f"{collection_name}.idx")
+
+    def get_lexical_index(self, collection_name: Optional[str] = None) -> BM25Index:
+        """Koleksiyon sürümüne ait BM25 indeksini döndür"""
+        if collection_name is None or collection_name == self.collection_name:
+            return self.lexical_index
+        with self._version_lock:
+            index = self._lexical_indexes.get(collection_name)
+            if index is None:
+                index = BM25Index(self._lexical_index_path(collection_name))
+                self._lexical_indexes[collection_name] = index
+            return index
+
+    def refresh_active_collection(self, force: bool = False):
+        """Veritabanındaki aktif indeks sürümüne geç (en fazla INDEX_VERSION_CHECK_SECONDS'ta bir bakılır)"""
+        now = time.monotonic()
+        if not force and now - self._version_checked_at < settings.INDEX_VERSION_CHECK_SECONDS:
+            return
+        self._version_checked_at = now
+
         try:
-            # Metadata hazırla
-            metadatas = [
-                {
-                    "document_id": str(document_id),
-                    "chunk_index": i,
-                    "source": f"document_{document_id}"
-                }
-                for i in range(len(chunks))
-            ]
-            
-            # IDs hazırla
-            ids = [f"doc_{document_id}_chunk_{i}" for i in range(len(chunks))]
-            
-            # ChromaDB'ye ekle
-            self.collection.add(
-                embeddings=embeddings,
-                documents=chunks,
-                metadatas=metadatas,
-                ids=ids
-            )
+            db = SessionLocal()
+            try:
+                active = db.query(VectorIndexVersion.collection_name).filter(
+                    VectorIndexVersion.status == "active"
+                ).order_by(VectorIndexVersion.activated_at.desc()).first()
+            finally:
+                db.close()
+        except Exception as e:
+            logger.warning(f"Could not resolve active vector index version: {e}")
+            return
+
+        name = active[0] if active else settings.VECTOR_COLLECTION_NAME
+        if name != self.collection_name:
+            self.switch_collection(name)
+
+    def switch_collection(self, collection_name: str):
+        """Aktif koleksiyonu (ve BM25 indeksini) değiştir"""
+        collection = self.chroma_client.get_or_create_collection(
+            name=collection_name,
+            metadata=self.collection_metadata
+        )
+        lexical_index = self.get_lexical_index(collection_name)
+        with self._version_lock:
+            self.collection_name, self.collection, self.lexical_index = collection_name, collection, lexical_index
+            self._lexical_indexes.pop(collection_name, None)
+        self.vector_cache.clear()
+        self._uncacheable_documents.clear()
+        logger.info(f"Switched active vector collection to '{collection_name}'")
+
+    def get_collection(self, user_id: Optional[int] = None, collection_name: Optional[str] = None):
+        """Kullanıcının vektör koleksiyonunu döndür (bölümleme kapalıysa ortak koleksiyon)"""
+        self.refresh_active_collection()
+        collection_name = collection_name or self.collection_name
+        if collection_name == self.collection_name and (user_id is None or not settings.VECTOR_PARTITION_BY_USER):
+            return self.collection
+        return self.chroma_client.get_partition(
+            collection_name,
+            user_id,
+            metadata=self.collection_metadata
+        )
+
+    def get_summary_collection(self, user_id: Optional[int] = None):
+        """Doküman özet vektörlerinin (doküman başına bir vektör) koleksiyonunu döndür"""
+        return self.chroma_client.get_partition(
+            f"{settings.VECTOR_COLLECTION_NAME}_summaries",
+            user_id if settings.VECTOR_PARTITION_BY_USER else None,
+            metadata=self.collection_metadata
+        )
+
+    def store_document_summary(
+        self,
+        document_id: int,
+        title: str,
+        summary: str,
+        keywords: List[str],
+        user_id: Optional[int] = None
+    ):
+        """Özet ve anahtar kelimelerden doküman düzeyinde vektör oluştur ve kaydet"""
+        text = "\n".join(part for part in [title, summary, ", ".join(keywords)] if part)
+        if not text.strip():
+            return
+        metadata = {"document_id": str(document_id)}
+        if user_id is not None:
+            metadata["user_id"] = str(user_id)
+        self.get_summary_collection(user_id).upsert(
+            ids=[f"doc_{document_id}_summary"],
+            embeddings=self.create_embeddings([text]),
+            documents=[text],
+            metadatas=[metadata]
+        )
+
+    def _select_documents(self, query_embeddings, n_documents: int, user_id: Optional[int]) -> Optional[List[int]]:
+        """Özet indeksinden sorguya en yakın dokümanları seç (indeks boşsa None)"""
+        collection = self.get_summary_collection(user_id)
+        where_filter = {"user_id": str(user_id)} if user_id is not None and not settings.VECTOR_PARTITION_BY_USER else None
+        results = collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_documents,
+            where=where_filter,
+            include=["metadatas"]
+        )
+        metadatas = results['metadatas'][0] if results['metadatas'] else []
+        if not metadatas:
+            return None
+        return [int(metadata["document_id"]) for metadata in metadatas]
+
+    def _chunk_metadatas(self, document_id: int, start: int, count: int, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        metadatas = [
+            {
+                "document_id": str(document_id),
+                "chunk_index": i,
+                "source": f"document_{document_id}",
+                "embedding_model": settings.LOCAL_EMBEDDING_MODEL,
+                "chunker_version": self.chunker_version
+            }
+            for i in range(start, start + count)
+        ]
+        if user_id is not None:
+            for metadata in metadatas:
+                metadata["user_id"] = str(user_id)
+        return metadatas
+
+    def _plan_write_batches(self, chunks: List[str]) -> List[Tuple[int, int]]:
+        """Chunk'ları adet ve tahmini bayt sınırına göre (başlangıç, bitiş) aralıklarına böl"""
+        vector_bytes = settings.EMBEDDING_DIMENSION * 4
+        batches = []
+        start, batch_bytes = 0, 0
+        for i, chunk in enumerate(chunks):
+            chunk_bytes = len(chunk.encode("utf-8")) + vector_bytes
+            if i > start and (
+                i - start >= settings.VECTOR_WRITE_BATCH_SIZE
+                or batch_bytes + chunk_bytes > settings.VECTOR_WRITE_BATCH_BYTES
+            ):
+                batches.append((start, i))
+                start, batch_bytes = i, 0
+            batch_bytes += chunk_bytes
+        if start < len(chunks):
+            batches.append((start, len(chunks)))
+        return batches
+
+    def _upsert_batch(
+        self,
+        collection,
+        document_id: int,
+        start: int,
+        embeddings,
+        chunks: List[str],
+        user_id: Optional[int],
+        offsets: Optional[List[Optional[Tuple[int, int]]]] = None
+    ):
+        """Tek bir batch'i üstel geri çekilmeyle (backoff) tekrar deneyerek upsert et"""
+        ids = [f"doc_{document_id}_chunk_{i}" for i in range(start, start + len(chunks))]
+        metadatas = self._chunk_metadatas(document_id, start, len(chunks), user_id)
+        documents = chunks
+        if offsets is not None:
+            for metadata, offset in zip(metadatas, offsets):
+                if offset is not None:
+                    metadata["char_start"], metadata["char_end"] = offset
+            if not settings.VECTOR_STORE_CHUNK_TEXT:
+                # Aralığı bilinen chunk'ların metni ikinci kez saklanmaz; aramada doküman metninden kesilir
+                documents = ["" if offset is not None else chunk for chunk, offset in zip(chunks, offsets)]
+        for attempt in range(settings.VECTOR_WRITE_RETRIES + 1):
+            try:
+                collection.upsert(
+                    embeddings=embeddings,
+                    documents=documents,
+                    metadatas=metadatas,
+                    ids=ids
+                )
+                return
+            except Exception as e:
+                if attempt == settings.VECTOR_WRITE_RETRIES:
+                    raise
+                delay = settings.VECTOR_WRITE_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random())
+                logger.warning(
+                    f"Upsert of chunks {start}-{start + len(chunks)} for document {document_id} failed "
+                    f"(attempt {attempt + 1}): {e}; retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def _finish_document_write(self, collection, document_id: int, chunks: List[str], user_id: Optional[int], collection_name: Optional[str] = None):
+        """Önceki sürümden kalan fazla chunk'ları sil ve indeksleri güncelle"""
+        collection.delete(where={"$and": [
+            {"document_id": str(document_id)},
+            {"chunk_index": {"$gte": len(chunks)}}
+        ]})
+        ids = [f"doc_{document_id}_chunk_{i}" for i in range(len(chunks))]
+        if collection_name is None or collection_name == self.collection_name:
+            self.invalidate_document(document_id)
+        self.get_lexical_index(collection_name).add_document(document_id, ids, chunks, user_id=user_id)
+
+    def store_document_chunks(self, document_id: int, chunks: List[str], embeddings: List[List[float]], user_id: Optional[int] = None):
+        """Doküman parçalarını ChromaDB'ye batch'ler halinde kaydet"""
+        try:
+            collection = self.get_collection(user_id)
+            for start, end in self._plan_write_batches(chunks):
+                self._upsert_batch(collection, document_id, start, embeddings[start:end], chunks[start:end], user_id)
+            self._finish_document_write(collection, document_id, chunks, user_id)
             
             logger.info(f"Stored {len(chunks)} chunks for document {document_id}")
         except Exception as e:
             logger.error(f"Error storing document chunks: {e}")
             raise
 
-    def search_similar_chunks(self, query: str, n_results: int = 5, document_id: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Benzer parçaları ara"""
+    def embed_and_store_chunks(
+        self,
+        document_id: int,
+        chunks: List[str],
+        user_id: Optional[int] = None,
+        collection_name: Optional[str] = None,
+        offsets: Optional[List[Optional[Tuple[int, int]]]] = None
+    ) -> Tuple[int, int]:
+        """Chunk'ları batch'ler halinde embed edip kaydet.
+
+        Batch N vektör deposuna yazılırken batch N+1'in embedding'i hesaplanır.
+        Tüm batch'ler onaylanmadan doküman işlenmiş sayılmaz; hata durumunda
+        istisna yükseltilir. `collection_name` verilirse aktif koleksiyon yerine
+        o koleksiyona yazılır. `offsets` (bkz. `chunk_offsets`) verilirse
+        chunk'ların karakter aralıkları metadata'ya yazılır. (chunk sayısı,
+        vektör baytı) döndürür.
+        """
         try:
-            # Sorgu embedding'i oluştur
-            query_embedding = self.embedding_function([query])
-            
-            # Filtre hazırla
-            where_filter = None
-            if document_id:
-                where_filter = {"document_id": str(document_id)}
-            
-            # ChromaDB'de ara
-            results = self.collection.query(
-                query_embeddings=query_embedding,
+            collection = self.get_collection(user_id, collection_name)
+            vector_bytes = 0
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-writer") as writer:
+                in_flight = None
+                for start, end in self._plan_write_batches(chunks):
+                    embeddings = self.create_embeddings(chunks[start:end])
+                    vector_bytes += sum(len(embedding) for embedding in embeddings) * 4
+                    if in_flight is not None:
+                        in_flight.result()
+                    in_flight = writer.submit(
+                        self._upsert_batch, collection, document_id, start, embeddings, chunks[start:end], user_id,
+                        offsets[start:end] if offsets is not None else None
+                    )
+                if in_flight is not None:
+                    in_flight.result()
+
+            self._finish_document_write(collection, document_id, chunks, user_id, collection_name)
+            logger.info(f"Embedded and stored {len(chunks)} chunks for document {document_id}")
+            return len(chunks), vector_bytes
+        except Exception as e:
+            logger.error(f"Error embedding/storing chunks for document {document_id}: {e}")
+            raise
+
+    def search_similar_chunks(
+        self,
+        query: str,
+        n_results: int = 5,
+        document_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        mode: Optional[str] = None,
+        document_ids: Optional[List[int]] = None,
+        top_documents: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Benzer parçaları ara (vector, lexical veya hybrid).
+
+        `document_ids` verilirse arama bu dokümanlarla sınırlanır ve sonuçlar
+        tüm dokümanlar arasında tek bir top-k listesi olarak döner. Tüm korpus
+        aramalarında `top_documents` (varsayılan SEARCH_TOP_DOCUMENTS) sıfırdan
+        büyükse önce özet indeksinden en yakın dokümanlar seçilir, chunk'lar
+        yalnızca bu dokümanlar içinde aranır.
+        """
+        try:
+            if document_ids and len(document_ids) == 1 and not document_id:
+                document_id, document_ids = document_ids[0], None
+
+            mode = mode or settings.RETRIEVAL_MODE
+            if top_documents is None:
+                top_documents = settings.SEARCH_TOP_DOCUMENTS
+            if mode == "vector":
+                return self._vector_search(query, n_results, document_id, user_id, document_ids, top_documents)
+            if mode not in ("lexical", "hybrid"):
+                raise ValueError(f"Unsupported retrieval mode: {mode}")
+
+            lexical_hits = self.lexical_index.search(
+                query,
                 n_results=n_results,
-                where=where_filter
+                document_ids=[document_id] if document_id else document_ids,
+                user_id=user_id
             )
-            
-            # Sonuçları formatla
-            formatted_results = []
-            if results['documents'] and len(results['documents']) > 0:
-                for i in range(len(results['documents'][0])):
-                    formatted_results.append({
-                        'chunk_text': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'distance': results['distances'][0][i],
-                        'id': results['ids'][0][i]
-                    })
-            
-            return formatted_results
+
+            # Sözcüksel sonuç belirleyiciyse embedding ve ANN çağrısı atlanır
+            if mode == "lexical" or self._is_decisive(lexical_hits):
+                return self._resolve_lexical_hits(lexical_hits, user_id)
+
+            vector_results = self._vector_search(query, n_results, document_id, user_id, document_ids, top_documents)
+            return self._fuse_results(vector_results, lexical_hits, n_results, user_id)
         except Exception as e:
             logger.error(f"Error searching similar chunks: {e}")
             raise
 
+    def _vector_search(
+        self,
+        query: str,
+        n_results: int,
+        document_id: Optional[int],
+        user_id: Optional[int],
+        document_ids: Optional[List[int]] = None,
+        top_documents: int = 0
+    ) -> List[Dict[str, Any]]:
+        return self._vector_search_batch([query], n_results, document_id, user_id, document_ids, top_documents)[0]
+
+    def search_similar_chunks_batch(
+        self,
+        queries: List[str],
+        n_results: int = 5,
+        document_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Birden çok sorgu için vektör araması yap (tek embedding ve tek sorgu çağrısı)"""
+        if not queries:
+            return []
+        try:
+            return self._vector_search_batch(queries, n_results, document_id, user_id)
+        except Exception as e:
+            logger.error(f"Error searching similar chunks for {len(queries)} queries: {e}")
+            raise
+
+    def _vector_search_batch(
+        self,
+        queries: List[str],
+        n_results: int,
+        document_id: Optional[int],
+        user_id: Optional[int],
+        document_ids: Optional[List[int]] = None,
+        top_documents: int = 0
+    ) -> List[List[Dict[str, Any]]]:
+        # Tüm sorguların embedding'leri tek ileri geçişte oluşturulur
+        query_embeddings = self.embedding_function(queries)
+        
+        # İki aşamalı arama: önce özet indeksinden aday dokümanları seç
+        if top_documents > 0 and not document_id and not document_ids and len(queries) == 1:
+            document_ids = self._select_documents(query_embeddings, top_documents, user_id)
+        
+        # Önbellekteki dokümanlar ağa gitmeden tam arama ile yanıtlanır
+        if document_id:
+            cached = self._get_cached_document(document_id, user_id)
+            if cached is not None:
+                return self._hydrate_chunk_texts(cached.search(query_embeddings, n_results))
+        
+        # Filtre hazırla
+        where_filter = None
+        if document_id:
+            where_filter = {"document_id": str(document_id)}
+        elif document_ids:
+            # Çoklu doküman araması tek `$in` filtresiyle yapılır; sıralama zaten küreseldir
+            where_filter = {"document_id": {"$in": [str(doc_id) for doc_id in document_ids]}}
+        elif user_id is not None and not settings.VECTOR_PARTITION_BY_USER:
+            # Ortak koleksiyonda tüm korpus araması kullanıcının chunk'larıyla sınırlanır
+            where_filter = {"user_id": str(user_id)}
+        
+        # ChromaDB'de ara
+        results = self.get_collection(user_id).query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where_filter
+        )
+        
+        # Sonuçları sorgu sırasıyla formatla
+        formatted_results = [[] for _ in queries]
+        for q, documents in enumerate(results['documents'] or []):
+            for i in range(len(documents)):
+                formatted_results[q].append({
+                    'chunk_text': documents[i],
+                    'metadata': results['metadatas'][q][i],
+                    'distance': results['distances'][q][i],
+                    'id': results['ids'][q][i]
+                })
+        
+        return self._hydrate_chunk_texts(formatted_results)
+
+    def _hydrate_chunk_texts(self, results):
+        """Metni vektör deposunda tutulmayan chunk'ları doküman metninden karakter aralığıyla doldur.
+
+        Tek sorgunun sonuç listesini ya da sorgu başına listelerin listesini kabul eder.
+        """
+        flat = [item for group in results for item in group] if results and isinstance(results[0], list) else results
+        pending = [
+            item for item in flat
+            if not item['chunk_text'] and item['metadata'] and 'char_start' in item['metadata']
+        ]
+        if not pending:
+            return results
+
+        db = SessionLocal()
+        try:
+            texts = load_document_texts(db, [int(item['metadata']['document_id']) for item in pending])
+        finally:
+            db.close()
+        for item in pending:
+            text = texts.get(int(item['metadata']['document_id']))
+            if text is not None:
+                item['chunk_text'] = text[item['metadata']['char_start']:item['metadata']['char_end']]
+        return results
+
+    def _is_decisive(self, lexical_hits: List[Dict[str, Any]]) -> bool:
+        """En iyi BM25 skoru hem yeterince yüksek hem de ikinciden belirgin şekilde ayrıksa"""
+        if not lexical_hits or lexical_hits[0]['score'] < settings.LEXICAL_MIN_DECISIVE_SCORE:
+            return False
+        if len(lexical_hits) == 1:
+            return True
+        return lexical_hits[0]['score'] >= settings.LEXICAL_DECISIVE_RATIO * lexical_hits[1]['score']
+
+    def _resolve_lexical_hits(self, lexical_hits: List[Dict[str, Any]], user_id: Optional[int]) -> List[Dict[str, Any]]:
+        """BM25 sonuçlarının metin ve metadata'sını tek çağrıda getir"""
+        if not lexical_hits:
+            return []
+        by_id = {}
+        stored = self.get_collection(user_id).get(ids=[hit['id'] for hit in lexical_hits], include=["documents", "metadatas"])
+        for i, chunk_id in enumerate(stored['ids']):
+            by_id[chunk_id] = (stored['documents'][i], stored['metadatas'][i])
+        return self._hydrate_chunk_texts([
+            {
+                'chunk_text': by_id[hit['id']][0],
+                'metadata': by_id[hit['id']][1],
+                'distance': None,
+                'id': hit['id'],
+                'score': hit['score']
+            }
+            for hit in lexical_hits
+            if hit['id'] in by_id
+        ])
+
+    def _fuse_results(
+        self,
+        vector_results: List[Dict[str, Any]],
+        lexical_hits: List[Dict[str, Any]],
+        n_results: int,
+        user_id: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """Vektör ve BM25 sıralamalarını reciprocal rank fusion ile birleştir"""
+        scores: Dict[str, float] = {}
+        for ranking in (vector_results, lexical_hits):
+            for rank, item in enumerate(ranking):
+                scores[item['id']] = scores.get(item['id'], 0.0) + 1.0 / (settings.RRF_K + rank + 1)
+
+        ranked_ids = sorted(scores, key=lambda chunk_id: scores[chunk_id], reverse=True)[:n_results]
+        by_id = {result['id']: result for result in vector_results}
+        missing = [hit for hit in lexical_hits if hit['id'] in ranked_ids and hit['id'] not in by_id]
+        for result in self._resolve_lexical_hits(missing, user_id):
+            by_id[result['id']] = result
+
+        fused = []
+        for chunk_id in ranked_ids:
+            if chunk_id in by_id:
+                fused.append({**by_id[chunk_id], 'score': scores[chunk_id]})
+        return fused
+
+    def _document_version(self, document_id: int) -> Optional[Tuple[Any, Any]]:
+        """Doküman satırının sürümü (updated_at, chunk_count); satır yoksa None"""
+        db = SessionLocal()
+        try:
+            row = db.query(DocumentRecord.updated_at, DocumentRecord.chunk_count).filter(
+                DocumentRecord.id == document_id
+            ).first()
+        finally:
+            db.close()
+        return tuple(row) if row is not None else None
+
+    def _get_cached_document(self, document_id: int, user_id: Optional[int] = None) -> Optional[CachedDocument]:
+        """Dokümanın vektörlerini önbellekten al, yoksa tek seferde yükle.
+
+        Yeniden işleme ve silme başka bir API worker'ında yapılmış olabilir;
+        bu yüzden her isabette girdinin sürümü doküman satırıyla karşılaştırılır.
+        Sürüm vektörlerden önce okunur: yükleme sırasında biten bir yeniden
+        işleme sürümü değiştirir ve girdi bir sonraki istekte yenilenir.
+        """
+        if not self.vector_cache.enabled:
+            return None
+
+        version = self._document_version(document_id)
+        if version is None:
+            self.invalidate_document(document_id)
+            return None
+        if document_id in self._uncacheable_documents:
+            if self._uncacheable_documents[document_id] == version:
+                return None
+            del self._uncacheable_documents[document_id]
+
+        cached = self.vector_cache.get(document_id)
+        if cached is not None and cached.version == version:
+            return cached
+
+        max_chunks = settings.VECTOR_CACHE_MAX_DOCUMENT_CHUNKS
+        results = self.get_collection(user_id).get(
+            where={"document_id": str(document_id)},
+            limit=max_chunks + 1,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        if not results['ids']:
+            return None
+        if len(results['ids']) > max_chunks:
+            # Çok büyük dokümanlar ANN indeksi üzerinden aranmaya devam eder
+            self._uncacheable_documents[document_id] = version
+            return None
+
+        cached = CachedDocument(results['ids'], results['embeddings'], results['documents'], results['metadatas'], version)
+        self.vector_cache.put(document_id, cached)
+        return cached
+
+    def remove_document(self, document_id: int, user_id: Optional[int] = None):
+        """Dokümanın tüm chunk vektörlerini ve indeks kayıtlarını sil"""
+        try:
+            self.get_collection(user_id).delete(where={"document_id": str(document_id)})
+            self.get_summary_collection(user_id).delete(ids=[f"doc_{document_id}_summary"])
+            self.invalidate_document(document_id)
+            self.lexical_index.remove_document(document_id)
+            logger.info(f"Removed vectors of document {document_id}")
+        except Exception as e:
+            logger.error(f"Error removing vectors of document {document_id}: {e}")
+            raise
+
+    def invalidate_document(self, document_id: int):
+        """Dokümanın önbellekteki vektörlerini geçersiz kıl (yeniden işleme / silme)"""
+        self.vector_cache.invalidate(document_id)
+        self._uncacheable_documents.pop(document_id, None)
+
     def generate_summary(self, text: str) -> str:
         """Metin özeti oluştur"""
         try:
@@ -282,15 +796,27 @@ class AIService:
         word_counts = Counter(words)
         return [word for word, count in word_counts.most_common(10)]
 
-    def answer_question(self, question: str, context_chunks: List[str]) -> str:
-        """Bağlam kullanarak soruya cevap ver"""
+    def answer_question(self, question: str, context_chunks: List[str], source_labels: Optional[List[str]] = None) -> str:
+        """Bağlam kullanarak soruya cevap ver.
+
+        `source_labels` verilirse her parça kaynağıyla etiketlenir ve cevapta
+        kullanılan kaynakların belirtilmesi istenir.
+        """
         try:
-            context = "\n\n".join(context_chunks)
+            citation_instruction = ""
+            if source_labels:
+                context = "\n\n".join(
+                    f"[Kaynak: {label}]\n{chunk}" for label, chunk in zip(source_labels, context_chunks)
+                )
+                citation_instruction = "Cevapta kullandığınız bilgilerin hangi kaynaktan geldiğini köşeli parantez içinde belirtin."
+            else:
+                context = "\n\n".join(context_chunks)
             
             prompt = f"""
             Aşağıdaki bağlamı kullanarak soruyu cevaplayın.
             Eğer bağlamda cevap yoksa, "Bu bilgi verilen bağlamda bulunmuyor" yazın.
             Bağlamı kullanırken düzgün bir cümle kurun.
+            {citation_instruction}
             
             Bağlam:
             {context}
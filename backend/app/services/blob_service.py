@@ -0,0 +1,45 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.models.blob import Blob
+from app.services.storage_service import StoredFile
+
+
+def acquire_blob(db: Session, stored: StoredFile) -> bool:
+    """Blob'un referans sayısını artır (kayıt yoksa oluştur).
+
+    Değişiklik çağıranın transaction'ında yapılır; doküman kaydıyla birlikte commit edilmelidir.
+    Depodaki baytların sıkıştırılmış olup olmadığını döndürür; içerik zaten
+    saklanmışsa bu, ilk yüklemenin kaydındaki bayraktır.
+    """
+    if not _increment(db, stored.digest):
+        try:
+            with db.begin_nested():
+                db.add(Blob(
+                    digest=stored.digest,
+                    location=stored.location,
+                    size=stored.size,
+                    ref_count=1,
+                    compressed=stored.compressed
+                ))
+            return stored.compressed
+        except IntegrityError:
+            # Aynı içerik eşzamanlı olarak yüklendi; diğer isteğin kaydını kullan
+            _increment(db, stored.digest)
+    return bool(db.query(Blob.compressed).filter(Blob.digest == stored.digest).scalar())
+
+
+def release_blob(db: Session, digest: str):
+    """Blob'un referans sayısını azalt; sıfıra inen blob'ları GC toplar"""
+    db.query(Blob).filter(Blob.digest == digest, Blob.ref_count > 0).update(
+        {Blob.ref_count: Blob.ref_count - 1, Blob.updated_at: func.now()},
+        synchronize_session=False
+    )
+
+
+def _increment(db: Session, digest: str) -> bool:
+    return db.query(Blob).filter(Blob.digest == digest).update(
+        {Blob.ref_count: Blob.ref_count + 1, Blob.updated_at: func.now()},
+        synchronize_session=False
+    ) > 0
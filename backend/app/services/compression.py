@@ -0,0 +1,137 @@
+import io
+import struct
+from typing import BinaryIO
+
+import zstandard
+
+# Başlık: magic (4) | sürüm (1) | algoritma (1) | düz içerik boyutu (8)
+MAGIC = b"DMSZ"
+VERSION = 1
+ALGORITHM_ZSTD = 1
+_HEADER = struct.Struct(">4sBBQ")
+HEADER_SIZE = _HEADER.size
+
+
+class CompressionError(ValueError):
+    """Sıkıştırılmış blob bozuk ya da desteklenmeyen biçimde"""
+
+
+def is_compressed(header: bytes) -> bool:
+    """Baytlar sıkıştırma başlığıyla mı başlıyor (yalnızca bütünlük denetimi için;
+    bir blob'un sıkıştırılmış olup olmadığı kayıttaki bayraktan okunur)"""
+    return header[:len(MAGIC)] == MAGIC
+
+
+class CompressingReader(io.RawIOBase):
+    """Kaynağı okundukça zstd ile sıkıştıran akış (önce başlık, sonra zstd çerçevesi).
+
+    Düz içerik boyutu başlığa yazılır; böylece okuyucu dosyanın sonuna
+    kadar açmadan boyutu bilir ve `seek(0, SEEK_END)` ucuz kalır.
+    """
+
+    def __init__(self, source: BinaryIO, size: int, level: int = 3):
+        super().__init__()
+        self._pending = _HEADER.pack(MAGIC, VERSION, ALGORITHM_ZSTD, size)
+        self._reader = zstandard.ZstdCompressor(level=level).stream_reader(source, size=size, closefd=False)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        if self._pending:
+            n = min(len(view), len(self._pending))
+            view[:n] = self._pending[:n]
+            self._pending = self._pending[n:]
+            return n
+        data = self._reader.read(len(view))
+        view[:len(data)] = data
+        return len(data)
+
+
+class DecompressingReader(io.RawIOBase):
+    """Sıkıştırılmış blob için salt okunur akış.
+
+    zstd akışı yalnızca ileri okunabildiğinden ileri `seek` aradaki baytları
+    çözüp atar; geri `seek` çözmeyi baştan başlatır. Aralık isteklerinin
+    çoğu dosyanın başından ya da ileri doğru geldiği için bu yeterlidir.
+    """
+
+    def __init__(self, fileobj: BinaryIO):
+        super().__init__()
+        self._file = fileobj
+        self._file.seek(0)
+        header = self._file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE or not is_compressed(header):
+            raise CompressionError("Not a compressed blob")
+        _, version, algorithm, self.size = _HEADER.unpack(header)
+        if version != VERSION or algorithm != ALGORITHM_ZSTD:
+            raise CompressionError(f"Unsupported compression format: version={version} algorithm={algorithm}")
+        self._position = 0
+        self._restart()
+
+    def _restart(self):
+        self._file.seek(HEADER_SIZE)
+        self._reader = zstandard.ZstdDecompressor().stream_reader(self._file, closefd=False)
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def _skip_to_position(self):
+        if self._position < self._offset:
+            self._restart()
+        while self._offset < self._position:
+            skipped = self._reader.read(min(self._position - self._offset, 1024 * 1024))
+            if not skipped:
+                raise CompressionError("Compressed blob is truncated")
+            self._offset += len(skipped)
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self.size:
+            return 0
+        self._skip_to_position()
+        view = memoryview(buffer).cast("B")
+        data = self._reader.read(min(len(view), self.size - self._position))
+        if not data:
+            raise CompressionError("Compressed blob is truncated")
+        view[:len(data)] = data
+        self._offset += len(data)
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def compress_text(text: str, level: int = 3) -> bytes:
+    """Metni zstd çerçevesine sıkıştır"""
+    return zstandard.ZstdCompressor(level=level).compress(text.encode("utf-8"))
+
+
+def decompress_text(data: bytes) -> str:
+    """`compress_text` çıktısını aç"""
+    return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+
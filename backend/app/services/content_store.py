@@ -0,0 +1,52 @@
+from typing import Dict, Iterable
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.models.document_content import DocumentContent
+from app.models.types import decode_text
+
+
+def load_document_texts(db: Session, document_ids: Iterable[int]) -> Dict[int, str]:
+    """Dokümanların çıkarılan metinlerini tek sorguda yükle (eski sütundaki metinler dahil)"""
+    document_ids = list(set(document_ids))
+    if not document_ids:
+        return {}
+    rows = db.query(
+        Document.id, DocumentContent.plain_text, DocumentContent.compressed_text, Document.legacy_content
+    ).outerjoin(
+        DocumentContent, DocumentContent.document_id == Document.id
+    ).filter(Document.id.in_(document_ids)).all()
+    texts = {}
+    for row in rows:
+        text = decode_text(row.plain_text, row.compressed_text)
+        if text is None:
+            text = row.legacy_content
+        if text is not None:
+            texts[row.id] = text
+    return texts
+
+
+def has_content():
+    """Dokümanın çıkarılmış metni var mı (sorgu filtresi/sütunu olarak)"""
+    return or_(Document.content_record.has(), Document.legacy_content.isnot(None))
+
+
+def migrate_legacy_content(db: Session, batch_size: int = 100) -> Dict[str, int]:
+    """`documents.content` sütunundaki metinleri `document_contents` tablosuna taşı"""
+    report = {"migrated": 0, "bytes": 0}
+    while True:
+        documents = db.query(Document).filter(Document.legacy_content.isnot(None)).order_by(Document.id).limit(batch_size).all()
+        if not documents:
+            break
+        for document in documents:
+            text = document.legacy_content
+            # Ayar ile yazılmış yeni metin varsa eski sütun yalnızca temizlenir
+            if document.content_record is None:
+                document.content = text
+                report["migrated"] += 1
+                report["bytes"] += len(text.encode("utf-8"))
+            document.legacy_content = None
+        db.commit()
+    return report
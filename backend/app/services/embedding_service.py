@@ -0,0 +1,259 @@
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import Client, Listener
+from typing import List, Optional
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from loguru import logger
+
+from app.core.config import settings
+
+# Worker süreçlerindeki model kopyası (her süreçte bir kez yüklenir)
+_worker_embedding_function = None
+
+
+def _init_worker(model_name: str):
+    """Embedding worker sürecini başlat ve modeli yükle"""
+    global _worker_embedding_function
+    _worker_embedding_function = SentenceTransformerEmbeddingFunction(model_name=model_name)
+    logger.info(f"Embedding worker {os.getpid()} loaded model '{model_name}'")
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    """Worker sürecinde bir batch için embedding oluştur"""
+    embeddings = _worker_embedding_function(texts)
+    return [list(map(float, embedding)) for embedding in embeddings]
+
+
+class _PendingRequest:
+    """Bir istemci isteğinin sonucunu bekleyen kayıt"""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class EmbeddingServer:
+    """Unix soketi arkasında çalışan paylaşımlı embedding süreç havuzu.
+
+    API worker'larından gelen istekler tek bir kuyrukta toplanır; boşta bir
+    embedding süreci olduğunda kuyruktaki istekler tek bir batch halinde
+    gönderilir. Yük arttıkça batch'ler worker'lar arasında kendiliğinden büyür.
+    Bir worker süreci ölürse (ör. OOM) o andaki batch'ler hata ile yanıtlanır
+    ve süreç havuzu yeniden oluşturulur.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = None,
+        workers: int = None,
+        max_batch: int = None,
+        model_name: str = None,
+    ):
+        self.socket_path = socket_path or settings.EMBEDDING_SERVICE_SOCKET
+        self.workers = workers or settings.EMBEDDING_SERVICE_WORKERS
+        self.max_batch = max_batch or settings.EMBEDDING_SERVICE_MAX_BATCH
+        self.model_name = model_name or settings.LOCAL_EMBEDDING_MODEL
+        self._requests = queue.Queue()
+        self._slots = threading.Semaphore(self.workers)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._listener = None
+
+    def serve_forever(self):
+        """Servisi başlat ve bağlantıları kabul et"""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+
+        self._pool = self._create_pool()
+        self._listener = Listener(self.socket_path, family="AF_UNIX", authkey=_authkey())
+        threading.Thread(target=self._batch_loop, name="embedding-batcher", daemon=True).start()
+        logger.info(f"Embedding service listening on {self.socket_path} with {self.workers} workers")
+
+        try:
+            while True:
+                connection = self._listener.accept()
+                threading.Thread(target=self._handle_connection, args=(connection,), daemon=True).start()
+        finally:
+            self.close()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.model_name,)
+        )
+
+    def _replace_broken_pool(self, broken: ProcessPoolExecutor):
+        """Bozulan havuzu yenisiyle değiştir (aynı havuz için yalnızca bir kez)"""
+        with self._pool_lock:
+            if self._pool is not broken:
+                return
+            logger.warning("Embedding worker pool is broken; starting a new one")
+            self._pool = self._create_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Soketi ve süreç havuzunu kapat"""
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def _handle_connection(self, connection):
+        """Tek bir istemci bağlantısındaki istekleri sırayla işle"""
+        try:
+            while True:
+                texts = connection.recv()
+                pending = _PendingRequest(texts)
+                self._requests.put(pending)
+                pending.done.wait()
+                if pending.error is not None:
+                    connection.send(("error", pending.error))
+                else:
+                    connection.send(("ok", pending.result))
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    def _batch_loop(self):
+        """Boşta worker oldukça kuyruktaki istekleri batch'e dönüştür"""
+        while True:
+            self._slots.acquire()
+            batch = [self._requests.get()]
+            size = len(batch[0].texts)
+            while size < self.max_batch:
+                try:
+                    pending = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                size += len(pending.texts)
+
+            texts = [text for pending in batch for text in pending.texts]
+            pool = self._pool
+            try:
+                future = pool.submit(_embed_batch, texts)
+            except Exception as e:
+                # Gönderilemeyen batch bekletilmez; izin bırakılır ki döngü sürsün
+                self._slots.release()
+                self._fail(batch, e)
+                if isinstance(e, BrokenProcessPool):
+                    self._replace_broken_pool(pool)
+                continue
+            future.add_done_callback(lambda f, batch=batch, pool=pool: self._complete(batch, f, pool))
+
+    def _fail(self, batch: List[_PendingRequest], error: Exception):
+        logger.error(f"Embedding batch failed: {error}")
+        for pending in batch:
+            pending.error = str(error)
+            pending.done.set()
+
+    def _complete(self, batch: List[_PendingRequest], future, pool=None):
+        """Batch sonucunu istekler arasında paylaştır"""
+        self._slots.release()
+        try:
+            embeddings = future.result()
+        except Exception as e:
+            self._fail(batch, e)
+            if isinstance(e, BrokenProcessPool) and pool is not None:
+                self._replace_broken_pool(pool)
+            return
+
+        offset = 0
+        for pending in batch:
+            pending.result = embeddings[offset:offset + len(pending.texts)]
+            offset += len(pending.texts)
+            pending.done.set()
+
+
+class RemoteEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Paylaşımlı embedding servisini çağıran embedding fonksiyonu.
+
+    Her thread kendi soket bağlantısını bir havuzdan ödünç alır; bağlantı
+    koparsa istek bir kez yeni bağlantıyla tekrarlanır. Zaman aşımında
+    istek tekrarlanmaz.
+    """
+
+    def __init__(self, socket_path: str = None, timeout: float = None):
+        self.socket_path = socket_path or settings.EMBEDDING_SERVICE_SOCKET
+        self.timeout = timeout or settings.EMBEDDING_SERVICE_TIMEOUT
+        self._connections = queue.LifoQueue()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        if not texts:
+            return []
+
+        for attempt in range(2):
+            connection = self._acquire()
+            try:
+                connection.send(texts)
+                if not connection.poll(self.timeout):
+                    raise TimeoutError(f"Embedding service did not answer within {self.timeout}s")
+                status, payload = connection.recv()
+            except TimeoutError:
+                # TimeoutError bir OSError'dır; yavaş bir batch yeniden gönderilmez
+                connection.close()
+                raise
+            except (EOFError, OSError) as e:
+                connection.close()
+                if attempt == 1:
+                    logger.error(f"Embedding service connection failed: {e}")
+                    raise ConnectionError(f"Embedding service unavailable at {self.socket_path}") from e
+                continue
+            except Exception:
+                connection.close()
+                raise
+
+            self._connections.put(connection)
+            if status != "ok":
+                raise RuntimeError(f"Embedding service error: {payload}")
+            return payload
+
+    def _acquire(self):
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            return Client(self.socket_path, family="AF_UNIX", authkey=_authkey())
+
+
+def _authkey() -> bytes:
+    return settings.SECRET_KEY.encode()
+
+
+_embedding_function: Optional[EmbeddingFunction] = None
+_embedding_function_lock = threading.Lock()
+
+
+def get_embedding_function() -> EmbeddingFunction:
+    """Yapılandırmaya göre süreç içi ya da uzak embedding fonksiyonunu döndür"""
+    global _embedding_function
+    with _embedding_function_lock:
+        if _embedding_function is None:
+            if settings.EMBEDDING_SERVICE_MODE == "remote":
+                _embedding_function = RemoteEmbeddingFunction()
+                logger.info(f"Using shared embedding service at {settings.EMBEDDING_SERVICE_SOCKET}")
+            elif settings.EMBEDDING_SERVICE_MODE == "local":
+                _embedding_function = SentenceTransformerEmbeddingFunction(
+                    model_name=settings.LOCAL_EMBEDDING_MODEL
+                )
+            else:
+                raise ValueError(f"Unsupported embedding service mode: {settings.EMBEDDING_SERVICE_MODE}")
+        return _embedding_function
+
+
+if __name__ == "__main__":
+    EmbeddingServer().serve_forever()
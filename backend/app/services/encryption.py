@@ -0,0 +1,185 @@
+import base64
+import io
+import os
+import struct
+from typing import BinaryIO, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+# Başlık: magic (4) | sürüm (1) | segment boyutu (4) | salt (16) | nonce öneki (7)
+MAGIC = b"DMSE"
+VERSION = 1
+_HEADER = struct.Struct(">4sBI16s7s")
+HEADER_SIZE = _HEADER.size
+TAG_SIZE = 16
+DEFAULT_SEGMENT_SIZE = 64 * 1024
+
+
+class DecryptionError(ValueError):
+    """Şifreli dosya bozuk, kesilmiş ya da yanlış anahtarla şifrelenmiş"""
+
+
+def derive_master_key(encryption_key: str) -> bytes:
+    """ENCRYPTION_KEY'den (Fernet biçiminde veya düz metin) ana anahtar baytlarını üret"""
+    try:
+        raw = base64.urlsafe_b64decode(encryption_key.encode())
+        if len(raw) >= 32:
+            return raw
+    except Exception:
+        pass
+    return encryption_key.encode()
+
+
+def _file_key(master_key: bytes, salt: bytes) -> AESGCM:
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=b"dms-segmented-aead-v1").derive(master_key)
+    return AESGCM(key)
+
+
+def _nonce(prefix: bytes, index: int, final: bool) -> bytes:
+    # nonce = önek (7) | segment no (4) | son segment bayrağı (1)
+    return prefix + struct.pack(">IB", index, 1 if final else 0)
+
+
+def is_segmented(header: bytes) -> bool:
+    """Baytlar bu kapsayıcı biçiminin başlığıyla mı başlıyor"""
+    return header[:len(MAGIC)] == MAGIC
+
+
+def _read_full(source: BinaryIO, size: int) -> bytes:
+    """Akış kısa okuma döndürse de `size` bayt (ya da dosya sonuna kadar) oku"""
+    data = source.read(size)
+    while data and len(data) < size:
+        more = source.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def encrypt_stream(
+    source: BinaryIO,
+    destination: BinaryIO,
+    master_key: bytes,
+    segment_size: int = DEFAULT_SEGMENT_SIZE
+) -> int:
+    """Kaynağı sabit boyutlu AES-GCM segmentleri halinde şifreleyerek yaz.
+
+    Bellekte aynı anda en fazla iki segment tutulur. Her segmentin nonce'u
+    segment numarasını ve son segment bayrağını içerir; başlık her segmentin
+    ek doğrulanmış verisidir (AAD). Böylece segmentlerin yeri değiştirilemez,
+    dosya sessizce kesilemez. Yazılan düz metin bayt sayısını döndürür.
+    """
+    salt, prefix = os.urandom(16), os.urandom(7)
+    header = _HEADER.pack(MAGIC, VERSION, segment_size, salt, prefix)
+    aead = _file_key(master_key, salt)
+    destination.write(header)
+
+    total = 0
+    index = 0
+    segment = _read_full(source, segment_size)
+    while True:
+        following = _read_full(source, segment_size) if len(segment) == segment_size else b""
+        final = not following
+        destination.write(aead.encrypt(_nonce(prefix, index, final), segment, header))
+        total += len(segment)
+        if final:
+            return total
+        segment = following
+        index += 1
+
+
+class DecryptingReader(io.RawIOBase):
+    """Segmentli şifreli dosya için aranabilir (seekable), salt okunur akış.
+
+    Yalnızca okunan aralığı kapsayan segmentler çözülür; son çözülen segment
+    önbellekte tutulur. Bellek kullanımı dosya boyutundan bağımsızdır.
+    """
+
+    def __init__(self, fileobj: BinaryIO, master_key: bytes):
+        super().__init__()
+        self._file = fileobj
+        self._file.seek(0)
+        self._header = self._file.read(HEADER_SIZE)
+        if len(self._header) != HEADER_SIZE or not is_segmented(self._header):
+            raise DecryptionError("Not a segmented encrypted file")
+        _, version, self.segment_size, salt, self._prefix = _HEADER.unpack(self._header)
+        if version != VERSION:
+            raise DecryptionError(f"Unsupported encryption format version: {version}")
+        self._aead = _file_key(master_key, salt)
+
+        body = self._file.seek(0, io.SEEK_END) - HEADER_SIZE
+        stored_segment = self.segment_size + TAG_SIZE
+        self._segments = max(1, -(-body // stored_segment))
+        self.size = body - self._segments * TAG_SIZE
+        if self.size < 0:
+            raise DecryptionError("Encrypted file is truncated")
+
+        self._position = 0
+        self._cached_index: Optional[int] = None
+        self._cached_plaintext = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def _segment(self, index: int) -> bytes:
+        if index == self._cached_index:
+            return self._cached_plaintext
+        stored_segment = self.segment_size + TAG_SIZE
+        self._file.seek(HEADER_SIZE + index * stored_segment)
+        ciphertext = self._file.read(stored_segment)
+        final = index == self._segments - 1
+        try:
+            plaintext = self._aead.decrypt(_nonce(self._prefix, index, final), ciphertext, self._header)
+        except InvalidTag as e:
+            raise DecryptionError(f"Segment {index} failed authentication") from e
+        self._cached_index, self._cached_plaintext = index, plaintext
+        return plaintext
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        written = 0
+        while written < len(view) and self._position < self.size:
+            index, offset = divmod(self._position, self.segment_size)
+            plaintext = self._segment(index)
+            piece = plaintext[offset:offset + len(view) - written]
+            view[written:written + len(piece)] = piece
+            written += len(piece)
+            self._position += len(piece)
+        return written
+
+    def readall(self) -> bytes:
+        chunks = []
+        while self._position < self.size:
+            index, offset = divmod(self._position, self.segment_size)
+            piece = self._segment(index)[offset:]
+            chunks.append(piece)
+            self._position += len(piece)
+        return b"".join(chunks)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
@@ -0,0 +1,137 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import run_after_commit
+from app.models.document import Document
+from app.models.document_keyword import DocumentKeyword
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.split()).casefold()
+
+
+def parse_keywords(keywords: Optional[str]) -> List[str]:
+    """Virgülle ayrılmış anahtar kelime dizgesini listeye çevir"""
+    return [keyword.strip() for keyword in (keywords or "").split(",") if keyword.strip()]
+
+
+class UserKeywords:
+    """Bir kullanıcının anahtar kelimeleri: normalize edilmiş biçime göre sıralı diziler"""
+
+    def __init__(self, rows: Iterable):
+        rows = sorted(rows, key=lambda row: row[0])
+        self.keys = [row[0] for row in rows]
+        self.labels = [row[1] for row in rows]
+        self.counts = [row[2] for row in rows]
+        self.loaded_at = time.monotonic()
+
+    def suggest(self, prefix: str, limit: int) -> List[str]:
+        """Önekle başlayan anahtar kelimeleri doküman sayısına göre sırala"""
+        prefix = normalize_keyword(prefix)
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        top = heapq.nsmallest(limit, range(start, end), key=lambda i: (-self.counts[i], self.keys[i]))
+        return [self.labels[i] for i in top]
+
+
+class KeywordPrefixIndex:
+    """Kullanıcı başına bellek içi önek indeksi (LRU + TTL).
+
+    Kullanıcının indeksi ilk öneri isteğinde `document_keywords` tablosundan
+    tek gruplu sorguyla kurulur; anahtar kelimeleri değiştiğinde
+    `invalidate` ile düşürülür. TTL, başka süreçlerdeki değişikliklerin
+    en geç ne kadar sonra görüleceğini belirler.
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, UserKeywords]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, user_id: int) -> Optional[UserKeywords]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if self.ttl_seconds and time.monotonic() - entry.loaded_at > self.ttl_seconds:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry
+
+    def _load(self, db: Session, user_id: int) -> UserKeywords:
+        rows = db.query(
+            DocumentKeyword.normalized,
+            func.min(DocumentKeyword.keyword),
+            func.count(DocumentKeyword.id)
+        ).filter(DocumentKeyword.user_id == user_id).group_by(DocumentKeyword.normalized).all()
+        entry = UserKeywords(rows)
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return entry
+
+    def suggest(self, db: Session, user_id: int, prefix: str, limit: int = 10) -> List[str]:
+        entry = self._get(user_id)
+        if entry is None:
+            entry = self._load(db, user_id)
+        return entry.suggest(prefix, limit)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+keyword_index = KeywordPrefixIndex(settings.KEYWORD_INDEX_MAX_USERS, settings.KEYWORD_INDEX_TTL_SECONDS)
+
+
+def set_document_keywords(db: Session, document_id: int, user_id: int, keywords: Iterable[str]):
+    """Dokümanın anahtar kelime satırlarını değiştir (çağıranın transaction'ında).
+
+    Kullanıcının önek indeksi commit'ten sonra düşürülür.
+    """
+    db.query(DocumentKeyword).filter(DocumentKeyword.document_id == document_id).delete(synchronize_session=False)
+    rows: Dict[str, str] = {}
+    for keyword in keywords:
+        keyword = keyword.strip()
+        if keyword:
+            rows.setdefault(normalize_keyword(keyword), keyword)
+    db.add_all([
+        DocumentKeyword(document_id=document_id, user_id=user_id, keyword=keyword, normalized=normalized)
+        for normalized, keyword in rows.items()
+    ])
+    run_after_commit(db, lambda: keyword_index.invalidate(user_id))
+
+
+def backfill_document_keywords(db: Session, batch_size: int = 500) -> Dict[str, int]:
+    """`documents.keywords` dizgelerinden anahtar kelime tablosunu yeniden oluştur"""
+    report = {"documents": 0, "keywords": 0}
+    last_id = 0
+    while True:
+        rows = db.query(Document.id, Document.user_id, Document.keywords).filter(
+            Document.id > last_id,
+            Document.keywords.isnot(None)
+        ).order_by(Document.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        for row in rows:
+            keywords = parse_keywords(row.keywords)
+            set_document_keywords(db, row.id, row.user_id, keywords)
+            report["documents"] += 1
+            report["keywords"] += len(keywords)
+        db.commit()
+    logger.info(f"Keyword backfill finished: {report['keywords']} keywords from {report['documents']} documents")
+    return report
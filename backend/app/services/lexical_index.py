@@ -0,0 +1,351 @@
+import fcntl
+import math
+import os
+import pickle
+import re
+import struct
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
+
+_WORD_PATTERN = re.compile(r"\w+")
+_COMPOUND_PATTERN = re.compile(r"\w+(?:[-./]\w+)+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Metni küçük harfli terimlere ayır.
+
+    Kod ve kimlik gibi birleşik ifadeler (`INV-2024/001`) hem bütün halinde
+    hem de parçalarıyla indekslenir; böylece tam eşleşmeler öne çıkar.
+    """
+    lowered = text.lower()
+    return _WORD_PATTERN.findall(lowered) + _COMPOUND_PATTERN.findall(lowered)
+
+
+class BM25Index:
+    """Chunk'lar üzerinde artımlı BM25 ters indeksi.
+
+    Her terim için posting listesi iki sıkışık diziden oluşur: chunk slot
+    numaraları (`uint32`) ve terim frekansları (`uint16`). Silinen chunk'lar
+    önce ölü olarak işaretlenir, ölü slot sayısı canlıları geçince indeks
+    sıkıştırılır. Doküman frekansı (df) yalnızca canlı slotlardan sayılır.
+
+    Kalıcılık bir anlık görüntü (snapshot) ve doküman düzeyindeki
+    değişikliklerin eklendiği bir günlükten oluşur; her ekleme/silme yalnızca
+    günlüğe bir kayıt yazar. Günlük anlık görüntüden büyüyünce yeni nesil
+    bir anlık görüntü yazılır ve günlük sıfırlanır. Yazmalar dosya kilidi
+    altında yapılır; diğer süreçler günlüğün yeni kayıtlarını uygular.
+    """
+
+    _FRAME = struct.Struct(">I")
+    _MIN_SNAPSHOT_LOG_BYTES = 1024 * 1024
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._snapshot_key = None
+        self._reset()
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._reload_if_changed()
+
+    def _reset(self):
+        self._chunk_ids: List[Optional[str]] = []
+        self._slot_documents = array("q")
+        self._lengths = array("I")
+        self._alive = array("B")
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._document_slots: Dict[int, List[int]] = {}
+        self._document_owners: Dict[int, Optional[int]] = {}
+        self._user_documents: Dict[Optional[int], Set[int]] = {}
+        self._live_chunks = 0
+        self._total_length = 0
+        self._generation = 0
+        self._log_offset = 0
+
+    # --- Kalıcılık ---
+
+    @contextmanager
+    def _file_lock(self):
+        if not self.path:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _log_path(self) -> str:
+        return f"{self.path}.log.{self._generation}"
+
+    def _reload_if_changed(self):
+        """Anlık görüntü değiştiyse yeniden yükle, ardından günlüğün yeni kayıtlarını uygula"""
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+            snapshot_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            snapshot_key = None
+        if snapshot_key != self._snapshot_key:
+            self._reset()
+            if snapshot_key is not None:
+                with open(self.path, "rb") as f:
+                    self.__dict__.update(pickle.load(f))
+                if not self._alive and self._chunk_ids:
+                    # Nesil bilgisi olmayan eski anlık görüntüler
+                    self._alive = array("B", (chunk_id is not None for chunk_id in self._chunk_ids))
+                if not self._user_documents and self._document_owners:
+                    for document_id, owner in self._document_owners.items():
+                        self._user_documents.setdefault(owner, set()).add(document_id)
+            self._snapshot_key = snapshot_key
+        self._replay_log()
+
+    def _replay_log(self):
+        log_path = self._log_path()
+        if not os.path.exists(log_path) or os.path.getsize(log_path) <= self._log_offset:
+            return
+        with open(log_path, "rb") as f:
+            f.seek(self._log_offset)
+            while True:
+                header = f.read(self._FRAME.size)
+                if len(header) < self._FRAME.size:
+                    break
+                size = self._FRAME.unpack(header)[0]
+                payload = f.read(size)
+                if len(payload) < size:
+                    # Yarım kalmış son kayıt; sonraki yazma onu keser
+                    break
+                self._apply(pickle.loads(payload))
+                self._log_offset = f.tell()
+
+    def _append_log(self, record: tuple):
+        """Kaydı günlüğe ekle (dosya kilidi altında, güncel durum yüklendikten sonra)"""
+        if not self.path:
+            return
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        frame = self._FRAME.pack(len(payload)) + payload
+        with open(self._log_path(), "ab") as f:
+            if os.fstat(f.fileno()).st_size > self._log_offset:
+                f.truncate(self._log_offset)
+            f.write(frame)
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_offset += len(frame)
+
+    def _maybe_snapshot(self):
+        """Günlük anlık görüntüden büyüdüyse (veya indeks sıkıştırıldıysa) yeni nesil yaz"""
+        if not self.path:
+            self._maybe_compact()
+            return
+        compacted = self._maybe_compact()
+        snapshot_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if not compacted and self._log_offset <= max(snapshot_size, self._MIN_SNAPSHOT_LOG_BYTES):
+            return
+
+        previous_log = self._log_path()
+        self._generation += 1
+        state = {
+            "_chunk_ids": self._chunk_ids,
+            "_slot_documents": self._slot_documents,
+            "_lengths": self._lengths,
+            "_alive": self._alive,
+            "_postings": self._postings,
+            "_document_slots": self._document_slots,
+            "_document_owners": self._document_owners,
+            "_user_documents": self._user_documents,
+            "_live_chunks": self._live_chunks,
+            "_total_length": self._total_length,
+            "_generation": self._generation,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        stat = os.stat(self.path)
+        self._snapshot_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._log_offset = 0
+        if os.path.exists(previous_log):
+            os.remove(previous_log)
+
+    # --- Yazma işlemleri ---
+
+    def add_document(self, document_id: int, chunk_ids: List[str], chunks: List[str], user_id: Optional[int] = None):
+        """Dokümanın chunk'larını indeksle (varsa eski chunk'ların yerine geçer)"""
+        frequencies = []
+        for text in chunks:
+            terms = tokenize(text)
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            frequencies.append((len(terms), counts))
+        record = ("add", document_id, user_id, list(chunk_ids), frequencies)
+
+        with self._lock, self._file_lock():
+            self._reload_if_changed()
+            self._append_log(record)
+            self._apply(record)
+            self._maybe_snapshot()
+
+    def remove_document(self, document_id: int):
+        """Dokümanın chunk'larını indeksten çıkar"""
+        with self._lock, self._file_lock():
+            self._reload_if_changed()
+            if document_id not in self._document_slots:
+                return
+            record = ("remove", document_id)
+            self._append_log(record)
+            self._apply(record)
+            self._maybe_snapshot()
+
+    def _apply(self, record: tuple):
+        if record[0] == "remove":
+            self._remove(record[1])
+            return
+
+        _, document_id, user_id, chunk_ids, frequencies = record
+        self._remove(document_id)
+        slots = []
+        for chunk_id, (length, counts) in zip(chunk_ids, frequencies):
+            slot = len(self._chunk_ids)
+            self._chunk_ids.append(chunk_id)
+            self._slot_documents.append(document_id)
+            self._lengths.append(length)
+            self._alive.append(1)
+            self._total_length += length
+            self._live_chunks += 1
+            slots.append(slot)
+            for term, frequency in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = (array("I"), array("H"))
+                    self._postings[term] = posting
+                posting[0].append(slot)
+                posting[1].append(min(frequency, 65535))
+
+        self._document_slots[document_id] = slots
+        self._document_owners[document_id] = user_id
+        self._user_documents.setdefault(user_id, set()).add(document_id)
+
+    def _remove(self, document_id: int) -> bool:
+        slots = self._document_slots.pop(document_id, None)
+        owner = self._document_owners.pop(document_id, None)
+        owned = self._user_documents.get(owner)
+        if owned is not None:
+            owned.discard(document_id)
+            if not owned:
+                del self._user_documents[owner]
+        if not slots:
+            return False
+        for slot in slots:
+            self._chunk_ids[slot] = None
+            self._alive[slot] = 0
+            self._total_length -= self._lengths[slot]
+            self._live_chunks -= 1
+        return True
+
+    def _maybe_compact(self) -> bool:
+        dead = len(self._chunk_ids) - self._live_chunks
+        if dead <= max(self._live_chunks, 1000):
+            return False
+
+        remap = array("q", [-1]) * len(self._chunk_ids)
+        chunk_ids, slot_documents, lengths = [], array("q"), array("I")
+        for slot, chunk_id in enumerate(self._chunk_ids):
+            if chunk_id is None:
+                continue
+            remap[slot] = len(chunk_ids)
+            chunk_ids.append(chunk_id)
+            slot_documents.append(self._slot_documents[slot])
+            lengths.append(self._lengths[slot])
+
+        postings = {}
+        for term, (slots, frequencies) in self._postings.items():
+            new_slots, new_frequencies = array("I"), array("H")
+            for slot, frequency in zip(slots, frequencies):
+                if remap[slot] >= 0:
+                    new_slots.append(remap[slot])
+                    new_frequencies.append(frequency)
+            if new_slots:
+                postings[term] = (new_slots, new_frequencies)
+
+        self._chunk_ids, self._slot_documents, self._lengths, self._postings = chunk_ids, slot_documents, lengths, postings
+        self._alive = array("B", [1]) * len(chunk_ids)
+        self._document_slots = {
+            document_id: [remap[slot] for slot in slots]
+            for document_id, slots in self._document_slots.items()
+        }
+        logger.info(f"Compacted BM25 index to {len(chunk_ids)} chunks")
+        return True
+
+    def document_ids(self) -> List[int]:
+        """İndeksteki doküman kimliklerini döndür"""
+        with self._lock:
+            self._reload_if_changed()
+            return list(self._document_slots)
+
+    # --- Arama ---
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        document_ids: Optional[Iterable[int]] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, object]]:
+        """BM25 skoruna göre en iyi chunk'ları döndür"""
+        with self._lock:
+            self._reload_if_changed()
+            if self._live_chunks == 0:
+                return []
+
+            allowed = None
+            if document_ids is not None:
+                allowed = set(document_ids)
+            if user_id is not None:
+                owned = self._user_documents.get(user_id, set())
+                allowed = owned if allowed is None else allowed & owned
+            if allowed is not None and not allowed:
+                return []
+
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            average_length = self._total_length / self._live_chunks
+            scores = np.zeros(len(self._chunk_ids), dtype=np.float32)
+
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                slots = np.frombuffer(posting[0], dtype=np.uint32)
+                frequencies = np.frombuffer(posting[1], dtype=np.uint16).astype(np.float32)
+                # Silinen chunk'lar df'e sayılmaz; aksi halde idf negatife düşer
+                live = alive[slots]
+                slots, frequencies = slots[live], frequencies[live]
+                if len(slots) == 0:
+                    continue
+                idf = math.log(1 + (self._live_chunks - len(slots) + 0.5) / (len(slots) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[slots] / average_length)
+                scores[slots] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+
+            candidates = np.flatnonzero(scores > 0)
+            hits = []
+            for slot in candidates[np.argsort(-scores[candidates], kind="stable")]:
+                chunk_id = self._chunk_ids[slot]
+                document_id = self._slot_documents[slot]
+                if chunk_id is None or (allowed is not None and document_id not in allowed):
+                    continue
+                hits.append({"id": chunk_id, "document_id": document_id, "score": float(scores[slot])})
+                if len(hits) >= n_results:
+                    break
+            return hits
@@ -0,0 +1,345 @@
+import fcntl
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.blob import Blob
+from app.models.document import Document
+from app.models.user import User
+from app.services.ai_service import ai_service
+from app.services.storage_service import PROFILE_PICTURE_PATTERN, storage_service
+
+
+def migrate_to_user_partitions(
+    db: Session,
+    batch_size: int = 500,
+    delete_source: bool = False,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """Ortak koleksiyondaki chunk'ları kullanıcı koleksiyonlarına taşı.
+
+    Vektörler yeniden hesaplanmaz; embedding, metin ve metadata olduğu gibi
+    hedef koleksiyona upsert edilir. Sahibi veritabanında bulunmayan
+    chunk'lar taşınmaz ve raporda `orphaned` olarak sayılır.
+
+    Ortak koleksiyonda `user_id` metadata'sı olmayan (eski) chunk'lara sahip
+    bilgisi yazılır (`backfilled`); böylece kaynak silinmezse bölümleme
+    kapatıldığında da kullanıcı filtreli aramalar bu chunk'ları bulur.
+    """
+    source = ai_service.collection
+    report = {"scanned": 0, "migrated": 0, "backfilled": 0, "orphaned": 0, "partitions": Counter()}
+    migrated_ids: List[str] = []
+    offset = 0
+
+    while True:
+        batch = source.get(
+            limit=batch_size,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        ids = batch["ids"]
+        if not ids:
+            break
+        offset += len(ids)
+        report["scanned"] += len(ids)
+
+        # Sahip bilgisi metadata'da yoksa tek sorguda veritabanından al
+        document_ids = {int(metadata["document_id"]) for metadata in batch["metadatas"] if metadata and "document_id" in metadata}
+        owners = dict(
+            db.query(Document.id, Document.user_id).filter(Document.id.in_(document_ids)).all()
+        ) if document_ids else {}
+
+        grouped: Dict[int, Dict[str, list]] = {}
+        backfill = {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+        for i, chunk_id in enumerate(ids):
+            metadata = dict(batch["metadatas"][i] or {})
+            user_id = owners.get(int(metadata["document_id"])) if "document_id" in metadata else None
+            if user_id is None:
+                report["orphaned"] += 1
+                continue
+            targets = [grouped.setdefault(user_id, {"ids": [], "embeddings": [], "documents": [], "metadatas": []})]
+            if "user_id" not in metadata:
+                targets.append(backfill)
+            metadata["user_id"] = str(user_id)
+            for group in targets:
+                group["ids"].append(chunk_id)
+                group["embeddings"].append(batch["embeddings"][i])
+                group["documents"].append(batch["documents"][i])
+                group["metadatas"].append(metadata)
+
+        # Upsert satırı yerinde günceller; sayfalama ofseti kaymaz
+        report["backfilled"] += len(backfill["ids"])
+        if backfill["ids"] and not dry_run and not delete_source:
+            source.upsert(**backfill)
+
+        for user_id, group in grouped.items():
+            partition = ai_service.chroma_client.partition_name(ai_service.collection_name, user_id)
+            report["partitions"][partition] += len(group["ids"])
+            report["migrated"] += len(group["ids"])
+            migrated_ids.extend(group["ids"])
+            if dry_run:
+                continue
+            ai_service.chroma_client.get_partition(
+                ai_service.collection_name,
+                user_id,
+                metadata=ai_service.collection_metadata
+            ).upsert(**group)
+
+    if delete_source and not dry_run:
+        for start in range(0, len(migrated_ids), batch_size):
+            source.delete(ids=migrated_ids[start:start + batch_size])
+
+    report["partitions"] = dict(report["partitions"])
+    logger.info(
+        f"Partition migration finished: {report['migrated']} migrated, {report['backfilled']} backfilled, "
+        f"{report['orphaned']} orphaned (dry_run={dry_run})"
+    )
+    return report
+
+
+def list_vector_collections(db: Session):
+    """Tüm vektör koleksiyonları: chunk ve özet koleksiyonları ile (varsa) kullanıcı bölümleri"""
+    collections = [ai_service.collection, ai_service.get_summary_collection()]
+    if settings.VECTOR_PARTITION_BY_USER:
+        for (user_id,) in db.query(User.id).all():
+            collections.append(ai_service.get_collection(user_id))
+            collections.append(ai_service.get_summary_collection(user_id))
+    return collections
+
+
+def backfill_document_summaries(db: Session, batch_size: int = 100) -> Dict[str, Any]:
+    """Özeti olan ama özet vektörü bulunmayan dokümanlar için özet vektörü oluştur"""
+    report = {"scanned": 0, "stored": 0, "failed": []}
+    last_id = 0
+    while True:
+        rows = db.query(Document.id, Document.user_id, Document.title, Document.summary, Document.keywords).filter(
+            Document.id > last_id,
+            Document.summary.isnot(None)
+        ).order_by(Document.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        report["scanned"] += len(rows)
+
+        for row in rows:
+            collection = ai_service.get_summary_collection(row.user_id)
+            if collection.get(ids=[f"doc_{row.id}_summary"], include=[])["ids"]:
+                continue
+            try:
+                keywords = [keyword.strip() for keyword in (row.keywords or "").split(",") if keyword.strip()]
+                ai_service.store_document_summary(row.id, row.title, row.summary, keywords, user_id=row.user_id)
+                report["stored"] += 1
+            except Exception as e:
+                logger.error(f"Summary backfill failed for document {row.id}: {e}")
+                report["failed"].append(row.id)
+
+    logger.info(f"Summary backfill finished: {report['stored']} stored, {len(report['failed'])} failed")
+    return report
+
+
+def _collect_orphan_vectors(db: Session, collection, batch_size: int) -> List[str]:
+    """Koleksiyonda, SQL'de karşılığı olmayan dokümanlara ait chunk kimliklerini bul"""
+    orphan_ids: List[str] = []
+    offset = 0
+    while True:
+        batch = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+        ids = batch["ids"]
+        if not ids:
+            break
+        offset += len(ids)
+
+        chunk_documents = {
+            chunk_id: int((metadata or {}).get("document_id", -1))
+            for chunk_id, metadata in zip(ids, batch["metadatas"])
+        }
+        existing = {
+            document_id
+            for (document_id,) in db.query(Document.id).filter(Document.id.in_(set(chunk_documents.values()))).all()
+        }
+        orphan_ids.extend(chunk_id for chunk_id, document_id in chunk_documents.items() if document_id not in existing)
+    return orphan_ids
+
+
+def _collect_orphan_files(db: Session) -> List[str]:
+    """Depolama dizininde hiçbir dokümanın referans vermediği dosyaları bul"""
+    storage_path = settings.STORAGE_PATH
+    if not os.path.isdir(storage_path):
+        return []
+
+    referenced = {
+        os.path.abspath(file_path)
+        for (file_path,) in db.query(Document.file_path).yield_per(settings.GC_BATCH_SIZE)
+        if file_path
+    }
+    cutoff = time.time() - settings.GC_GRACE_SECONDS
+    orphans = []
+    with os.scandir(storage_path) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.name.startswith(".") or PROFILE_PICTURE_PATTERN.match(entry.name):
+                continue
+            if entry.stat().st_mtime > cutoff:
+                # Yüklemesi süren dosyalar henüz veritabanına yazılmamış olabilir
+                continue
+            if os.path.abspath(entry.path) not in referenced:
+                orphans.append(entry.path)
+    return orphans
+
+
+def _collect_unreferenced_blobs(db: Session) -> List[Blob]:
+    """Referans sayısı sıfıra ineli GC_GRACE_SECONDS'tan uzun süre geçmiş blob kayıtları"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.GC_GRACE_SECONDS)
+    return db.query(Blob).filter(Blob.ref_count <= 0, Blob.updated_at < cutoff).all()
+
+
+def _collect_untracked_blobs(db: Session, batch_size: int) -> List[str]:
+    """Depoda olup `blobs` tablosunda kaydı olmayan (yüklemesi yarım kalmış) blob konumları"""
+    cutoff = time.time() - settings.GC_GRACE_SECONDS
+    untracked: List[str] = []
+    batch: Dict[str, str] = {}
+
+    def flush():
+        known = {digest for (digest,) in db.query(Blob.digest).filter(Blob.digest.in_(list(batch))).all()}
+        untracked.extend(location for digest, location in batch.items() if digest not in known)
+        batch.clear()
+
+    for digest, location, modified_at in storage_service.backend.list_blobs():
+        if modified_at > cutoff:
+            continue
+        batch[digest] = location
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return untracked
+
+
+def _collect_stale_uploads() -> List[str]:
+    """Yarıda kalmış yüklemelerden kalan geçici dosyalar"""
+    temp_dir = storage_service.backend.temp_dir()
+    cutoff = time.time() - settings.GC_GRACE_SECONDS
+    with os.scandir(temp_dir) as entries:
+        return [entry.path for entry in entries if entry.is_file() and entry.stat().st_mtime < cutoff]
+
+
+def _reclaim_blobs(db: Session, blobs: List[Blob]) -> int:
+    """Hâlâ referanssız olan blob'ların kaydını ve dosyasını sil; silinen bayt sayısını döndür.
+
+    Her blob satırı kilitlenerek (`SELECT ... FOR UPDATE`) referans sayısı
+    yeniden kontrol edilir; dosya ve kayıt aynı transaction'da silinir. Bu
+    sırada referans almaya çalışan `acquire_blob` kilidin bırakılmasını bekler.
+    """
+    cutoff = time.time() - settings.GC_GRACE_SECONDS
+    reclaimed = 0
+    for digest in [blob.digest for blob in blobs]:
+        try:
+            blob = db.query(Blob).filter(Blob.digest == digest).with_for_update().one_or_none()
+            if blob is None or blob.ref_count > 0:
+                db.rollback()
+                continue
+            try:
+                # Aynı içerik az önce yeniden yüklendiyse dosya zamanı yenilenmiştir; dosya korunur
+                if storage_service.backend.modified_at(blob.location) < cutoff:
+                    storage_service.backend.delete(blob.location)
+                    reclaimed += blob.size
+            except FileNotFoundError:
+                pass
+            db.delete(blob)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return reclaimed
+
+
+def collect_garbage(db: Session, dry_run: bool = True, batch_size: int = None) -> Dict[str, Any]:
+    """Vektör deposu, BM25 indeksi ve depolama dizinini `documents` tablosuyla uzlaştır.
+
+    `dry_run` açıkken hiçbir şey silinmez, yalnızca rapor döndürülür.
+    """
+    batch_size = batch_size or settings.GC_BATCH_SIZE
+    report: Dict[str, Any] = {
+        "dry_run": dry_run,
+        "collections": {},
+        "orphan_vectors": 0,
+        "orphan_lexical_documents": [],
+        "orphan_files": [],
+        "orphan_file_bytes": 0,
+        "unreferenced_blobs": 0,
+        "untracked_blobs": 0,
+        "stale_uploads": 0,
+        "reclaimed_blob_bytes": 0,
+    }
+
+    for collection in list_vector_collections(db):
+        orphan_ids = _collect_orphan_vectors(db, collection, batch_size)
+        report["collections"][collection.name] = len(orphan_ids)
+        report["orphan_vectors"] += len(orphan_ids)
+        if dry_run or not orphan_ids:
+            continue
+        for start in range(0, len(orphan_ids), batch_size):
+            collection.delete(ids=orphan_ids[start:start + batch_size])
+        if hasattr(collection, "compact"):
+            collection.compact()
+
+    indexed = ai_service.lexical_index.document_ids()
+    existing = {
+        document_id
+        for (document_id,) in db.query(Document.id).filter(Document.id.in_(indexed)).all()
+    } if indexed else set()
+    report["orphan_lexical_documents"] = [document_id for document_id in indexed if document_id not in existing]
+    if not dry_run:
+        for document_id in report["orphan_lexical_documents"]:
+            ai_service.lexical_index.remove_document(document_id)
+
+    orphan_files = _collect_orphan_files(db)
+    report["orphan_files"] = orphan_files
+    report["orphan_file_bytes"] = sum(os.path.getsize(path) for path in orphan_files if os.path.exists(path))
+    if not dry_run:
+        for path in orphan_files:
+            storage_service.delete_file(path)
+
+    unreferenced = _collect_unreferenced_blobs(db)
+    untracked = _collect_untracked_blobs(db, batch_size)
+    stale_uploads = _collect_stale_uploads()
+    report["unreferenced_blobs"] = len(unreferenced)
+    report["untracked_blobs"] = len(untracked)
+    report["stale_uploads"] = len(stale_uploads)
+    if not dry_run:
+        report["reclaimed_blob_bytes"] = _reclaim_blobs(db, unreferenced)
+        for location in untracked:
+            storage_service.backend.delete(location)
+        for path in stale_uploads:
+            os.remove(path)
+
+    logger.info(
+        f"Garbage collection finished (dry_run={dry_run}): {report['orphan_vectors']} vectors, "
+        f"{len(report['orphan_lexical_documents'])} lexical documents, {len(orphan_files)} files, "
+        f"{len(unreferenced)} unreferenced blobs"
+    )
+    return report
+
+
+def run_garbage_collection() -> Optional[Dict[str, Any]]:
+    """Periyodik GC işi; aynı anda yalnızca bir süreçte çalışır"""
+    lock_path = os.path.join(settings.STORAGE_PATH, ".gc.lock")
+    with open(lock_path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info("Garbage collection already running in another process, skipping")
+            return None
+        try:
+            db = SessionLocal()
+            try:
+                return collect_garbage(db, dry_run=False)
+            finally:
+                db.close()
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
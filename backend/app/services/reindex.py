@@ -0,0 +1,236 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document
+from app.models.index_version import VectorIndexVersion
+from app.services.ai_service import ai_service
+from app.services.content_store import has_content, load_document_texts
+
+# Doküman başına (chunk sayısı, vektör baytı)
+DocumentStats = Tuple[int, int]
+
+
+def create_index_version(db: Session) -> VectorIndexVersion:
+    """Yeni (building durumunda) bir indeks sürümü ve koleksiyon adı oluştur"""
+    version = VectorIndexVersion(
+        collection_name=f"{settings.VECTOR_COLLECTION_NAME}_v{datetime.utcnow():%Y%m%d%H%M%S}",
+        embedding_model=settings.LOCAL_EMBEDDING_MODEL,
+        chunker_version=ai_service.chunker_version,
+        status="building"
+    )
+    db.add(version)
+    db.commit()
+    db.refresh(version)
+    return version
+
+
+def _reindex_document(document_id: int, collection_name: str, throttle_ratio: float) -> Optional[DocumentStats]:
+    """Tek bir dokümanı kayıtlı metninden yeniden chunk'la ve hedef koleksiyona yaz"""
+    db = SessionLocal()
+    try:
+        user_id = db.query(Document.user_id).filter(Document.id == document_id).scalar()
+        text = load_document_texts(db, [document_id]).get(document_id)
+    finally:
+        db.close()
+    if user_id is None or not text:
+        return None
+
+    started = time.monotonic()
+    chunks = ai_service.chunk_text(text)
+    stats = ai_service.embed_and_store_chunks(
+        document_id, chunks, user_id=user_id, collection_name=collection_name,
+        offsets=ai_service.chunk_offsets(text, chunks)
+    ) if chunks else (0, 0)
+
+    # Canlı trafiğe pay bırakmak için harcanan sürenin belirli bir katı kadar bekle
+    if throttle_ratio > 0:
+        time.sleep((time.monotonic() - started) * throttle_ratio)
+    return stats
+
+
+def _reindex_documents(
+    document_ids: Iterable[int],
+    collection_name: str,
+    workers: int,
+    throttle_ratio: float,
+    stats: Dict[int, Optional[DocumentStats]],
+    failed: Dict[int, str]
+):
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reindex") as pool:
+        futures = {
+            pool.submit(_reindex_document, document_id, collection_name, throttle_ratio): document_id
+            for document_id in document_ids
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            document_id = futures[future]
+            try:
+                stats[document_id] = future.result()
+                failed.pop(document_id, None)
+            except Exception as e:
+                logger.error(f"Reindex failed for document {document_id}: {e}")
+                failed[document_id] = str(e)
+            if done % 100 == 0:
+                logger.info(f"Reindexed {done}/{len(futures)} documents into '{collection_name}'")
+
+
+def _changed_since(db: Session, since) -> set:
+    return {
+        document_id for (document_id,) in db.query(Document.id).filter(
+            or_(Document.created_at >= since, Document.updated_at >= since)
+        ).all()
+    }
+
+
+def _catch_up(
+    db: Session,
+    since,
+    collection_name: str,
+    workers: int,
+    stats: Dict[int, Optional[DocumentStats]],
+    failed: Dict[int, str],
+    max_rounds: int = 3,
+    touched: Optional[set] = None
+):
+    """Yeniden indeksleme sürerken eklenen/değişen/silinen dokümanları hedefe yansıt.
+
+    Yeniden indekslenen doküman kimlikleri `touched` verilirse ona eklenir.
+    Bir sonraki turun başlangıç zamanını döndürür.
+    """
+    for _ in range(max_rounds):
+        round_started = db.query(func.now()).scalar()
+        changed = _changed_since(db, since)
+        existing = {document_id for (document_id,) in db.query(Document.id).filter(Document.id.in_(list(stats))).all()} if stats else set()
+        deleted = set(stats) - existing
+
+        for document_id in deleted:
+            ai_service.get_collection(collection_name=collection_name).delete(where={"document_id": str(document_id)})
+            ai_service.get_lexical_index(collection_name).remove_document(document_id)
+            stats.pop(document_id, None)
+        if not changed and not deleted:
+            return round_started
+
+        logger.info(f"Catch-up: {len(changed)} changed, {len(deleted)} deleted documents for '{collection_name}'")
+        _reindex_documents(changed, collection_name, workers, 0.0, stats, failed)
+        if touched is not None:
+            touched.update(changed)
+        since = round_started
+        db.expire_all()
+    return since
+
+
+def _write_document_stats(db: Session, stats: Dict[int, Optional[DocumentStats]], embedding_model: str):
+    """Doküman satırlarındaki chunk/vektör istatistiklerini güncelle (çağıranın transaction'ında)"""
+    for document_id, document_stats in stats.items():
+        chunk_count, vector_bytes = document_stats or (0, 0)
+        db.query(Document).filter(Document.id == document_id).update({
+            "chunk_count": chunk_count,
+            "vector_bytes": vector_bytes,
+            "embedding_model": embedding_model
+        }, synchronize_session=False)
+
+
+def activate_index_version(db: Session, collection_name: str, stats: Optional[Dict[int, Optional[DocumentStats]]] = None) -> VectorIndexVersion:
+    """Sürümü tek bir transaction içinde aktif yap; önceki aktif sürüm `retired` olur.
+
+    Eski koleksiyonlar silinmez; geri dönmek için eski sürüm yeniden aktif
+    edilebilir. API süreçleri yeni sürümü INDEX_VERSION_CHECK_SECONDS içinde
+    kendiliğinden görür.
+    """
+    version = db.query(VectorIndexVersion).filter(VectorIndexVersion.collection_name == collection_name).first()
+    if version is None:
+        if collection_name != settings.VECTOR_COLLECTION_NAME:
+            raise ValueError(f"Unknown index version: {collection_name}")
+        # Sürüm kaydı olmayan temel koleksiyona geri dönüş
+        version = VectorIndexVersion(
+            collection_name=collection_name,
+            embedding_model=settings.LOCAL_EMBEDDING_MODEL,
+            chunker_version=ai_service.chunker_version
+        )
+        db.add(version)
+    elif version.status in ("building", "failed") and stats is None:
+        raise ValueError(f"Index version '{collection_name}' is {version.status} and cannot be activated")
+
+    db.query(VectorIndexVersion).filter(
+        VectorIndexVersion.status == "active",
+        VectorIndexVersion.collection_name != collection_name
+    ).update({"status": "retired"}, synchronize_session=False)
+    version.status = "active"
+    version.activated_at = func.now()
+
+    # Doküman istatistikleri artık yeni indeksi tarif eder
+    _write_document_stats(db, stats or {}, version.embedding_model)
+    db.commit()
+
+    ai_service.switch_collection(collection_name)
+    logger.info(f"Activated vector index version '{collection_name}'")
+    return version
+
+
+def reindex_all(
+    db: Session,
+    workers: Optional[int] = None,
+    throttle_ratio: Optional[float] = None,
+    activate: bool = True
+) -> Dict[str, Any]:
+    """Tüm dokümanları yeni bir koleksiyona yeniden indeksle (mavi/yeşil).
+
+    Aktif koleksiyon sorgulara hizmet etmeye devam ederken yeni koleksiyon
+    arka planda doldurulur. Süreç boyunca değişen dokümanlar bir yakalama
+    (catch-up) turunda hedefe yansıtılır; ardından aktif sürüm tek bir
+    veritabanı işlemiyle değiştirilir. Hata olursa aktif sürüm değişmez.
+    """
+    workers = workers or settings.REINDEX_WORKERS
+    throttle_ratio = settings.REINDEX_THROTTLE_RATIO if throttle_ratio is None else throttle_ratio
+
+    version = create_index_version(db)
+    collection_name = version.collection_name
+    started_at = db.query(func.now()).scalar()
+    document_ids = [document_id for (document_id,) in db.query(Document.id).filter(has_content()).order_by(Document.id).all()]
+    logger.info(f"Reindexing {len(document_ids)} documents into '{collection_name}' with {workers} workers")
+
+    stats: Dict[int, Optional[DocumentStats]] = {}
+    failed: Dict[int, str] = {}
+    _reindex_documents(document_ids, collection_name, workers, throttle_ratio, stats, failed)
+    caught_up_at = _catch_up(db, started_at, collection_name, workers, stats, failed)
+
+    indexed = {document_id: value for document_id, value in stats.items() if value is not None}
+    version.document_count = len(indexed)
+    version.chunk_count = sum(chunk_count for chunk_count, _ in indexed.values())
+
+    report = {
+        "collection": collection_name,
+        "documents": version.document_count,
+        "chunks": version.chunk_count,
+        "failed": failed,
+        "activated": False,
+    }
+    if failed:
+        version.status = "failed"
+        db.commit()
+        logger.error(f"Reindex into '{collection_name}' failed for {len(failed)} documents; active index unchanged")
+        return report
+
+    db.commit()
+    if activate:
+        activate_index_version(db, collection_name, stats=stats)
+        report["activated"] = True
+
+        # Diğer süreçler eski koleksiyona yazmayı bırakana kadar bekleyip son değişiklikleri aktar
+        time.sleep(settings.INDEX_VERSION_CHECK_SECONDS)
+        touched: set = set()
+        _catch_up(db, caught_up_at, collection_name, workers, stats, failed, max_rounds=1, touched=touched)
+        _write_document_stats(
+            db,
+            {document_id: stats[document_id] for document_id in touched if document_id in stats},
+            version.embedding_model
+        )
+        db.commit()
+    return report
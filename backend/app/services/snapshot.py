@@ -0,0 +1,166 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.ai_service import ai_service
+from app.services.maintenance import list_vector_collections
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.jsonl.gz"
+
+
+class SnapshotError(RuntimeError):
+    """Anlık görüntü tutarlı biçimde alınamadı"""
+
+
+def export_snapshot(db: Session, out_dir: str, dtype: str = "float16", batch_size: int = 1000) -> Dict[str, Any]:
+    """Tüm chunk vektörlerini ve metadata'yı sütunlu bir anlık görüntüye yaz.
+
+    Vektörler tek bir `.npy` dosyasına (float16/float32) mmap üzerinden,
+    kimlik/metin/metadata satırları ise gzip'li JSONL tabloya batch batch
+    yazılır; bellek kullanımı korpus boyutundan bağımsızdır.
+
+    Her koleksiyon baştan sayılan kendi satır aralığına yazılır. Ofsetle
+    sayfalama canlı bir koleksiyonda satır atlayıp tekrarlayabileceğinden,
+    dışa aktarım sırasında bir koleksiyonun sayısı değişirse ya da aynı kimlik
+    iki kez gelirse `SnapshotError` yükselir ve manifest yazılmaz; dışa
+    aktarım yazma trafiği durdurulmuşken tekrarlanmalıdır.
+    """
+    if dtype not in ("float16", "float32"):
+        raise ValueError(f"Unsupported snapshot dtype: {dtype}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    # Önceki bir dışa aktarımın manifest'i yeni (yarım) dosyalarla eşleşmesin
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    collections = [(collection, collection.count()) for collection in list_vector_collections(db)]
+    capacity = sum(count for _, count in collections)
+
+    vectors = None
+    dim = None
+    row = 0
+    manifest_collections = []
+    try:
+        with gzip.open(os.path.join(out_dir, METADATA_FILE), "wt", encoding="utf-8") as metadata_file:
+            for collection, count in collections:
+                start_row = row
+                end_row = start_row + count
+                seen = set()
+                while row < end_row:
+                    batch = collection.get(
+                        limit=min(batch_size, end_row - row),
+                        offset=row - start_row,
+                        include=["embeddings", "documents", "metadatas"]
+                    )
+                    ids = batch["ids"]
+                    if not ids:
+                        break
+                    seen.update(ids)
+                    if len(seen) != row - start_row + len(ids):
+                        raise SnapshotError(f"Collection '{collection.name}' returned duplicate rows during export")
+
+                    embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+                    if vectors is None:
+                        dim = embeddings.shape[1]
+                        vectors = np.lib.format.open_memmap(
+                            os.path.join(out_dir, VECTORS_FILE), mode="w+", dtype=dtype, shape=(capacity, dim)
+                        )
+                    vectors[row:row + len(ids)] = embeddings.astype(dtype)
+
+                    for i, chunk_id in enumerate(ids):
+                        metadata_file.write(json.dumps({
+                            "id": chunk_id,
+                            "document": batch["documents"][i],
+                            "metadata": batch["metadatas"][i]
+                        }, ensure_ascii=False) + "\n")
+                    row += len(ids)
+
+                current = collection.count()
+                if row != end_row or current != count:
+                    raise SnapshotError(
+                        f"Collection '{collection.name}' changed during export "
+                        f"(counted {count}, exported {row - start_row}, now {current})"
+                    )
+                manifest_collections.append({"name": collection.name, "start": start_row, "count": count})
+    except SnapshotError:
+        # Kısmi dosyalar geçerli bir anlık görüntü gibi görünmesin
+        vectors = None
+        for name in (VECTORS_FILE, METADATA_FILE):
+            path = os.path.join(out_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        if vectors is not None:
+            vectors.flush()
+            del vectors
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "count": row,
+        "dim": dim,
+        "dtype": dtype,
+        "embedding_model": settings.LOCAL_EMBEDDING_MODEL,
+        "collections": manifest_collections,
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info(f"Exported {row} vectors from {len(collections)} collections to {out_dir}")
+    return manifest
+
+
+def read_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def restore_snapshot(snapshot_dir: str, batch_size: int = 1000, collection_name: Optional[str] = None) -> Dict[str, Any]:
+    """Anlık görüntüyü yapılandırılmış vektör deposu arka ucuna toplu yükle.
+
+    `collection_name` verilirse tüm satırlar tek bir koleksiyona yazılır;
+    aksi halde her satır dışa aktarıldığı koleksiyona geri döner.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {manifest['version']}")
+    if manifest["count"] == 0:
+        return {"restored": 0, "collections": {}}
+
+    vectors = np.load(os.path.join(snapshot_dir, VECTORS_FILE), mmap_mode="r")
+    restored: Dict[str, int] = {}
+
+    with gzip.open(os.path.join(snapshot_dir, METADATA_FILE), "rt", encoding="utf-8") as metadata_file:
+        for entry in manifest["collections"]:
+            target_name = collection_name or entry["name"]
+            target = ai_service.chroma_client.get_or_create_collection(
+                target_name,
+                metadata=ai_service.collection_metadata
+            )
+            end_row = entry["start"] + entry["count"]
+            for start in range(entry["start"], end_row, batch_size):
+                stop = min(start + batch_size, end_row)
+                rows = [json.loads(metadata_file.readline()) for _ in range(stop - start)]
+                target.upsert(
+                    ids=[row["id"] for row in rows],
+                    embeddings=np.asarray(vectors[start:stop], dtype=np.float32).tolist(),
+                    documents=[row["document"] for row in rows],
+                    metadatas=[row["metadata"] for row in rows]
+                )
+                restored[target_name] = restored.get(target_name, 0) + len(rows)
+
+    ai_service.vector_cache.clear()
+    logger.info(f"Restored {sum(restored.values())} vectors from {snapshot_dir}")
+    return {"restored": sum(restored.values()), "collections": restored}
@@ -0,0 +1,312 @@
+import io
+import os
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+
+class StorageBackend(ABC):
+    """Dosya baytlarını (gerekirse şifreli) saklayan depolama arka ucu.
+
+    Dosyalar arka uca özgü bir konum (`location`) dizgesiyle adreslenir;
+    `Document.file_path` bu konumu tutar.
+    """
+
+    remote = False  # Baytlar ağ üzerinden mi okunuyor
+
+    @abstractmethod
+    def put(self, key: str, source_path: str) -> str:
+        """Yerel geçici dosyayı `key` altında yerleştir ve konumunu döndür"""
+
+    @abstractmethod
+    def open(self, location: str) -> BinaryIO:
+        """Saklanan baytları aranabilir bir akış olarak aç"""
+
+    @abstractmethod
+    def exists(self, location: str) -> bool:
+        pass
+
+    @abstractmethod
+    def delete(self, location: str) -> bool:
+        pass
+
+    @abstractmethod
+    def size(self, location: str) -> int:
+        """Saklanan (şifreliyse şifreli) bayt sayısı"""
+
+    @abstractmethod
+    def modified_at(self, location: str) -> float:
+        """Son değişiklik zamanı (epoch saniye)"""
+
+    @abstractmethod
+    def list_blobs(self) -> Iterator[Tuple[str, str, float]]:
+        """İçerik adresli blob'ları (anahtar, konum, değişiklik zamanı) olarak listele"""
+
+    @abstractmethod
+    def temp_dir(self) -> str:
+        """Yüklemelerin yazılmadan önce hazırlandığı yerel dizin"""
+
+    def local_path(self, location: str) -> Optional[str]:
+        """Konum yerel bir dosyaysa yolunu döndür (sendfile için)"""
+        return None
+
+
+class DiskBackend(StorageBackend):
+    """Blob'ları `blobs/ab/cd/abcdef…` düzeninde yerel diske yazan arka uç.
+
+    Yazmalar aynı dosya sistemindeki geçici dosyanın yeniden adlandırılmasıyla
+    atomik yapılır. İçerik zaten varsa yeni kopya atılır ve mevcut dosyanın
+    zamanı güncellenir; böylece GC yeni referans alan bir blob'u silmez.
+    Eski düz (uuid adlı) dosya yolları da okunabilir.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.blob_root = os.path.join(root, "blobs")
+        self._temp_dir = os.path.join(root, ".tmp")
+
+    def location_for(self, key: str) -> str:
+        return os.path.join(self.blob_root, key[:2], key[2:4], key)
+
+    def put(self, key: str, source_path: str) -> str:
+        location = self.location_for(key)
+        if os.path.exists(location):
+            os.utime(location)
+            os.remove(source_path)
+            return location
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        os.replace(source_path, location)
+        return location
+
+    def open(self, location: str) -> BinaryIO:
+        return open(location, "rb")
+
+    def exists(self, location: str) -> bool:
+        return os.path.exists(location)
+
+    def delete(self, location: str) -> bool:
+        if os.path.exists(location):
+            os.remove(location)
+            return True
+        return False
+
+    def size(self, location: str) -> int:
+        return os.path.getsize(location)
+
+    def modified_at(self, location: str) -> float:
+        return os.stat(location).st_mtime
+
+    def list_blobs(self) -> Iterator[Tuple[str, str, float]]:
+        if not os.path.isdir(self.blob_root):
+            return
+        for directory, _, filenames in os.walk(self.blob_root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    yield filename, path, os.stat(path).st_mtime
+                except FileNotFoundError:
+                    continue
+
+    def temp_dir(self) -> str:
+        os.makedirs(self._temp_dir, exist_ok=True)
+        return self._temp_dir
+
+    def local_path(self, location: str) -> Optional[str]:
+        return location
+
+
+class _RangedReader(io.RawIOBase):
+    """S3 nesnesi için ranged GET'lerle okunan, aranabilir salt okunur akış.
+
+    Her okuma `block_size` hizalı bir bloğu getirir ve son bloğu önbellekte
+    tutar; sıralı okumalar blok başına tek istek yapar, `seek` ise yalnızca
+    gereken aralığın indirilmesini sağlar. Nesnenin tamamı indirilmez.
+    """
+
+    def __init__(self, client, bucket: str, key: str, size: int, block_size: int):
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self.size = size
+        self._block_size = block_size
+        self._position = 0
+        self._block_start = -1
+        self._block = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def _fetch(self, start: int) -> bytes:
+        if start != self._block_start:
+            end = min(start + self._block_size, self.size) - 1
+            response = self._client.get_object(Bucket=self._bucket, Key=self._key, Range=f"bytes={start}-{end}")
+            with response["Body"] as body:
+                self._block = body.read()
+            self._block_start = start
+        return self._block
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        written = 0
+        while written < len(view) and self._position < self.size:
+            start = self._position - self._position % self._block_size
+            block = self._fetch(start)
+            offset = self._position - start
+            piece = block[offset:offset + len(view) - written]
+            if not piece:
+                break
+            view[written:written + len(piece)] = piece
+            written += len(piece)
+            self._position += len(piece)
+        return written
+
+
+class S3Backend(StorageBackend):
+    """Blob'ları S3 uyumlu nesne deposunda (AWS S3, MinIO) tutan arka uç.
+
+    Konumlar `s3://bucket/anahtar` biçimindedir. Büyük dosyalar paralel
+    multipart olarak yüklenir; okumalar ranged GET ile yapılır, böylece
+    metin çıkarma ve indirme yerel kopya gerektirmez. Tek istemci tüm
+    iş parçacıklarınca paylaşılır; bağlantı havuzu boyutu ayarlanabilir.
+    """
+
+    remote = True
+
+    def __init__(
+        self,
+        bucket: str,
+        staging_root: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        max_pool_connections: int = 32,
+        multipart_threshold: int = 16 * 1024 * 1024,
+        multipart_chunksize: int = 16 * 1024 * 1024,
+        upload_concurrency: int = 8,
+        read_block_size: int = 1024 * 1024
+    ):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._temp_dir = os.path.join(staging_root, ".tmp")
+        self._read_block_size = read_block_size
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={"max_attempts": 5, "mode": "adaptive"}
+            )
+        )
+        # Paralel parça sayısı havuzu aşarsa istekler bağlantı beklerken tıkanır
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=min(upload_concurrency, max_pool_connections),
+            use_threads=True
+        )
+
+    def key_for(self, digest: str) -> str:
+        return f"{self.prefix}blobs/{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def _split(self, location: str) -> Tuple[str, str]:
+        if not location.startswith("s3://"):
+            raise ValueError(f"Not an object storage location: {location}")
+        bucket, _, key = location[len("s3://"):].partition("/")
+        return bucket, key
+
+    def _head(self, location: str) -> Optional[dict]:
+        bucket, key = self._split(location)
+        try:
+            return self.client.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def put(self, key: str, source_path: str) -> str:
+        object_key = self.key_for(key)
+        location = f"s3://{self.bucket}/{object_key}"
+        try:
+            if self._head(location) is not None:
+                # Kendine kopyalama değişiklik zamanını yeniler; GC yeni referans alan blob'u silmez
+                self.client.copy_object(
+                    Bucket=self.bucket,
+                    Key=object_key,
+                    CopySource={"Bucket": self.bucket, "Key": object_key},
+                    MetadataDirective="REPLACE"
+                )
+            else:
+                self.client.upload_file(source_path, self.bucket, object_key, Config=self.transfer_config)
+        finally:
+            os.remove(source_path)
+        return location
+
+    def open(self, location: str) -> BinaryIO:
+        head = self._head(location)
+        if head is None:
+            raise FileNotFoundError(location)
+        bucket, key = self._split(location)
+        return _RangedReader(self.client, bucket, key, head["ContentLength"], self._read_block_size)
+
+    def exists(self, location: str) -> bool:
+        return location.startswith("s3://") and self._head(location) is not None
+
+    def delete(self, location: str) -> bool:
+        if not self.exists(location):
+            return False
+        bucket, key = self._split(location)
+        self.client.delete_object(Bucket=bucket, Key=key)
+        return True
+
+    def size(self, location: str) -> int:
+        head = self._head(location)
+        if head is None:
+            raise FileNotFoundError(location)
+        return head["ContentLength"]
+
+    def modified_at(self, location: str) -> float:
+        head = self._head(location)
+        if head is None:
+            raise FileNotFoundError(location)
+        return head["LastModified"].timestamp()
+
+    def list_blobs(self) -> Iterator[Tuple[str, str, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}blobs/"):
+            for item in page.get("Contents", []):
+                key = item["Key"]
+                yield key.rsplit("/", 1)[-1], f"s3://{self.bucket}/{key}", item["LastModified"].timestamp()
+
+    def temp_dir(self) -> str:
+        os.makedirs(self._temp_dir, exist_ok=True)
+        return self._temp_dir
@@ -0,0 +1,226 @@
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from loguru import logger
+from prometheus_client import Counter, Gauge
+
+from app.services.storage_backends import StorageBackend
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+CACHE_REQUESTS = Counter("dms_storage_cache_requests_total", "Storage cache lookups", ["result"])
+CACHE_EVICTIONS = Counter("dms_storage_cache_evictions_total", "Files evicted from the storage cache")
+CACHE_BYTES = Gauge("dms_storage_cache_bytes", "Bytes held in the storage cache")
+
+
+class CachingBackend(StorageBackend):
+    """Uzak depolama arka ucunun önünde bayt sınırlı yerel disk önbelleği.
+
+    Okumalar önbellekten yapılır; yoksa blob bir kez indirilip önbelleğe
+    yazılır (read-through). Yüklemeler uzak depoya gönderilirken yerel kopya
+    da önbelleğe alınır (write-through). Anahtar blob özetidir, bu yüzden
+    içerik değişmez ve geçersiz kılma gerekmez.
+
+    LRU sırası dosyaların değişiklik zamanıdır (her isabette güncellenir);
+    böylece aynı dizini paylaşan süreçler aynı sırayı görür. Okuyucular
+    dosyada paylaşımlı kilit tutar; tahliye yalnızca kilitsiz dosyaları siler.
+    İndirme kilit dosyaları tahliyede silinmez; silinseydi bekleyen bir
+    süreç ile yeni gelen farklı inode'ları kilitleyip aynı blob'u iki kez
+    indirebilirdi.
+    """
+
+    remote = True
+
+    def __init__(self, inner: StorageBackend, cache_dir: str, max_bytes: int, low_water_ratio: float = 0.9):
+        self.inner = inner
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.low_water_bytes = int(max_bytes * low_water_ratio)
+        self._temp_dir = os.path.join(cache_dir, ".tmp")
+        self._lock_dir = os.path.join(cache_dir, ".locks")
+        os.makedirs(self._temp_dir, exist_ok=True)
+        os.makedirs(self._lock_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._size = sum(size for _, size, _ in self._entries())
+        CACHE_BYTES.set(self._size)
+
+    def _key(self, location: str) -> str:
+        name = location.rstrip("/").rsplit("/", 1)[-1]
+        return name if _DIGEST_PATTERN.match(name) else hashlib.sha256(location.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key[2:4], key)
+
+    def _entries(self) -> Iterator[Tuple[str, int, float]]:
+        """Önbellekteki dosyalar: (yol, boyut, son kullanım zamanı)"""
+        for directory, dirnames, filenames in os.walk(self.cache_dir):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _record(self, result: str):
+        CACHE_REQUESTS.labels(result=result).inc()
+        with self._lock:
+            if result == "hit":
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def _open_cached(self, path: str) -> Optional[BinaryIO]:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        # Paylaşımlı kilit dosya kapanana kadar tahliyeyi engeller
+        fcntl.flock(f, fcntl.LOCK_SH)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return f
+
+    def _admit(self, path: str, staged_path: str):
+        """Önbellek dizinindeki geçici dosyayı yerine atomik olarak bağla.
+
+        Hedef zaten önbellekteyse (başka bir yazma/süreç önce davrandıysa)
+        geçici dosya atılır ve boyut ikinci kez sayılmaz.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(staged_path)
+        try:
+            os.link(staged_path, path)
+        except FileExistsError:
+            return
+        finally:
+            os.remove(staged_path)
+        with self._lock:
+            self._size += size
+            over_budget = self._size > self.max_bytes
+        CACHE_BYTES.set(self._size)
+        if over_budget:
+            self.evict()
+
+    def _stage(self, source: BinaryIO) -> str:
+        with tempfile.NamedTemporaryFile(dir=self._temp_dir, delete=False) as tmp:
+            shutil.copyfileobj(source, tmp, 1024 * 1024)
+        return tmp.name
+
+    def _fill(self, location: str, path: str):
+        """Blob'u uzak depodan indirip önbelleğe al; aynı blob'u eşzamanlı isteyenler bekler"""
+        lock_path = os.path.join(self._lock_dir, os.path.basename(path))
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(path):
+                    return
+                with self.inner.open(location) as source:
+                    self._admit(path, self._stage(source))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def evict(self):
+        """En eski dosyaları toplam boyut alt eşiğe inene kadar sil (kullanımdakiler atlanır)"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= self.low_water_bytes:
+                break
+            try:
+                with open(path, "rb") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    os.remove(path)
+            except (BlockingIOError, FileNotFoundError):
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._size = total
+            self._evictions += evicted
+        CACHE_EVICTIONS.inc(evicted)
+        CACHE_BYTES.set(total)
+        if evicted:
+            logger.debug(f"Evicted {evicted} files from storage cache")
+
+    def put(self, key: str, source_path: str) -> str:
+        path = self._path(self._key(key))
+        try:
+            if not os.path.exists(path) and os.path.getsize(source_path) <= self.max_bytes:
+                with open(source_path, "rb") as source:
+                    self._admit(path, self._stage(source))
+        except OSError as e:
+            logger.warning(f"Could not write {key} to storage cache: {e}")
+        return self.inner.put(key, source_path)
+
+    def open(self, location: str) -> BinaryIO:
+        path = self._path(self._key(location))
+        f = self._open_cached(path)
+        if f is not None:
+            self._record("hit")
+            return f
+        self._record("miss")
+        if self.inner.size(location) > self.max_bytes:
+            return self.inner.open(location)
+        self._fill(location, path)
+        f = self._open_cached(path)
+        # Dolum ile açma arasında tahliye edildiyse doğrudan uzak depodan oku
+        return f if f is not None else self.inner.open(location)
+
+    def exists(self, location: str) -> bool:
+        return os.path.exists(self._path(self._key(location))) or self.inner.exists(location)
+
+    def delete(self, location: str) -> bool:
+        path = self._path(self._key(location))
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            with self._lock:
+                self._size -= size
+        except FileNotFoundError:
+            pass
+        return self.inner.delete(location)
+
+    def size(self, location: str) -> int:
+        try:
+            return os.path.getsize(self._path(self._key(location)))
+        except FileNotFoundError:
+            return self.inner.size(location)
+
+    def modified_at(self, location: str) -> float:
+        # GC'nin bekleme süresi uzak kopyaya göre hesaplanır
+        return self.inner.modified_at(location)
+
+    def list_blobs(self) -> Iterator[Tuple[str, str, float]]:
+        return self.inner.list_blobs()
+
+    def temp_dir(self) -> str:
+        return self.inner.temp_dir()
+
+    def local_path(self, location: str) -> Optional[str]:
+        # Önbellekteki yol başka bir isteğin tahliyesiyle her an silinebilir;
+        # dosyalar kilidi tutan `open` üzerinden akıtılır
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "bytes": self._size,
+                "max_bytes": self.max_bytes
+            }
@@ -1,50 +1,176 @@
+import hashlib
+import io
 import os
+import re
 import shutil
-import uuid
-from pathlib import Path
-from typing import Optional, BinaryIO
+import tempfile
+from typing import NamedTuple, Optional, BinaryIO
 from cryptography.fernet import Fernet
-import boto3
 from loguru import logger
 
 from app.core.config import settings
+from app.services.compression import CompressingReader, DecompressingReader
+from app.services.encryption import DecryptingReader, HEADER_SIZE, derive_master_key, encrypt_stream, is_segmented
+from app.services.storage_backends import DiskBackend, S3Backend, StorageBackend
+from app.services.storage_cache import CachingBackend
+
+# Fernet token'ları base64 kodlu sürüm baytıyla (0x80) başlar
+_FERNET_PREFIX = b"gAAAAA"
+
+# Profil resimleri de depolama dizininde `<user_id>.jpg` olarak tutulur
+PROFILE_PICTURE_PATTERN = re.compile(r"^\d+\.jpg$")
+
+
+class StoredFile(NamedTuple):
+    location: str  # Depolama arka ucundaki konum (Document.file_path)
+    digest: str  # Düz içeriğin SHA-256 özeti (blob kimliği)
+    size: int  # Düz içerik boyutu
+    encrypted: bool
+    compressed: bool = False  # Baytlar zstd ile sıkıştırılarak yazıldı (bkz. Blob.compressed)
+
+
+class _HashingReader:
+    """Okunan baytların SHA-256 özetini ve sayısını tutan akış sarmalayıcı"""
+
+    def __init__(self, source: BinaryIO):
+        self._source = source
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._source.read(size)
+        self._hash.update(data)
+        self.size += len(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
 
 class StorageService:
     def __init__(self):
         self.storage_type = settings.STORAGE_TYPE
         self.storage_path = settings.STORAGE_PATH
+        self.backend = self._create_backend()
+        if settings.STORAGE_CACHE_MAX_BYTES > 0 and self.backend.remote:
+            # Uzak arka uçlar yerel LRU disk önbelleğinin arkasına alınır
+            self.backend = CachingBackend(self.backend, settings.STORAGE_CACHE_PATH, settings.STORAGE_CACHE_MAX_BYTES)
         
-        # Şifreleme anahtarı
+        # Şifreleme anahtarı (Fernet yalnızca eski biçimdeki dosyaları okumak için)
         if settings.ENCRYPTION_KEY:
             self.cipher = Fernet(settings.ENCRYPTION_KEY.encode())
+            self.master_key = derive_master_key(settings.ENCRYPTION_KEY)
         else:
             self.cipher = None
+            self.master_key = None
+
+    def _create_backend(self) -> StorageBackend:
+        if self.storage_type == "disk":
+            return DiskBackend(self.storage_path)
+        if self.storage_type == "s3":
+            if not settings.S3_BUCKET:
+                raise ValueError("S3_BUCKET must be set when STORAGE_TYPE is s3")
+            return S3Backend(
+                bucket=settings.S3_BUCKET,
+                staging_root=self.storage_path,
+                prefix=settings.S3_PREFIX,
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                region=settings.S3_REGION,
+                access_key_id=settings.S3_ACCESS_KEY_ID,
+                secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+                multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+                upload_concurrency=settings.S3_UPLOAD_CONCURRENCY,
+                read_block_size=settings.S3_READ_BLOCK_SIZE
+            )
+        raise ValueError(f"Unsupported storage type: {self.storage_type}")
         
-    def save_file(self, file_content: BinaryIO, filename: str, content_type: str) -> str:
-        """Dosyayı kaydet ve dosya yolunu döndür"""
+    def save_file(self, file_content: BinaryIO, filename: str, content_type: str) -> StoredFile:
+        """Dosyayı içerik adresli blob olarak kaydet.
+
+        İçerik yerel geçici dosyaya yazılırken (gerekirse şifrelenerek) SHA-256
+        özeti hesaplanır; ardından blob özet adıyla arka uca yerleştirilir.
+        Aynı içerik ikinci kez saklanmaz. Referans sayımı ve sıkıştırma
+        bayrağının kaydı çağıranın işidir (bkz. `blob_service.acquire_blob`).
+        """
         try:
-            # Benzersiz dosya adı oluştur
-            file_extension = Path(filename).suffix
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
+            compress_size = self._compressible_size(file_content, filename)
+            source = _HashingReader(file_content)
+            with tempfile.NamedTemporaryFile(dir=self.backend.temp_dir(), suffix=".part", delete=False) as tmp:
+                try:
+                    self._write_stream(source, tmp, compress_size)
+                except Exception:
+                    tmp.close()
+                    os.remove(tmp.name)
+                    raise
             
-            if self.storage_type == "disk":
-                return self._save_to_disk(file_content, unique_filename)
-            else:
-                raise ValueError(f"Unsupported storage type: {self.storage_type}")
+            digest = source.hexdigest()
+            location = self.backend.put(digest, tmp.name)
+            return StoredFile(location, digest, source.size, self._is_encrypted(location), compress_size is not None)
                 
         except Exception as e:
             logger.error(f"Error saving file {filename}: {e}")
             raise
 
-    def _save_to_disk(self, file_content: BinaryIO, filename: str) -> str:
+    def _compressible_size(self, file_content: BinaryIO, filename: str) -> Optional[int]:
+        """Dosya sıkıştırılacaksa kalan içerik boyutunu döndür (başlığa yazılır)"""
+        if not settings.COMPRESSION_ENABLED:
+            return None
+        if os.path.splitext(filename or "")[1].lower() not in settings.COMPRESSIBLE_EXTENSIONS:
+            return None
+        if not (hasattr(file_content, "seekable") and file_content.seekable()):
+            return None
+        position = file_content.tell()
+        size = file_content.seek(0, io.SEEK_END) - position
+        file_content.seek(position)
+        return size
+
+    def _write_stream(self, source: BinaryIO, destination: BinaryIO, compress_size: Optional[int] = None):
+        """Akışı hedefe kopyala; gerekirse önce sıkıştır, şifreleme açıksa segment segment şifrele"""
+        if compress_size is not None:
+            source = CompressingReader(source, compress_size, settings.COMPRESSION_LEVEL)
+        if self.master_key is None:
+            shutil.copyfileobj(source, destination)
+        else:
+            encrypt_stream(source, destination, self.master_key, settings.ENCRYPTION_SEGMENT_SIZE)
+
+    def open(self, file_path: str, compressed: bool = False) -> BinaryIO:
+        """Dosyayı düz metin olarak okunabilen, aranabilir bir akış olarak aç.
+
+        Segmentli şifreli dosyalar okundukça çözülür; eski Fernet dosyaları
+        bellekte çözülür; şifresiz dosyalar olduğu gibi açılır. `compressed`
+        (kayıttaki `is_compressed` bayrağı) verilirse blob şifre çözümünden
+        sonra okundukça açılır; sıkıştırma içerikten tahmin edilmez, çünkü
+        düz bir dosya da aynı baytlarla başlayabilir.
+        """
+        stream = self._open_decrypted(file_path)
+        if not compressed:
+            return stream
+        try:
+            return DecompressingReader(stream)
+        except Exception:
+            stream.close()
+            raise
+
+    def _open_decrypted(self, file_path: str) -> BinaryIO:
+        """Dosyayı şifresi çözülmüş (ama gerekirse hâlâ sıkıştırılmış) akış olarak aç"""
+        f = self.backend.open(file_path)
         try:
-            os.makedirs(self.storage_path, exist_ok=True)
-            file_path = os.path.join(self.storage_path, filename)
-            with open(file_path, "wb") as f:
-                shutil.copyfileobj(file_content, f)
-            return file_path
-        except Exception as e:
-            logger.error(f"Error saving file to disk: {e}")
+            header = f.read(HEADER_SIZE)
+            if is_segmented(header):
+                if self.master_key is None:
+                    raise ValueError(f"File {file_path} is encrypted but ENCRYPTION_KEY is not set")
+                return DecryptingReader(f, self.master_key)
+            if self.cipher and header.startswith(_FERNET_PREFIX):
+                f.seek(0)
+                content = self.cipher.decrypt(f.read())
+                f.close()
+                return io.BytesIO(content)
+            f.seek(0)
+            return f
+        except Exception:
+            f.close()
             raise
 
     def read_file(self, file_path: str) -> bytes:
@@ -57,16 +183,10 @@ class StorageService:
             raise
 
     def _read_from_disk(self, file_path: str) -> bytes:
-        """Diskten dosya oku"""
+        """Diskten dosya oku (gerekirse çözerek)"""
         try:
-            with open(file_path, 'rb') as f:
-                content = f.read()
-            
-            # Şifreleme varsa çöz
-            if self.cipher and self._is_encrypted(file_path):
-                content = self.cipher.decrypt(content)
-            
-            return content
+            with self.open(file_path) as f:
+                return f.read()
             
         except Exception as e:
             logger.error(f"Error reading from disk: {e}")
@@ -84,38 +204,72 @@ class StorageService:
     def _delete_from_disk(self, file_path: str) -> bool:
         """Diskten dosya sil"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
+            return self.backend.delete(file_path)
         except Exception as e:
             logger.error(f"Error deleting from disk: {e}")
             return False
 
+    def exists(self, file_path: str) -> bool:
+        """Dosya depolama arka ucunda var mı"""
+        return bool(file_path) and self.backend.exists(file_path)
+
+    def modified_at(self, file_path: str) -> float:
+        return self.backend.modified_at(file_path)
+
+    def stored_size(self, file_path: str) -> int:
+        """Dosyanın depodaki (şifreliyse şifreli) boyutu"""
+        return self.backend.size(file_path)
+
+    def local_path(self, file_path: str) -> Optional[str]:
+        """Dosya yerel diskte okunabiliyorsa yolunu döndür"""
+        return self.backend.local_path(file_path)
+
     def _encrypt_file(self, file_path: str):
-        """Dosyayı şifrele"""
+        """Şifresiz veya eski biçimde şifreli dosyayı segmentli biçime dönüştür"""
         try:
-            with open(file_path, 'rb') as f:
-                content = f.read()
-            
-            encrypted_content = self.cipher.encrypt(content)
+            if self.master_key is None:
+                raise ValueError("ENCRYPTION_KEY is not set")
+            if self.backend.remote:
+                raise ValueError(f"In-place encryption requires local storage: {file_path}")
+            if self._is_encrypted(file_path) and not self._is_legacy_encrypted(file_path):
+                return
             
-            with open(file_path, 'wb') as f:
-                f.write(encrypted_content)
+            tmp_path = f"{file_path}.tmp"
+            # Sıkıştırma katmanı korunur; yalnızca şifreleme biçimi değişir
+            with self._open_decrypted(file_path) as source, open(tmp_path, "wb") as destination:
+                encrypt_stream(source, destination, self.master_key, settings.ENCRYPTION_SEGMENT_SIZE)
+            os.replace(tmp_path, file_path)
                 
         except Exception as e:
             logger.error(f"Error encrypting file: {e}")
             raise
 
+    def _read_header(self, file_path: str) -> bytes:
+        with self.backend.open(file_path) as f:
+            return f.read(HEADER_SIZE)
+
+    def _is_legacy_encrypted(self, file_path: str) -> bool:
+        return self.cipher is not None and self._read_header(file_path).startswith(_FERNET_PREFIX)
+
     def _is_encrypted(self, file_path: str) -> bool:
-        """Dosyanın şifrelenmiş olup olmadığını kontrol et"""
-        # Bu basit bir kontrol - gerçek uygulamada daha gelişmiş bir yöntem kullanılabilir
-        return self.cipher is not None
+        """Dosyanın şifrelenmiş olup olmadığını başlığından kontrol et"""
+        return is_segmented(self._read_header(file_path)) or self._is_legacy_encrypted(file_path)
+
+    def is_encrypted(self, file_path: str) -> bool:
+        """Dosya diskte şifreli mi (okumak için `open` ile çözülmesi gerekir mi)"""
+        return self._is_encrypted(file_path)
+
+    def is_encoded(self, file_path: str, compressed: bool = False) -> bool:
+        """Depodaki baytlar düz içerikten farklı mı (şifreli ya da sıkıştırılmış)"""
+        return compressed or self._is_encrypted(file_path)
 
-    def get_file_size(self, file_path: str) -> int:
-        """Dosya boyutunu al"""
+    def get_file_size(self, file_path: str, compressed: bool = False) -> int:
+        """Dosyanın (çözülmüş) içerik boyutunu al"""
         try:
-            return os.path.getsize(file_path)
+            if not self.is_encoded(file_path, compressed):
+                return self.backend.size(file_path)
+            with self.open(file_path, compressed) as f:
+                return f.seek(0, io.SEEK_END)
                 
         except Exception as e:
             logger.error(f"Error getting file size: {e}")
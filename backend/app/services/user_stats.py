@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import run_after_commit
+from app.models.ActivityLog import ActivityLog
+from app.models.document import Document
+from app.models.user_stats import UserStats
+
+SEARCH_ACTIVITY_TYPES = ("document_search", "question_ask")
+
+
+class DashboardCache:
+    """Kullanıcı başına dashboard yanıtları için kısa ömürlü (TTL) önbellek"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[user_id]
+                return None
+            return entry[1]
+
+    def put(self, user_id: int, value: Dict[str, Any]):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), value)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+dashboard_cache = DashboardCache(settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def adjust_user_stats(db: Session, user_id: int, documents: int = 0, storage_bytes: int = 0, searches: int = 0):
+    """Kullanıcı sayaçlarını atomik olarak artır/azalt.
+
+    Değişiklik çağıranın transaction'ında yapılır; dashboard önbelleği
+    commit'ten sonra düşürülür. Sayaç satırı henüz yoksa hiçbir şey
+    yapılmaz; satır ilk okumada kaynak tablolardan hesaplanır.
+    """
+    db.query(UserStats).filter(UserStats.user_id == user_id).update(
+        {
+            UserStats.document_count: UserStats.document_count + documents,
+            UserStats.storage_bytes: UserStats.storage_bytes + storage_bytes,
+            UserStats.search_question_count: UserStats.search_question_count + searches
+        },
+        synchronize_session=False
+    )
+    run_after_commit(db, lambda: dashboard_cache.invalidate(user_id))
+
+
+def _compute_user_stats(db: Session, user_id: int) -> UserStats:
+    """Sayaçları kaynak tablolardan tek sorguda hesapla"""
+    row = db.execute(select(
+        select(func.count(Document.id)).where(Document.user_id == user_id).scalar_subquery(),
+        select(func.coalesce(func.sum(Document.file_size), 0)).where(Document.user_id == user_id).scalar_subquery(),
+        select(func.count(ActivityLog.id)).where(
+            ActivityLog.user_id == user_id,
+            ActivityLog.activity_type.in_(SEARCH_ACTIVITY_TYPES)
+        ).scalar_subquery()
+    )).one()
+    return UserStats(user_id=user_id, document_count=row[0], storage_bytes=row[1], search_question_count=row[2])
+
+
+def get_user_stats(db: Session, user_id: int) -> UserStats:
+    """Kullanıcının sayaçlarını getir; satır yoksa hesaplayıp oluştur"""
+    stats = db.get(UserStats, user_id)
+    if stats is not None:
+        return stats
+    stats = _compute_user_stats(db, user_id)
+    try:
+        with db.begin_nested():
+            db.add(stats)
+        db.commit()
+    except IntegrityError:
+        # Başka bir istek satırı aynı anda oluşturdu
+        return db.get(UserStats, user_id)
+    return stats
+
+
+def rebuild_user_stats(db: Session) -> Dict[str, int]:
+    """Tüm kullanıcıların sayaçlarını kaynak tablolardan yeniden hesapla"""
+    db.query(UserStats).delete(synchronize_session=False)
+    db.commit()
+    user_ids = {user_id for (user_id,) in db.query(Document.user_id).distinct()}
+    user_ids |= {user_id for (user_id,) in db.query(ActivityLog.user_id).distinct() if user_id is not None}
+    for user_id in user_ids:
+        db.add(_compute_user_stats(db, user_id))
+    db.commit()
+    for user_id in user_ids:
+        dashboard_cache.invalidate(user_id)
+    return {"users": len(user_ids)}
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+
+class CachedDocument:
+    """Bir dokümanın chunk vektörleri ve metinleri (bitişik float32 matris).
+
+    `version`, girdi yüklenirken doküman satırından okunan sürümdür; diğer
+    API worker'ları dokümanı yeniden işlediğinde ya da sildiğinde değişir.
+    """
+
+    def __init__(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]], version: Any = None):
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = matrix / norms
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.nbytes = self.matrix.nbytes + sum(len(text or "") for text in documents)
+
+    def search(self, query_embeddings, n_results: int) -> List[List[Dict[str, Any]]]:
+        """Sorgular için tam (brute-force) kosinüs araması yap"""
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = (queries / norms) @ self.matrix.T
+
+        k = min(n_results, len(self.ids))
+        results = []
+        for query_scores in scores:
+            top = np.argpartition(-query_scores, k - 1)[:k] if k < len(self.ids) else np.arange(len(self.ids))
+            top = top[np.argsort(-query_scores[top], kind="stable")]
+            results.append([
+                {
+                    'chunk_text': self.documents[i],
+                    'metadata': self.metadatas[i],
+                    'distance': float(1.0 - query_scores[i]),
+                    'id': self.ids[i]
+                }
+                for i in top
+            ])
+        return results
+
+
+class DocumentVectorCache:
+    """Son sorgulanan dokümanların vektörleri için bayt sınırlı LRU önbellek"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float = 0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, CachedDocument]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, document_id: int) -> Optional[CachedDocument]:
+        with self._lock:
+            entry = self._entries.get(document_id)
+            if entry is None:
+                return None
+            if self.ttl_seconds and time.monotonic() - entry.loaded_at > self.ttl_seconds:
+                self._remove(document_id)
+                return None
+            self._entries.move_to_end(document_id)
+            return entry
+
+    def put(self, document_id: int, entry: CachedDocument) -> bool:
+        """Girdiyi ekle; bütçeyi tek başına aşan dokümanlar önbelleğe alınmaz"""
+        if entry.nbytes > self.max_bytes:
+            return False
+        with self._lock:
+            self._remove(document_id)
+            self._entries[document_id] = entry
+            self._size += entry.nbytes
+            while self._size > self.max_bytes:
+                evicted_id, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.nbytes
+                logger.debug(f"Evicted document {evicted_id} from vector cache")
+        return True
+
+    def invalidate(self, document_id: int):
+        with self._lock:
+            self._remove(document_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, document_id: int):
+        entry = self._entries.pop(document_id, None)
+        if entry is not None:
+            self._size -= entry.nbytes
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"documents": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
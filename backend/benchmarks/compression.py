@@ -0,0 +1,87 @@
+"""Yüklenen dokümanlar için zstd sıkıştırma oranı ve okuma hızı ölçümü.
+
+Verilen dizindeki (ya da sentetik) dosyalar depolama biçimine çevrilir:
+sıkıştırmasız ve farklı zstd seviyeleriyle, isteğe bağlı olarak segmentli
+şifrelemeyle birlikte. Her varyant için toplam oran, sıkıştırma hızı ve
+tam okuma (çözme + açma) hızı MB/s olarak raporlanır.
+
+Kullanım:
+    python -m benchmarks.compression --path ./uploads/sample --levels 1 3 9 --encrypt
+"""
+import argparse
+import io
+import os
+import time
+
+from app.services.compression import CompressingReader, DecompressingReader
+from app.services.encryption import DecryptingReader, encrypt_stream
+
+
+def _load_files(path, extensions):
+    if not path:
+        words = [b"sozlesme", b"madde", b"taraflar", b"kira", b"bedel", b"tarih", b"imza", b"fatura"]
+        return [b" ".join(words[(i * 7 + j) % len(words)] for j in range(200_000)) for i in range(5)]
+    files = []
+    for directory, _, filenames in os.walk(path):
+        for filename in filenames:
+            if not extensions or os.path.splitext(filename)[1].lower() in extensions:
+                with open(os.path.join(directory, filename), "rb") as f:
+                    files.append(f.read())
+    return files
+
+
+def _store(content, level, key):
+    source = io.BytesIO(content)
+    if level is not None:
+        source = CompressingReader(source, len(content), level)
+    destination = io.BytesIO()
+    if key is None:
+        destination.write(source.read())
+    else:
+        encrypt_stream(source, destination, key)
+    return destination.getvalue()
+
+
+def _read(stored, level, key):
+    stream = io.BytesIO(stored)
+    if key is not None:
+        stream = DecryptingReader(stream, key)
+    if level is not None:
+        stream = DecompressingReader(stream)
+    while stream.read(1024 * 1024):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=None, help="Doküman dizini (boşsa sentetik metin)")
+    parser.add_argument("--extensions", nargs="*", default=[".txt", ".md", ".docx", ".pdf"])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 3, 9])
+    parser.add_argument("--encrypt", action="store_true")
+    args = parser.parse_args()
+
+    files = _load_files(args.path, args.extensions)
+    total = sum(len(content) for content in files)
+    key = os.urandom(32) if args.encrypt else None
+    print(f"{len(files)} files, {total / 1e6:.1f} MB, encrypt={args.encrypt}")
+
+    for level in [None] + args.levels:
+        start = time.perf_counter()
+        stored = [_store(content, level, key) for content in files]
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for blob in stored:
+            _read(blob, level, key)
+        read_seconds = time.perf_counter() - start
+
+        stored_bytes = sum(len(blob) for blob in stored)
+        label = "none" if level is None else f"zstd-{level}"
+        print(
+            f"{label:>8}: ratio={total / stored_bytes:5.2f}  "
+            f"write={total / 1e6 / write_seconds:8.1f} MB/s  read={total / 1e6 / read_seconds:8.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""İki aşamalı (özet → chunk) arama ile düz chunk aramasının karşılaştırması.
+
+Sentetik korpusta her dokümanın chunk'ları kendi konu merkezinin etrafında
+üretilir; doküman özet vektörü chunk'larının ortalamasıdır. Her sorgu için
+düz arama (tüm chunk'lar) ve iki aşamalı arama (önce en iyi M doküman, sonra
+yalnızca onların chunk'ları) çalıştırılır. Gecikmeler p50/p95, isabet ise
+düz aramanın top-k sonucuna göre recall@k olarak raporlanır.
+
+Kullanım:
+    python -m benchmarks.two_stage_retrieval --documents 2000 --chunks-per-document 50 --top-documents 5 10 20
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.vector_store import LocalVectorStore
+
+
+def _corpus(documents: int, chunks_per_document: int, dim: int, spread: float, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((documents, dim)).astype(np.float32)
+    chunk_embeddings = np.repeat(centroids, chunks_per_document, axis=0)
+    chunk_embeddings += spread * rng.standard_normal(chunk_embeddings.shape).astype(np.float32)
+    summaries = chunk_embeddings.reshape(documents, chunks_per_document, dim).mean(axis=1)
+    return chunk_embeddings, summaries
+
+
+def _load(store, ids, embeddings, metadatas, batch_size: int = 2000):
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        store.upsert(ids=ids[start:end], embeddings=embeddings[start:end].tolist(), metadatas=metadatas[start:end])
+
+
+def _percentiles(values):
+    values_ms = np.array(values) * 1000
+    return np.percentile(values_ms, 50), np.percentile(values_ms, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--chunks-per-document", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--spread", type=float, default=1.0, help="Chunk'ların konu merkezinden sapması")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-results", type=int, default=5)
+    parser.add_argument("--top-documents", type=int, nargs="+", default=[5, 10, 20])
+    args = parser.parse_args()
+
+    chunk_embeddings, summaries = _corpus(args.documents, args.chunks_per_document, args.dim, args.spread)
+    chunk_ids = [f"chunk_{i}" for i in range(len(chunk_embeddings))]
+    chunk_metadatas = [{"document_id": str(i // args.chunks_per_document)} for i in range(len(chunk_embeddings))]
+    summary_ids = [f"summary_{i}" for i in range(args.documents)]
+    summary_metadatas = [{"document_id": str(i)} for i in range(args.documents)]
+
+    rng = np.random.default_rng(7)
+    picks = rng.integers(0, len(chunk_embeddings), args.queries)
+    queries = chunk_embeddings[picks] + args.spread * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        chunks = LocalVectorStore(tmp_dir, "chunks", metadata={"hnsw:space": "cosine"})
+        documents = LocalVectorStore(tmp_dir, "summaries", metadata={"hnsw:space": "cosine"})
+        _load(chunks, chunk_ids, chunk_embeddings, chunk_metadatas)
+        _load(documents, summary_ids, summaries, summary_metadatas)
+
+        flat_timings, flat_results = [], []
+        for query in queries:
+            start = time.perf_counter()
+            result = chunks.query(query_embeddings=[query.tolist()], n_results=args.n_results, include=[])
+            flat_timings.append(time.perf_counter() - start)
+            flat_results.append(set(result["ids"][0]))
+
+        p50, p95 = _percentiles(flat_timings)
+        print(f"{'flat':<14} p50={p50:8.2f} ms  p95={p95:8.2f} ms  recall@{args.n_results}=1.000")
+
+        for top_documents in args.top_documents:
+            timings, recalls = [], []
+            for query, expected in zip(queries, flat_results):
+                start = time.perf_counter()
+                selected = documents.query(query_embeddings=[query.tolist()], n_results=top_documents, include=["metadatas"])
+                document_ids = [metadata["document_id"] for metadata in selected["metadatas"][0]]
+                result = chunks.query(
+                    query_embeddings=[query.tolist()],
+                    n_results=args.n_results,
+                    where={"document_id": {"$in": document_ids}},
+                    include=[]
+                )
+                timings.append(time.perf_counter() - start)
+                recalls.append(len(expected & set(result["ids"][0])) / len(expected))
+
+            p50, p95 = _percentiles(timings)
+            print(f"{f'two-stage M={top_documents}':<14} p50={p50:8.2f} ms  p95={p95:8.2f} ms  recall@{args.n_results}={np.mean(recalls):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Vektör deposu sorgu gecikmesi karşılaştırması.
+
+Aynı sentetik korpusu süreç içi `LocalVectorStore` ve (erişilebilirse)
+Chroma HTTP sunucusuna yükler, ardından filtreli ve filtresiz sorguların
+p50/p95 gecikmelerini ölçer.
+
+Kullanım:
+    python -m benchmarks.vector_store_latency --chunks 20000 --documents 200
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.vector_store import ChromaVectorStore, LocalVectorStore
+
+
+def _corpus(chunks: int, documents: int, dim: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((chunks, dim)).astype(np.float32)
+    ids = [f"bench_chunk_{i}" for i in range(chunks)]
+    metadatas = [{"document_id": str(i % documents), "chunk_index": i // documents} for i in range(chunks)]
+    return ids, embeddings, metadatas
+
+
+def _load(store, ids, embeddings, metadatas, batch_size: int = 1000):
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        store.upsert(ids=ids[start:end], embeddings=embeddings[start:end].tolist(), metadatas=metadatas[start:end])
+
+
+def _measure(store, queries: np.ndarray, documents: int, n_results: int):
+    timings = {"unfiltered": [], "document_filter": []}
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        store.query(query_embeddings=[query.tolist()], n_results=n_results)
+        timings["unfiltered"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        store.query(query_embeddings=[query.tolist()], n_results=n_results, where={"document_id": str(i % documents)})
+        timings["document_filter"].append(time.perf_counter() - start)
+    return timings
+
+
+def _report(backend: str, timings):
+    for mode, values in timings.items():
+        values_ms = np.array(values) * 1000
+        print(f"{backend:<8} {mode:<16} p50={np.percentile(values_ms, 50):8.2f} ms  p95={np.percentile(values_ms, 95):8.2f} ms")
+
+
+def _chroma_store(name: str):
+    try:
+        import chromadb
+        from chromadb.config import Settings
+        from app.core.config import settings
+
+        client = chromadb.HttpClient(
+            host=settings.CHROMA_HOST,
+            port=settings.CHROMA_PORT,
+            settings=Settings(anonymized_telemetry=False)
+        )
+        client.heartbeat()
+        try:
+            client.delete_collection(name)
+        except Exception:
+            pass
+        return client, ChromaVectorStore(client.create_collection(name, metadata={"hnsw:space": "cosine"}))
+    except Exception as e:
+        print(f"Chroma not reachable, skipping: {e}")
+        return None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-results", type=int, default=5)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    ids, embeddings, metadatas = _corpus(args.chunks, args.documents, args.dim)
+    queries = np.random.default_rng(7).standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        local = LocalVectorStore(tmp_dir, "benchmark", metadata={"hnsw:space": "cosine"})
+        _load(local, ids, embeddings, metadatas)
+        _report("local", _measure(local, queries, args.documents, args.n_results))
+
+    if not args.skip_chroma:
+        client, chroma = _chroma_store("benchmark_vector_store")
+        if chroma is not None:
+            try:
+                _load(chroma, ids, embeddings, metadatas)
+                _report("chroma", _measure(chroma, queries, args.documents, args.n_results))
+            finally:
+                client.delete_collection("benchmark_vector_store")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
+import os
+import tempfile
 import pytest
 import pytest_asyncio
+
+# Testler Chroma sunucusu gerektirmesin diye süreç içi vektör deposunu kullan
+os.environ.setdefault("VECTOR_STORE_BACKEND", "local")
+os.environ.setdefault("VECTOR_STORE_PATH", tempfile.mkdtemp(prefix="dms-vectors-"))
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool 
@@ -75,6 +82,7 @@ def mock_ai_service():
     mock_service.chunk_text.return_value = ["chunk1", "chunk2"]
     mock_service.create_embeddings.return_value = [[0.1, 0.2], [0.3, 0.4]]
     mock_service.store_document_chunks.return_value = None
+    mock_service.embed_and_store_chunks.return_value = (2, 16)
     mock_service.generate_summary.return_value = "Bu dokümanın kısa bir özetidir."
     mock_service.extract_keywords.return_value = ["test", "doküman", "anahtar"]
     return mock_service
@@ -0,0 +1,85 @@
+from app.models.blob import Blob
+from app.services.blob_service import acquire_blob, release_blob
+from app.services.storage_backends import DiskBackend
+from app.services.storage_service import StoredFile
+
+
+def test_disk_backend_deduplicates_identical_content(tmp_path):
+    """Aynı anahtarla ikinci yazmanın mevcut blob'u kullandığını test eder."""
+    backend = DiskBackend(str(tmp_path))
+    digest = "ab" * 32
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    first.write_bytes(b"icerik")
+    second.write_bytes(b"icerik")
+
+    location = backend.put(digest, str(first))
+    assert backend.put(digest, str(second)) == location
+    assert location.endswith(f"ab/ab/{digest}")
+    assert not second.exists()
+    assert [key for key, _, _ in backend.list_blobs()] == [digest]
+
+
+def test_blob_reference_counting(db_session):
+    """Blob referans sayısının yükleme ve silmeyle güncellendiğini test eder."""
+    stored = StoredFile(location="/tmp/blob", digest="cd" * 32, size=6, encrypted=False)
+
+    acquire_blob(db_session, stored)
+    acquire_blob(db_session, stored)
+    db_session.commit()
+    assert db_session.get(Blob, stored.digest).ref_count == 2
+
+    release_blob(db_session, stored.digest)
+    release_blob(db_session, stored.digest)
+    release_blob(db_session, stored.digest)
+    db_session.commit()
+    db_session.expire_all()
+    assert db_session.get(Blob, stored.digest).ref_count == 0
+
+
+def test_reclaim_blobs_rechecks_references(tmp_path, monkeypatch):
+    """GC'nin, toplandıktan sonra yeniden referans alan blob'a dokunmadığını test eder."""
+    import os
+    import time
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.core.config import settings
+    from app.core.database import Base
+    from app.services import maintenance
+    from app.services.storage_service import storage_service
+
+    # GC her blob için commit/rollback yapar; dış transaction'a bağlı test
+    # oturumu bu rollback'te kurulumu da geri alacağından kendi bağlantısı olan
+    # bir veritabanı kullanılır
+    engine = create_engine(f"sqlite:///{tmp_path / 'gc.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    backend = DiskBackend(str(tmp_path / "blobs"))
+    monkeypatch.setattr(storage_service, "backend", backend)
+    monkeypatch.setattr(settings, "GC_GRACE_SECONDS", 60)
+    blobs = []
+    try:
+        for digest in ("ef" * 32, "12" * 32):
+            source = tmp_path / digest
+            source.write_bytes(b"icerik")
+            location = backend.put(digest, str(source))
+            os.utime(location, (time.time() - 3600, time.time() - 3600))
+            blobs.append(Blob(digest=digest, location=location, size=6, ref_count=0))
+        db.add_all(blobs)
+        db.commit()
+
+        # İkinci blob, GC adayları toplandıktan sonra yeniden referans alır
+        acquire_blob(db, StoredFile(location=blobs[1].location, digest=blobs[1].digest, size=6, encrypted=False))
+        db.commit()
+
+        assert maintenance._reclaim_blobs(db, blobs) == 6
+        db.expire_all()
+        assert db.get(Blob, "ef" * 32) is None
+        assert db.get(Blob, "12" * 32).ref_count == 1
+        assert [key for key, _, _ in backend.list_blobs()] == ["12" * 32]
+    finally:
+        db.close()
+        engine.dispose()
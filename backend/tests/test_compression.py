@@ -0,0 +1,80 @@
+import io
+import os
+
+from app.services.compression import CompressingReader, DecompressingReader, compress_text, decompress_text
+from app.services.encryption import DecryptingReader, encrypt_stream
+
+
+def test_compressed_encrypted_blob_roundtrip_with_seek():
+    """Sıkıştırılıp şifrelenen içeriğin aranarak doğru okunduğunu test eder."""
+    content = b"".join(f"satir {i}: sozlesme maddesi\n".encode() for i in range(5000))
+    key = os.urandom(32)
+    stored = io.BytesIO()
+    encrypt_stream(CompressingReader(io.BytesIO(content), len(content)), stored, key, segment_size=4096)
+    assert len(stored.getvalue()) < len(content) // 3
+
+    reader = DecompressingReader(DecryptingReader(io.BytesIO(stored.getvalue()), key))
+    assert reader.seek(0, io.SEEK_END) == len(content)
+    reader.seek(70000)
+    assert reader.read(100) == content[70000:70100]
+    reader.seek(10)
+    assert reader.read(20) == content[10:30]
+    reader.seek(0)
+    assert reader.read() == content
+
+
+def test_compressed_text_roundtrip():
+    """Metin sıkıştırmanın geri açıldığını test eder."""
+    text = "Bu doküman bir kira sözleşmesidir. " * 500
+    packed = compress_text(text)
+    assert len(packed) < len(text)
+    assert decompress_text(packed) == text
+
+
+def test_content_encoding_is_recorded_not_sniffed(db_session, test_user, monkeypatch):
+    """Metin kodlamasının ayrı sütunla belirlendiğini; önekli düz metnin bozulmadığını test eder."""
+    from app.core.config import settings
+    from app.models.document import Document
+    from app.models.document_content import DocumentContent
+    from app.services.content_store import load_document_texts
+
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_MIN_CHARS", 100)
+    short = "zstd:AAAA gibi başlayan kısa metin"
+    long = "uzun metin " * 100
+    docs = [
+        Document(title=str(i), filename="a.txt", file_path="/path/a.txt", user_id=test_user.id,
+                 file_size=1, file_type=".txt", content=text)
+        for i, text in enumerate([short, long])
+    ]
+    db_session.add_all(docs)
+    db_session.commit()
+    db_session.expire_all()
+
+    rows = {row.document_id: row for row in db_session.query(DocumentContent).all()}
+    assert rows[docs[0].id].plain_text == short and rows[docs[0].id].compressed_text is None
+    assert rows[docs[1].id].plain_text is None and rows[docs[1].id].compressed_text
+    assert load_document_texts(db_session, [d.id for d in docs]) == {docs[0].id: short, docs[1].id: long}
+
+
+def test_blob_compression_flag_drives_decoding(tmp_path, monkeypatch):
+    """Sıkıştırma başlığıyla başlayan düz bir yüklemenin olduğu gibi okunduğunu test eder."""
+    from app.services.compression import MAGIC
+    from app.services.storage_backends import DiskBackend
+    from app.services.storage_service import storage_service
+
+    monkeypatch.setattr(storage_service, "backend", DiskBackend(str(tmp_path / "blobs")))
+    monkeypatch.setattr(storage_service, "master_key", None)
+    monkeypatch.setattr(storage_service, "cipher", None)
+
+    spoofed = MAGIC + b"\x01\x01" + b"\xff" * 8 + b"kullanici verisi"
+    stored = storage_service.save_file(io.BytesIO(spoofed), "veri.bin", "application/octet-stream")
+    assert not stored.compressed
+    with storage_service.open(stored.location, stored.compressed) as f:
+        assert f.read() == spoofed
+
+    text = b"satir\n" * 2000
+    stored = storage_service.save_file(io.BytesIO(text), "notlar.txt", "text/plain")
+    assert stored.compressed
+    assert storage_service.get_file_size(stored.location, stored.compressed) == len(text)
+    with storage_service.open(stored.location, stored.compressed) as f:
+        assert f.read() == text
@@ -0,0 +1,32 @@
+from app.models.document import Document
+from app.models.document_content import DocumentContent
+from app.services.ai_service import AIService
+from app.services.content_store import load_document_texts, migrate_legacy_content
+
+
+def test_document_text_is_stored_in_side_table(db_session, test_user):
+    """Çıkarılan metnin ayrı tabloya yazıldığını ve eski sütundan taşındığını test eder."""
+    new_doc = Document(title="Yeni", filename="a.txt", file_path="/path/a.txt", user_id=test_user.id,
+                       file_size=1, file_type=".txt", content="yeni metin")
+    old_doc = Document(title="Eski", filename="b.txt", file_path="/path/b.txt", user_id=test_user.id,
+                       file_size=1, file_type=".txt", legacy_content="eski metin")
+    db_session.add_all([new_doc, old_doc])
+    db_session.commit()
+
+    assert db_session.get(DocumentContent, new_doc.id).text == "yeni metin"
+    assert load_document_texts(db_session, [new_doc.id, old_doc.id]) == {new_doc.id: "yeni metin", old_doc.id: "eski metin"}
+
+    assert migrate_legacy_content(db_session)["migrated"] == 1
+    db_session.expire_all()
+    assert db_session.get(DocumentContent, old_doc.id).text == "eski metin"
+    assert db_session.get(Document, old_doc.id).legacy_content is None
+
+
+def test_chunk_offsets_address_chunks_in_text():
+    """Chunk karakter aralıklarının örtüşen chunk'larda da doğru bulunduğunu test eder."""
+    text = "alpha beta gamma beta gamma delta"
+    chunks = ["alpha beta gamma", "beta gamma delta", "yok"]
+    offsets = AIService.chunk_offsets(None, text, chunks)
+    assert [text[start:end] for start, end in offsets[:2]] == chunks[:2]
+    assert offsets[1][0] == 17
+    assert offsets[2] is None
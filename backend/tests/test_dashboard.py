@@ -4,6 +4,15 @@ from app.models.document import Document
 from app.models.ActivityLog import ActivityLog
 from datetime import datetime, timedelta
 
+
+@pytest.fixture(autouse=True)
+def clear_dashboard_cache():
+    """Modül düzeyindeki dashboard önbelleğini testler arasında temizler."""
+    from app.services.user_stats import dashboard_cache
+    dashboard_cache._entries.clear()
+    yield
+    dashboard_cache._entries.clear()
+
 def test_dashboard_stats_no_data(client, test_user_token):
     """Veri olmadığında dashboard istatistiklerini test eder."""
     response = client.get(
@@ -17,4 +26,26 @@ def test_dashboard_stats_no_data(client, test_user_token):
     assert data["recentDocuments"] == 0
     assert data["storageUsed"] == 0
     assert data["searchAndQuestionCount"] == 0
-    assert len(data["recentActivities"]) == 0
\ No newline at end of file
+    assert len(data["recentActivities"]) == 0
+
+def test_dashboard_stats_uses_user_counters(client, test_user, test_user_token, db_session):
+    """Sayaçların ilk okumada hesaplandığını ve sonra artımlı güncellendiğini test eder."""
+    from app.services.user_stats import adjust_user_stats
+
+    db_session.add_all([
+        Document(title="Doc", filename="d.txt", file_path="/path/d.txt", user_id=test_user.id, file_size=100, file_type=".txt"),
+        ActivityLog(user_id=test_user.id, activity_type="document_search", description="'kira' için arama yapıldı.")
+    ])
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    data = client.get("/api/v1/dashboard/stats", headers=headers).json()
+    assert (data["totalDocuments"], data["storageUsed"], data["searchAndQuestionCount"]) == (1, 100, 1)
+    assert len(data["recentActivities"]) == 1
+
+    adjust_user_stats(db_session, test_user.id, documents=1, storage_bytes=50, searches=2)
+    # Önbellek commit'e kadar eski değeri tutar
+    assert client.get("/api/v1/dashboard/stats", headers=headers).json()["totalDocuments"] == 1
+    db_session.commit()
+    data = client.get("/api/v1/dashboard/stats", headers=headers).json()
+    assert (data["totalDocuments"], data["storageUsed"], data["searchAndQuestionCount"]) == (2, 150, 3)
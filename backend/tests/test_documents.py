@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime, timedelta
 from fastapi import status
 from app.models.document import Document
 from app.services.ai_service import AIService
@@ -120,4 +121,95 @@ def test_reprocess_document_success(client, test_user, test_user_token, db_sessi
         headers={"Authorization": f"Bearer {test_user_token}"}
     )
     assert response.status_code == status.HTTP_200_OK
-    assert f"Document {doc.id} queued for reprocessing" in response.json()["message"]
\ No newline at end of file
+    assert f"Document {doc.id} queued for reprocessing" in response.json()["message"]
+
+def test_delete_document_cleans_vectors_and_file(client, test_user, test_user_token, db_session, monkeypatch):
+    """Doküman silindiğinde vektör ve dosya temizliğinin kuyruğa alındığını test eder."""
+    import app.api.v1.endpoints.documents as document_endpoints
+
+    doc = Document(title="Cleanup Doc", filename="cleanup.txt", file_path="/path/cleanup.txt", user_id=test_user.id, file_size=1024, file_type=".txt")
+    db_session.add(doc)
+    db_session.commit()
+    db_session.refresh(doc)
+
+    cleanup_calls = []
+    monkeypatch.setattr(document_endpoints, "cleanup_document_artifacts", lambda *args: cleanup_calls.append(args))
+
+    response = client.delete(
+        f"/api/v1/documents/delete/{doc.id}",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert cleanup_calls == [(doc.id, "/path/cleanup.txt", test_user.id)]
+
+
+def test_download_document_content_supports_ranges(client, test_user, test_user_token, db_session, tmp_path, monkeypatch):
+    """İçerik indirme uç noktasının şifresiz ve şifreli dosyalarda Range isteklerini karşıladığını test eder."""
+    import io
+    import os
+    from app.services.encryption import encrypt_stream
+    from app.services.storage_service import storage_service
+
+    data = bytes(range(256)) * 1000
+    plain_path = tmp_path / "plain.pdf"
+    plain_path.write_bytes(data)
+
+    key = os.urandom(32)
+    monkeypatch.setattr(storage_service, "master_key", key)
+    encrypted_path = tmp_path / "encrypted.pdf"
+    with open(encrypted_path, "wb") as f:
+        encrypt_stream(io.BytesIO(data), f, key, segment_size=4096)
+
+    for path in (plain_path, encrypted_path):
+        doc = Document(title="PDF", filename="rapor.pdf", file_path=str(path), user_id=test_user.id, file_size=len(data), file_type=".pdf")
+        db_session.add(doc)
+        db_session.commit()
+
+        response = client.get(
+            f"/api/v1/documents/{doc.id}/content",
+            headers={"Authorization": f"Bearer {test_user_token}", "Range": "bytes=5000-9999"}
+        )
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == data[5000:10000]
+        assert response.headers["content-range"] == f"bytes 5000-9999/{len(data)}"
+        assert response.headers["etag"]
+
+        # Eşleşmeyen If-Range tüm dosyayı döndürür
+        response = client.get(
+            f"/api/v1/documents/{doc.id}/content",
+            headers={"Authorization": f"Bearer {test_user_token}", "Range": "bytes=0-9", "If-Range": '"stale"'}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == data
+
+def test_get_documents_keyset_pagination_and_fields(client, test_user, test_user_token, db_session):
+    """Listenin içeriği döndürmediğini, imleçle sayfalandığını ve alan seçimini test eder."""
+    created_at = datetime(2024, 1, 1, 10, 0, 0)
+    docs = [
+        Document(title=f"Doc {i}", filename=f"doc{i}.txt", file_path=f"/path/doc{i}.txt", user_id=test_user.id,
+                 file_size=1, file_type=".txt", content="uzun metin", created_at=created_at + timedelta(minutes=i // 2))
+        for i in range(5)
+    ]
+    db_session.add_all(docs)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    titles, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/documents/", params=params, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert all("content" not in d for d in response.json())
+        titles += [d["title"] for d in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor:
+            # Tarayıcıdaki istemci imleci ancak başlık açıkça izinliyse okuyabilir
+            cross_origin = client.get("/api/v1/documents/", params=params, headers={**headers, "Origin": "http://localhost:3000"})
+            assert "x-next-cursor" in cross_origin.headers["access-control-expose-headers"].lower()
+        if not cursor:
+            break
+    assert titles == [f"Doc {i}" for i in range(5)]
+
+    response = client.get("/api/v1/documents/", params={"fields": "id,title"}, headers=headers)
+    assert response.json()[0] == {"id": docs[0].id, "title": "Doc 0"}
+    assert client.get("/api/v1/documents/", params={"fields": "content"}, headers=headers).status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import embedding_service
+from app.services.embedding_service import EmbeddingServer, RemoteEmbeddingFunction
+
+
+class FakeModel:
+    def __init__(self, model_name):
+        self.calls = []
+
+    def __call__(self, texts):
+        if "boom" in texts:
+            raise ValueError("model failure")
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class FakeConnection:
+    def __init__(self, send_error=None, answers=True, reply=("ok", [[1.0]])):
+        self.send_error = send_error
+        self.answers = answers
+        self.reply = reply
+        self.sent = []
+        self.closed = False
+
+    def send(self, texts):
+        self.sent.append(texts)
+        if self.send_error is not None:
+            raise self.send_error
+
+    def poll(self, timeout):
+        return self.answers
+
+    def recv(self):
+        return self.reply
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def embedding_server(tmp_path, monkeypatch):
+    """Süreç havuzu yerine thread havuzu ve sahte modelle çalışan servis."""
+    monkeypatch.setattr(embedding_service, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(embedding_service, "SentenceTransformerEmbeddingFunction", FakeModel)
+    server = EmbeddingServer(socket_path=str(tmp_path / "emb.sock"), workers=1, max_batch=8, model_name="fake")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    deadline = time.monotonic() + 5
+    while not os.path.exists(server.socket_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield server
+    server.close()
+
+
+def test_embedding_server_round_trip(embedding_server):
+    """İsteklerin servise gidip sırasıyla yanıtlandığını ve hataların iletildiğini test eder."""
+    embed = RemoteEmbeddingFunction(socket_path=embedding_server.socket_path, timeout=5)
+    results = {}
+
+    def call(name, texts):
+        results[name] = embed(texts)
+
+    threads = [threading.Thread(target=call, args=(i, ["a" * i, "b" * (i + 1)])) for i in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i in range(1, 5):
+        assert results[i] == [[float(i)], [float(i + 1)]]
+    with pytest.raises(RuntimeError, match="model failure"):
+        embed(["boom"])
+    # Hatadan sonra bağlantı havuza döner ve kullanılmaya devam eder
+    assert embed(["abc"]) == [[3.0]]
+
+
+def test_embedding_server_splits_batch_results():
+    """Birleştirilmiş batch sonucunun istekler arasında doğru bölündüğünü test eder."""
+    server = EmbeddingServer(socket_path="/tmp/unused.sock", workers=1, max_batch=8, model_name="fake")
+    batch = [embedding_service._PendingRequest(["a", "bb"]), embedding_service._PendingRequest(["ccc"])]
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(lambda: [[1.0], [2.0], [3.0]])
+        future.result()
+    server._slots.acquire()
+    server._complete(batch, future)
+
+    assert batch[0].result == [[1.0], [2.0]]
+    assert batch[1].result == [[3.0]]
+    assert all(pending.done.is_set() for pending in batch)
+
+
+def test_remote_embedding_retries_broken_connection_once(monkeypatch):
+    """Kopan bağlantıda isteğin bir kez yeni bağlantıyla tekrarlandığını test eder."""
+    broken, healthy = FakeConnection(send_error=BrokenPipeError()), FakeConnection()
+    connections = [broken, healthy]
+    embed = RemoteEmbeddingFunction(socket_path="/tmp/unused.sock", timeout=1)
+    monkeypatch.setattr(embed, "_acquire", lambda: connections.pop(0))
+
+    assert embed(["metin"]) == [[1.0]]
+    assert broken.closed and not healthy.closed
+    assert embed._connections.get_nowait() is healthy
+
+
+def test_remote_embedding_does_not_resend_on_timeout(monkeypatch):
+    """Zaman aşımında batch'in yeniden gönderilmediğini test eder."""
+    slow = FakeConnection(answers=False)
+    connections = [slow, FakeConnection()]
+    embed = RemoteEmbeddingFunction(socket_path="/tmp/unused.sock", timeout=0.01)
+    monkeypatch.setattr(embed, "_acquire", lambda: connections.pop(0))
+
+    with pytest.raises(TimeoutError):
+        embed(["metin"])
+    assert slow.sent == [["metin"]] and slow.closed
+    assert len(connections) == 1
+
+
+def test_embedding_server_recovers_from_broken_pool(monkeypatch):
+    """Ölen worker havuzunda batch'in hata aldığını, iznin bırakıldığını ve havuzun yenilendiğini test eder."""
+    from concurrent.futures.process import BrokenProcessPool
+
+    class BrokenPool:
+        def __init__(self):
+            self.shut_down = False
+
+        def submit(self, fn, *args):
+            raise BrokenProcessPool("worker killed")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    monkeypatch.setattr(embedding_service, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(embedding_service, "SentenceTransformerEmbeddingFunction", FakeModel)
+    server = EmbeddingServer(socket_path="/tmp/unused.sock", workers=1, max_batch=8, model_name="fake")
+    broken = BrokenPool()
+    server._pool = broken
+    threading.Thread(target=server._batch_loop, daemon=True).start()
+
+    failed = embedding_service._PendingRequest(["a"])
+    server._requests.put(failed)
+    assert failed.done.wait(5)
+    assert "worker killed" in failed.error
+    assert broken.shut_down and server._pool is not broken
+
+    # Tek izin geri verildiği için sonraki istekler yeni havuzda işlenir
+    pending = embedding_service._PendingRequest(["abc"])
+    server._requests.put(pending)
+    assert pending.done.wait(5)
+    assert pending.error is None and pending.result == [[3.0]]
+    server._pool.shutdown()
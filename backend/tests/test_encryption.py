@@ -0,0 +1,42 @@
+import io
+import os
+
+import pytest
+
+from app.services.encryption import DecryptingReader, DecryptionError, encrypt_stream
+
+KEY = os.urandom(32)
+
+
+def _encrypt(data: bytes, segment_size: int) -> bytes:
+    out = io.BytesIO()
+    encrypt_stream(io.BytesIO(data), out, KEY, segment_size)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("size", [0, 1, 64, 100, 128, 1000])
+def test_segmented_roundtrip_and_random_access(size):
+    """Segmentli şifrelemenin tam okuma ve rastgele aralık okumasında aynı veriyi verdiğini test eder."""
+    data = os.urandom(size)
+    reader = DecryptingReader(io.BytesIO(_encrypt(data, segment_size=64)), KEY)
+    assert reader.size == size
+    assert reader.read() == data
+
+    for start, length in [(0, 10), (60, 10), (size // 2, 100), (size, 5)]:
+        reader.seek(start)
+        assert reader.read(length) == data[start:start + length]
+
+
+def test_segmented_detects_tampering_and_truncation():
+    """Değiştirilmiş veya kesilmiş şifreli dosyaların reddedildiğini test eder."""
+    encrypted = bytearray(_encrypt(os.urandom(200), segment_size=64))
+
+    tampered = bytearray(encrypted)
+    tampered[-1] ^= 1
+    with pytest.raises(DecryptionError):
+        DecryptingReader(io.BytesIO(bytes(tampered)), KEY).read()
+
+    # Tam segment sınırında kesilen dosyada son segment bayrağı tutmaz
+    truncated = bytes(encrypted[:len(encrypted) - (200 - 3 * 64 + 16)])
+    with pytest.raises(DecryptionError):
+        DecryptingReader(io.BytesIO(truncated), KEY).read()
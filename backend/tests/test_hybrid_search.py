@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.lexical_index import BM25Index
+from app.services.vector_cache import DocumentVectorCache
+
+
+def _hit(chunk_id, score, document_id=1):
+    return {"id": chunk_id, "document_id": document_id, "score": score}
+
+
+def _stored(ids):
+    return {
+        "ids": ids,
+        "documents": [f"metin {chunk_id}" for chunk_id in ids],
+        "metadatas": [{"document_id": chunk_id.split("_")[1]} for chunk_id in ids],
+    }
+
+
+def _service(tmp_path):
+    service = AIService.__new__(AIService)
+    service.lexical_index = BM25Index(str(tmp_path / "bm25.idx"))
+    service.vector_cache = DocumentVectorCache(max_bytes=0)
+    service.embedding_function = MagicMock(side_effect=AssertionError("embedding should be skipped"))
+    collection = MagicMock()
+    collection.get.side_effect = lambda ids, include: _stored(ids)
+    service.get_collection = MagicMock(return_value=collection)
+    return service
+
+
+def test_is_decisive_requires_score_and_margin(monkeypatch):
+    """Belirleyicilik için hem minimum skor hem de ikinciye oranın gerektiğini test eder."""
+    monkeypatch.setattr(settings, "LEXICAL_MIN_DECISIVE_SCORE", 5.0)
+    monkeypatch.setattr(settings, "LEXICAL_DECISIVE_RATIO", 2.0)
+    service = AIService.__new__(AIService)
+
+    assert not service._is_decisive([])
+    assert not service._is_decisive([_hit("a", 4.0)])
+    assert service._is_decisive([_hit("a", 6.0)])
+    assert service._is_decisive([_hit("a", 10.0), _hit("b", 5.0)])
+    assert not service._is_decisive([_hit("a", 10.0), _hit("b", 6.0)])
+
+
+def test_fuse_results_ranks_by_reciprocal_rank(tmp_path, monkeypatch):
+    """RRF birleştirmesinin iki listede de geçen chunk'ı öne aldığını test eder."""
+    monkeypatch.setattr(settings, "RRF_K", 60)
+    service = _service(tmp_path)
+    vector_results = [
+        {"id": "doc_1_chunk_0", "chunk_text": "a", "metadata": {"document_id": "1"}, "distance": 0.1},
+        {"id": "doc_1_chunk_1", "chunk_text": "b", "metadata": {"document_id": "1"}, "distance": 0.2},
+    ]
+    lexical_hits = [_hit("doc_2_chunk_0", 9.0, 2), _hit("doc_1_chunk_1", 3.0)]
+
+    fused = service._fuse_results(vector_results, lexical_hits, 3, user_id=None)
+
+    assert [item["id"] for item in fused] == ["doc_1_chunk_1", "doc_1_chunk_0", "doc_2_chunk_0"]
+    assert fused[0]["score"] == 1 / 62 + 1 / 62
+    # Yalnızca BM25'ten gelen chunk depodan getirilir
+    service.get_collection.return_value.get.assert_called_once()
+    assert fused[2]["chunk_text"] == "metin doc_2_chunk_0"
+
+
+def test_hybrid_search_skips_embedding_when_lexical_is_decisive(tmp_path, monkeypatch):
+    """Belirleyici BM25 sonucunda embedding çağrısının atlandığını test eder."""
+    monkeypatch.setattr(settings, "LEXICAL_MIN_DECISIVE_SCORE", 0.1)
+    service = _service(tmp_path)
+    service.lexical_index.add_document(1, ["doc_1_chunk_0"], ["fatura INV-2024-001"], user_id=10)
+    service.lexical_index.add_document(2, ["doc_2_chunk_0"], ["sözleşme maddeleri"], user_id=10)
+
+    results = service.search_similar_chunks("INV-2024-001", n_results=2, user_id=10, mode="hybrid")
+
+    assert [item["id"] for item in results] == ["doc_1_chunk_0"]
+    service.embedding_function.assert_not_called()
+
+
+def test_hybrid_search_fuses_when_lexical_is_ambiguous(tmp_path, monkeypatch):
+    """Belirleyici olmayan BM25 sonucunda vektör aramasıyla birleştirildiğini test eder."""
+    monkeypatch.setattr(settings, "LEXICAL_MIN_DECISIVE_SCORE", 1000.0)
+    service = _service(tmp_path)
+    service.lexical_index.add_document(1, ["doc_1_chunk_0"], ["fatura"], user_id=10)
+    vector_hit = {"id": "doc_1_chunk_0", "chunk_text": "fatura", "metadata": {"document_id": "1"}, "distance": 0.1}
+    service._vector_search = MagicMock(return_value=[vector_hit])
+
+    results = service.search_similar_chunks("fatura", n_results=2, user_id=10, mode="hybrid")
+
+    service._vector_search.assert_called_once()
+    assert [item["id"] for item in results] == ["doc_1_chunk_0"]
@@ -0,0 +1,73 @@
+from app.services.lexical_index import BM25Index, tokenize
+
+
+def test_tokenize_keeps_compound_codes():
+    """Birleşik kodların hem bütün hem parça olarak indekslendiğini test eder."""
+    terms = tokenize("Fatura INV-2024-001 ödendi")
+    assert "inv-2024-001" in terms
+    assert "2024" in terms
+
+
+def test_bm25_ranks_exact_code_and_filters(tmp_path):
+    """BM25 sıralamasını, doküman/kullanıcı filtresini ve silmeyi test eder."""
+    index = BM25Index(str(tmp_path / "bm25.idx"))
+    index.add_document(1, ["doc_1_chunk_0", "doc_1_chunk_1"], ["sözleşme maddeleri", "fatura INV-2024-001 tutarı"], user_id=10)
+    index.add_document(2, ["doc_2_chunk_0"], ["başka bir fatura"], user_id=20)
+
+    hits = index.search("INV-2024-001", n_results=3)
+    assert hits[0]["id"] == "doc_1_chunk_1"
+
+    assert [hit["id"] for hit in index.search("fatura", user_id=20)] == ["doc_2_chunk_0"]
+    assert [hit["id"] for hit in index.search("fatura", document_ids=[1])] == ["doc_1_chunk_1"]
+
+    index.remove_document(1)
+    reloaded = BM25Index(str(tmp_path / "bm25.idx"))
+    assert [hit["id"] for hit in reloaded.search("fatura")] == ["doc_2_chunk_0"]
+
+
+def test_bm25_idf_ignores_removed_chunks(tmp_path):
+    """Silinen chunk'ların df'e sayılmadığını ve skorların pozitif kaldığını test eder."""
+    index = BM25Index(str(tmp_path / "bm25.idx"))
+    for document_id in range(1, 6):
+        index.add_document(document_id, [f"doc_{document_id}_chunk_0"], ["ortak terim"], user_id=10)
+    index.add_document(6, ["doc_6_chunk_0"], ["ortak nadir"], user_id=10)
+    for document_id in range(1, 6):
+        index.remove_document(document_id)
+
+    hits = index.search("ortak")
+    assert [hit["id"] for hit in hits] == ["doc_6_chunk_0"]
+    assert hits[0]["score"] > 0
+
+
+def test_bm25_appends_log_and_other_instance_replays(tmp_path):
+    """Yazmaların anlık görüntüyü yeniden yazmadan günlüğe eklendiğini test eder."""
+    path = str(tmp_path / "bm25.idx")
+    writer = BM25Index(path)
+    reader = BM25Index(path)
+    writer.add_document(1, ["doc_1_chunk_0"], ["fatura"], user_id=10)
+    writer.add_document(2, ["doc_2_chunk_0"], ["fatura"], user_id=20)
+    writer.remove_document(1)
+
+    assert not (tmp_path / "bm25.idx").exists()
+    assert (tmp_path / "bm25.idx.log.0").exists()
+    assert [hit["id"] for hit in reader.search("fatura")] == ["doc_2_chunk_0"]
+    assert reader.search("fatura", user_id=10) == []
+
+    # Yarım kalmış son kayıt yok sayılır ve sonraki yazma onu keser
+    with open(tmp_path / "bm25.idx.log.0", "ab") as f:
+        f.write(b"\x00\x00\x10\x00partial")
+    writer.add_document(3, ["doc_3_chunk_0"], ["fatura"], user_id=10)
+    assert [hit["id"] for hit in BM25Index(path).search("fatura", user_id=10)] == ["doc_3_chunk_0"]
+
+
+def test_bm25_snapshot_switches_log_generation(tmp_path, monkeypatch):
+    """Günlük büyüyünce yeni nesil anlık görüntü yazıldığını test eder."""
+    monkeypatch.setattr(BM25Index, "_MIN_SNAPSHOT_LOG_BYTES", 0)
+    path = str(tmp_path / "bm25.idx")
+    index = BM25Index(path)
+    index.add_document(1, ["doc_1_chunk_0"], ["fatura"], user_id=10)
+
+    assert (tmp_path / "bm25.idx").exists()
+    assert not (tmp_path / "bm25.idx.log.0").exists()
+    index.add_document(2, ["doc_2_chunk_0"], ["fatura"], user_id=10)
+    assert sorted(BM25Index(path).document_ids()) == [1, 2]
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from app.core.client import ClientWrapper
+from app.core.vector_store import LocalVectorStore
+from app.models.document import Document
+from app.services import maintenance
+
+
+class PartitionClient:
+    """Bölümleri tmp dizinindeki yerel depolar olarak açan test istemcisi."""
+
+    partition_name = staticmethod(ClientWrapper.partition_name)
+
+    def __init__(self, root):
+        self.root = root
+        self.partitions = {}
+
+    def get_partition(self, base_name, user_id=None, metadata=None):
+        name = self.partition_name(base_name, user_id)
+        if name not in self.partitions:
+            self.partitions[name] = LocalVectorStore(str(self.root), name, metadata=metadata)
+        return self.partitions[name]
+
+
+def _setup(db_session, test_user, tmp_path, monkeypatch):
+    document = Document(
+        title="Belge", filename="belge.txt", file_path="/tmp/belge.txt",
+        file_size=6, file_type=".txt", user_id=test_user.id
+    )
+    db_session.add(document)
+    db_session.commit()
+
+    source = LocalVectorStore(str(tmp_path), "documents", metadata={"hnsw:space": "cosine"})
+    source.add(
+        ids=["eski_0", "yeni_0", "yetim_0"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+        documents=["a", "b", "c"],
+        metadatas=[
+            {"document_id": str(document.id)},
+            {"document_id": str(document.id), "user_id": str(test_user.id)},
+            {"document_id": "999"},
+        ]
+    )
+    client = PartitionClient(tmp_path)
+    monkeypatch.setattr(maintenance, "ai_service", SimpleNamespace(
+        collection=source,
+        collection_name="documents",
+        collection_metadata={"hnsw:space": "cosine"},
+        chroma_client=client
+    ))
+    return source, client
+
+
+def test_migrate_to_user_partitions_backfills_user_metadata(db_session, test_user, tmp_path, monkeypatch):
+    """Taşımanın bölümleri doldurduğunu ve ortak koleksiyona user_id yazdığını test eder."""
+    source, client = _setup(db_session, test_user, tmp_path, monkeypatch)
+
+    report = maintenance.migrate_to_user_partitions(db_session, batch_size=2)
+
+    partition = ClientWrapper.partition_name("documents", test_user.id)
+    assert report == {"scanned": 3, "migrated": 2, "backfilled": 1, "orphaned": 1, "partitions": {partition: 2}}
+    migrated = client.partitions[partition].get(include=["metadatas"])
+    assert sorted(migrated["ids"]) == ["eski_0", "yeni_0"]
+    assert all(metadata["user_id"] == str(test_user.id) for metadata in migrated["metadatas"])
+
+    # Bölümleme kapatılsa da kullanıcı filtresi eski chunk'ı bulur
+    visible = source.get(where={"user_id": str(test_user.id)})
+    assert sorted(visible["ids"]) == ["eski_0", "yeni_0"]
+    assert source.count() == 3
+
+
+def test_migrate_to_user_partitions_dry_run_writes_nothing(db_session, test_user, tmp_path, monkeypatch):
+    """Dry-run'ın rapor üretip hiçbir koleksiyona yazmadığını test eder."""
+    source, client = _setup(db_session, test_user, tmp_path, monkeypatch)
+
+    report = maintenance.migrate_to_user_partitions(db_session, dry_run=True)
+
+    assert report["migrated"] == 2 and report["backfilled"] == 1
+    assert client.partitions == {}
+    assert source.get(where={"user_id": str(test_user.id)})["ids"] == ["yeni_0"]
@@ -0,0 +1,66 @@
+from app.core.config import settings
+from app.models.index_version import VectorIndexVersion
+from app.services.ai_service import ai_service
+from app.services.reindex import activate_index_version, create_index_version
+
+
+def test_activate_index_version_swaps_and_rolls_back(db_session):
+    """Sürüm aktivasyonunun önceki sürümü emekliye ayırdığını ve geri dönüşü test eder."""
+    version = create_index_version(db_session)
+    assert version.status == "building"
+    assert version.collection_name.startswith(f"{settings.VECTOR_COLLECTION_NAME}_v")
+
+    try:
+        activate_index_version(db_session, version.collection_name, stats={})
+        assert ai_service.collection_name == version.collection_name
+
+        # Temel koleksiyona geri dön
+        activate_index_version(db_session, settings.VECTOR_COLLECTION_NAME)
+        statuses = dict(db_session.query(VectorIndexVersion.collection_name, VectorIndexVersion.status).all())
+        assert statuses[version.collection_name] == "retired"
+        assert statuses[settings.VECTOR_COLLECTION_NAME] == "active"
+    finally:
+        ai_service.switch_collection(settings.VECTOR_COLLECTION_NAME)
+    assert ai_service.collection_name == settings.VECTOR_COLLECTION_NAME
+
+
+def test_reindex_all_records_stats_of_documents_changed_during_activation(db_session, test_user, monkeypatch):
+    """Aktivasyondan sonraki son yakalama turunun istatistiklerinin dokümana yazıldığını test eder."""
+    from app.models.document import Document
+    from app.services import reindex
+
+    documents = [
+        Document(title=f"Doc {i}", filename=f"{i}.txt", file_path=f"/path/{i}.txt", user_id=test_user.id,
+                 file_size=1, file_type=".txt", content="metin")
+        for i in range(2)
+    ]
+    db_session.add_all(documents)
+    db_session.commit()
+    edited_id = documents[1].id
+
+    current_stats = {documents[0].id: (2, 100), edited_id: (3, 150)}
+    catch_up_rounds = []
+
+    def fake_changed_since(db, since):
+        catch_up_rounds.append(since)
+        if len(catch_up_rounds) == 2:
+            # Doküman, aktivasyon ile son tur arasında eski koleksiyona göre düzenlendi
+            current_stats[edited_id] = (5, 250)
+            return {edited_id}
+        return set()
+
+    monkeypatch.setattr(reindex, "_reindex_document", lambda document_id, collection_name, throttle: current_stats[document_id])
+    monkeypatch.setattr(reindex, "_changed_since", fake_changed_since)
+    monkeypatch.setattr(settings, "INDEX_VERSION_CHECK_SECONDS", 0)
+
+    try:
+        report = reindex.reindex_all(db_session, workers=1, throttle_ratio=0)
+        assert report["activated"] and not report["failed"]
+        assert len(catch_up_rounds) == 2
+
+        db_session.expire_all()
+        stats = {d.id: (d.chunk_count, d.vector_bytes, d.embedding_model) for d in db_session.query(Document).all()}
+        assert stats[documents[0].id] == (2, 100, settings.LOCAL_EMBEDDING_MODEL)
+        assert stats[edited_id] == (5, 250, settings.LOCAL_EMBEDDING_MODEL)
+    finally:
+        ai_service.switch_collection(settings.VECTOR_COLLECTION_NAME)
@@ -0,0 +1,219 @@
+import pytest
+from fastapi import status
+from app.models.document import Document
+
+
+@pytest.fixture
+def search_ai_service(mock_ai_service, monkeypatch):
+    """Arama endpoint'inin kullandığı AI servisini mock'lar."""
+    import app.api.v1.endpoints.search as search_endpoints
+    monkeypatch.setattr(search_endpoints, "ai_service", mock_ai_service)
+    return mock_ai_service
+
+
+def test_search_documents_groups_and_paginates(client, test_user, test_user_token, db_session, search_ai_service):
+    """Tüm dokümanlarda aramanın sonuçları gruplamasını ve imleçle sayfalamasını test eder."""
+    doc1 = Document(title="Sözleşme", filename="a.txt", file_path="/path/a.txt", user_id=test_user.id, file_size=1, file_type=".txt")
+    doc2 = Document(title="Ek", filename="b.txt", file_path="/path/b.txt", user_id=test_user.id, file_size=1, file_type=".txt")
+    db_session.add_all([doc1, doc2])
+    db_session.commit()
+
+    search_ai_service.search_similar_chunks.return_value = [
+        {"id": f"c{i}", "chunk_text": f"chunk {i}", "distance": 0.1 * i,
+         "metadata": {"document_id": str(doc.id), "chunk_index": i}}
+        for i, doc in enumerate([doc1, doc2, doc1])
+    ]
+
+    response = client.post(
+        "/api/v1/search/",
+        json={"query": "fesih", "limit": 2},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [group["title"] for group in data["results"]] == ["Sözleşme", "Ek"]
+    assert data["next_cursor"]
+    search_ai_service.answer_question.assert_not_called()
+
+    response = client.post(
+        "/api/v1/search/",
+        json={"query": "fesih", "limit": 2, "cursor": data["next_cursor"]},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    data = response.json()
+    assert data["results"][0]["chunks"][0]["chunk_text"] == "chunk 2"
+    assert data["next_cursor"] is None
+
+
+def test_search_cursor_is_stable_when_results_shift(client, test_user, test_user_token, db_session, search_ai_service):
+    """Sayfalar arasında yeni sonuç eklense de imlecin tekrar/atlama yapmadığını test eder."""
+    doc = Document(title="Sözleşme", filename="a.txt", file_path="/path/a.txt", user_id=test_user.id, file_size=1, file_type=".txt")
+    db_session.add(doc)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    def hit(chunk_id, distance):
+        return {"id": chunk_id, "chunk_text": chunk_id, "distance": distance, "metadata": {"document_id": str(doc.id)}}
+
+    search_ai_service.search_similar_chunks.return_value = [hit("c0", 0.1), hit("c1", 0.2), hit("c2", 0.3)]
+    first = client.post("/api/v1/search/", json={"query": "fesih", "limit": 2}, headers=headers).json()
+    assert [c["chunk_text"] for c in first["results"][0]["chunks"]] == ["c0", "c1"]
+
+    # İkinci sayfadan önce en üste yeni bir chunk eklenir
+    search_ai_service.search_similar_chunks.return_value = [hit("new", 0.0), hit("c0", 0.1), hit("c1", 0.2), hit("c2", 0.3)]
+    second = client.post(
+        "/api/v1/search/", json={"query": "fesih", "limit": 2, "cursor": first["next_cursor"]}, headers=headers
+    ).json()
+    assert [c["chunk_text"] for c in second["results"][0]["chunks"]] == ["c2"]
+    assert second["next_cursor"] is None
+    assert search_ai_service.search_similar_chunks.call_args.kwargs["n_results"] == 5
+
+    response = client.post("/api/v1/search/", json={"query": "başka", "cursor": first["next_cursor"]}, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_batch_questions_answers_in_order(client, test_user, test_user_token, db_session, search_ai_service):
+    """Toplu soruların tek aramayla yanıtlandığını ve sırayla döndüğünü test eder."""
+    doc = Document(title="Form", filename="f.txt", file_path="/path/f.txt", user_id=test_user.id, file_size=1, file_type=".txt")
+    db_session.add(doc)
+    db_session.commit()
+
+    chunk = {"id": "c0", "chunk_text": "metin", "distance": 0.2, "metadata": {"document_id": str(doc.id), "chunk_index": 0}}
+    search_ai_service.search_similar_chunks_batch.return_value = [[chunk], [], [chunk]]
+    search_ai_service.answer_question.side_effect = lambda question, chunks: f"cevap: {question}"
+
+    response = client.post(
+        "/api/v1/search/question/batch",
+        json={"questions": ["bir", "iki", "üç"], "document_id": doc.id},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert [item["index"] for item in results] == [0, 1, 2]
+    assert results[0]["answer"] == "cevap: bir"
+    assert results[1]["sources"] == []
+    assert search_ai_service.search_similar_chunks_batch.call_count == 1
+    assert search_ai_service.answer_question.call_count == 2
+
+
+def test_question_across_documents_attributes_sources(client, test_user, test_user_token, db_session, search_ai_service):
+    """Çoklu doküman sorusunun tek aramada ve tek LLM çağrısında yanıtlandığını test eder."""
+    contract = Document(title="Sözleşme", filename="a.txt", file_path="/path/a.txt", user_id=test_user.id, file_size=1, file_type=".txt")
+    amendment = Document(title="Ek Protokol", filename="b.txt", file_path="/path/b.txt", user_id=test_user.id, file_size=1, file_type=".txt")
+    db_session.add_all([contract, amendment])
+    db_session.commit()
+
+    search_ai_service.search_similar_chunks.return_value = [
+        {"id": f"c{i}", "chunk_text": f"madde {i}", "distance": 0.1,
+         "metadata": {"document_id": str(doc.id), "chunk_index": i}}
+        for i, doc in enumerate([amendment, contract])
+    ]
+    search_ai_service.answer_question.return_value = "Fesih süresi 30 gündür [Ek Protokol]."
+
+    response = client.post(
+        "/api/v1/search/question",
+        json={"question": "Fesih süresi nedir?", "document_ids": [contract.id, amendment.id]},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [source["document_title"] for source in data["sources"]] == ["Ek Protokol", "Sözleşme"]
+    assert search_ai_service.search_similar_chunks.call_args.kwargs["document_ids"] == [contract.id, amendment.id]
+    search_ai_service.answer_question.assert_called_once()
+
+    response = client.post(
+        "/api/v1/search/question",
+        json={"question": "Fesih süresi nedir?", "document_ids": [contract.id, 9999]},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_search_forwards_two_stage_depth(client, test_user_token, search_ai_service):
+    """İki aşamalı arama için aday doküman sayısının servise iletildiğini test eder."""
+    search_ai_service.search_similar_chunks.return_value = []
+
+    response = client.post(
+        "/api/v1/search/",
+        json={"query": "fesih", "top_documents": 10},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert search_ai_service.search_similar_chunks.call_args.kwargs["top_documents"] == 10
+
+
+def test_search_suggestions_ranked_by_frequency(client, test_user, test_user_token, db_session):
+    """Önerilerin önekle eşleştiğini, tekilleştiğini ve sıklığa göre sıralandığını test eder."""
+    from app.services.keyword_index import keyword_index, set_document_keywords
+
+    docs = [
+        Document(title=f"Doc {i}", filename=f"{i}.txt", file_path=f"/path/{i}.txt", user_id=test_user.id, file_size=1, file_type=".txt")
+        for i in range(3)
+    ]
+    db_session.add_all(docs)
+    db_session.commit()
+    set_document_keywords(db_session, docs[0].id, test_user.id, ["Kira", "Kefalet"])
+    set_document_keywords(db_session, docs[1].id, test_user.id, ["kira", "Sözleşme"])
+    set_document_keywords(db_session, docs[2].id, test_user.id, ["Kira bedeli", "kira"])
+    db_session.commit()
+
+    response = client.get(
+        "/api/v1/search/suggestions",
+        params={"query": "KI"},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    suggestions = response.json()["suggestions"]
+    assert [s.casefold() for s in suggestions] == ["kira", "kira bedeli"]
+
+    # Önek indeksi ancak commit'ten sonra düşürülür
+    set_document_keywords(db_session, docs[0].id, test_user.id, ["Kiracı"])
+    assert keyword_index._get(test_user.id) is not None
+    db_session.commit()
+    assert keyword_index._get(test_user.id) is None
+
+
+def test_question_key_separates_single_and_multi_document():
+    """Tek ve çoklu doküman isteklerinin aynı uçuşta birleştirilmediğini test eder."""
+    from app.api.v1.endpoints.search import _question_key
+
+    assert _question_key([3], "Fesih  süresi?", False) == _question_key([3], "fesih süresi?", False)
+    assert _question_key([3], "fesih süresi?", False) != _question_key([3], "fesih süresi?", True)
+
+
+def test_debug_chromadb_reports_document_stats(client, test_user, test_user_token, db_session, search_ai_service):
+    """Debug uç noktasının doküman başına chunk istatistiklerini ve doğrulamayı döndürdüğünü test eder."""
+    from unittest.mock import MagicMock
+
+    synced = Document(title="Sözleşme", filename="a.txt", file_path="/path/a.txt", user_id=test_user.id, file_size=1, file_type=".txt",
+                      is_processed=True, chunk_count=2, vector_bytes=6144, embedding_model="model-a")
+    stale = Document(title="Ek", filename="b.txt", file_path="/path/b.txt", user_id=test_user.id, file_size=1, file_type=".txt",
+                     is_processed=True, chunk_count=3, vector_bytes=9216, embedding_model="model-a")
+    db_session.add_all([synced, stale])
+    db_session.commit()
+
+    collection = MagicMock()
+    collection.name = "documents"
+    collection.count.return_value = 4
+    collection.metadata = {"hnsw:space": "cosine"}
+    collection.get.return_value = {"ids": [
+        f"doc_{synced.id}_chunk_0", f"doc_{synced.id}_chunk_1", f"doc_{stale.id}_chunk_0", f"doc_{stale.id}_chunk_1"
+    ]}
+    search_ai_service.get_collection.return_value = collection
+
+    response = client.get(
+        "/api/v1/search/debug/chromadb",
+        params={"deep_verify": True},
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total_processed"] == 2
+    assert data["total_chunks"] == 5
+    assert data["total_vector_bytes"] == 15360
+    assert data["embedding_models"] == {"model-a": 2}
+    stats = {doc["id"]: doc for doc in data["processed_documents"]}
+    assert stats[synced.id]["chroma_chunks"] == 2 and stats[synced.id]["in_sync"] is True
+    assert stats[stale.id]["verified_chunks"] == 2 and stats[stale.id]["in_sync"] is False
+    # Doğrulama tek toplu sorguyla yapılır
+    collection.get.assert_called_once()
@@ -0,0 +1,37 @@
+import asyncio
+
+from app.core.singleflight import SingleFlight
+
+def test_singleflight_coalesces_concurrent_calls():
+    """Aynı anahtarla eşzamanlı çağrıların tek hesaplamayı paylaştığını test eder."""
+    flights = SingleFlight("test")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "cevap"
+
+    async def main():
+        results = await asyncio.gather(*(flights.do("k", compute) for _ in range(5)))
+        assert not flights.in_flight("k")
+        # Hesaplama bittikten sonra gelen çağrı yeniden hesaplar
+        results.append(await flights.do("k", compute))
+        return results
+
+    assert asyncio.run(main()) == ["cevap"] * 6
+    assert len(calls) == 2
+
+def test_singleflight_shares_errors():
+    """Ortak hesaplamanın hatasının tüm bekleyenlere iletildiğini test eder."""
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,56 @@
+import numpy as np
+from app.services.ai_service import ai_service
+from app.services.snapshot import export_snapshot, restore_snapshot
+
+
+def test_snapshot_export_and_restore_roundtrip(db_session, tmp_path):
+    """Vektör anlık görüntüsünün dışa aktarılıp aynen geri yüklendiğini test eder."""
+    collection = ai_service.collection
+    collection.upsert(
+        ids=["doc_900_chunk_0", "doc_900_chunk_1"],
+        embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+        documents=["birinci", "ikinci"],
+        metadatas=[{"document_id": "900", "chunk_index": 0}, {"document_id": "900", "chunk_index": 1}]
+    )
+
+    manifest = export_snapshot(db_session, str(tmp_path / "snap"), dtype="float16")
+    assert manifest["dim"] == 3
+    assert manifest["count"] == collection.count()
+
+    collection.delete(where={"document_id": "900"})
+    report = restore_snapshot(str(tmp_path / "snap"))
+
+    restored = collection.get(where={"document_id": "900"}, include=["embeddings", "documents"])
+    assert report["restored"] == manifest["count"]
+    assert sorted(restored["documents"]) == ["birinci", "ikinci"]
+    assert np.allclose(sorted(map(tuple, restored["embeddings"])), [(0.0, 1.0, 0.0), (1.0, 0.0, 0.0)])
+
+
+def test_snapshot_export_fails_when_collection_grows(db_session, tmp_path, monkeypatch):
+    """Dışa aktarım sırasında büyüyen koleksiyonun sessizce kesilmediğini test eder."""
+    import os
+
+    import pytest
+
+    from app.core.vector_store import LocalVectorStore
+    from app.services import snapshot
+
+    class GrowingStore(LocalVectorStore):
+        def get(self, *args, **kwargs):
+            result = super().get(*args, **kwargs)
+            if self.count() == 2:
+                self.upsert(ids=["yeni"], embeddings=[[0.0, 0.0, 1.0]], documents=["yeni"], metadatas=[{"document_id": "2"}])
+            return result
+
+    growing = GrowingStore(str(tmp_path / "vectors"), "documents")
+    growing.upsert(ids=["a", "b"], embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], documents=["a", "b"],
+                   metadatas=[{"document_id": "1"}, {"document_id": "1"}])
+    other = LocalVectorStore(str(tmp_path / "vectors"), "summaries")
+    other.upsert(ids=["s"], embeddings=[[1.0, 1.0, 0.0]], documents=["s"], metadatas=[{"document_id": "1"}])
+    monkeypatch.setattr(snapshot, "list_vector_collections", lambda db: [growing, other])
+
+    out_dir = tmp_path / "snap"
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.export_snapshot(db_session, str(out_dir), batch_size=1)
+    assert not os.path.exists(out_dir / snapshot.MANIFEST_FILE)
+    assert not os.path.exists(out_dir / snapshot.VECTORS_FILE)
@@ -0,0 +1,67 @@
+import os
+
+from app.services.storage_backends import DiskBackend
+from app.services.storage_cache import CachingBackend
+
+
+def _cached(cache, location):
+    return os.path.exists(cache._path(cache._key(location)))
+
+
+def _put(backend, tmp_path, digest, content):
+    staged = tmp_path / f"{digest}.part"
+    staged.write_bytes(content)
+    return backend.put(digest, str(staged))
+
+
+def test_storage_cache_read_through_and_lru_eviction(tmp_path):
+    """Uzak blob'ların bir kez indirildiğini ve en eski dosyanın tahliye edildiğini test eder."""
+    remote = DiskBackend(str(tmp_path / "remote"))
+    first = _put(remote, tmp_path, "aa" * 32, b"a" * 60)
+    second = _put(remote, tmp_path, "bb" * 32, b"b" * 60)
+    cache = CachingBackend(remote, str(tmp_path / "cache"), max_bytes=100)
+
+    with cache.open(first) as f:
+        assert f.read() == b"a" * 60
+    with cache.open(first) as f:
+        assert f.read() == b"a" * 60
+    assert _cached(cache, first)
+    # Önbellek yolu dışarı verilmez; okumalar kilitli `open` üzerinden yapılır
+    assert cache.local_path(first) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # İkinci blob bütçeyi aşar; en az yakın zamanda kullanılan ilk blob tahliye edilir
+    with cache.open(second) as f:
+        assert f.read() == b"b" * 60
+    assert not _cached(cache, first)
+    assert _cached(cache, second)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_storage_cache_write_through(tmp_path):
+    """Yüklenen blob'un ilk okumada önbellekten geldiğini test eder."""
+    cache = CachingBackend(DiskBackend(str(tmp_path / "remote")), str(tmp_path / "cache"), max_bytes=1024)
+    location = _put(cache, tmp_path, "cc" * 32, b"icerik")
+
+    with cache.open(location) as f:
+        assert f.read() == b"icerik"
+    assert cache.stats()["hits"] == 1
+
+
+def test_storage_cache_counts_each_blob_once_and_keeps_locks(tmp_path):
+    """Önbellekteki blob'un tekrar yazılınca iki kez sayılmadığını ve kilit dosyalarının korunduğunu test eder."""
+    remote = DiskBackend(str(tmp_path / "remote"))
+    cache = CachingBackend(remote, str(tmp_path / "cache"), max_bytes=100)
+    assert cache.remote is True and cache.inner is remote
+
+    location = _put(cache, tmp_path, "dd" * 32, b"d" * 40)
+    _put(cache, tmp_path, "dd" * 32, b"d" * 40)
+    assert cache.stats()["bytes"] == 40
+    assert not any((tmp_path / "cache" / ".tmp").iterdir())
+
+    other = _put(remote, tmp_path, "ee" * 32, b"e" * 70)
+    with cache.open(other) as f:
+        assert f.read() == b"e" * 70
+    assert not _cached(cache, location)
+    assert cache.stats()["bytes"] == 70
+    assert (tmp_path / "cache" / ".locks" / ("ee" * 32)).exists()
@@ -0,0 +1,69 @@
+from app.services.vector_cache import CachedDocument, DocumentVectorCache
+
+
+def _entry(document_id, vectors):
+    return CachedDocument(
+        ids=[f"doc_{document_id}_chunk_{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[f"chunk {i}" for i in range(len(vectors))],
+        metadatas=[{"document_id": str(document_id), "chunk_index": i} for i in range(len(vectors))]
+    )
+
+
+def test_cached_document_exact_search():
+    """Önbellekteki doküman için tam kosinüs aramasını test eder."""
+    entry = _entry(1, [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]])
+
+    results = entry.search([[0.0, 2.0]], n_results=2)[0]
+
+    assert [r["id"] for r in results] == ["doc_1_chunk_1", "doc_1_chunk_2"]
+    assert results[0]["distance"] < 1e-6
+
+
+def test_cache_evicts_least_recently_used_by_bytes():
+    """Bayt bütçesi aşıldığında en eski dokümanın atıldığını test eder."""
+    first = _entry(1, [[1.0, 0.0]])
+    cache = DocumentVectorCache(max_bytes=first.nbytes * 2)
+    cache.put(1, first)
+    cache.put(2, _entry(2, [[0.0, 1.0]]))
+    cache.get(1)
+    cache.put(3, _entry(3, [[1.0, 1.0]]))
+
+    assert cache.get(1) is not None
+    assert cache.get(2) is None
+    assert cache.get(3) is not None
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+
+def test_cached_document_is_checked_against_document_version(monkeypatch):
+    """Başka bir worker'da yeniden işlenen ya da silinen dokümanın önbellekten sunulmadığını test eder."""
+    from unittest.mock import MagicMock
+
+    from app.services.ai_service import AIService
+
+    service = AIService.__new__(AIService)
+    service.vector_cache = DocumentVectorCache(max_bytes=1024 * 1024)
+    service._uncacheable_documents = {}
+    collection = MagicMock()
+    collection.get.return_value = {
+        "ids": ["doc_1_chunk_0"], "embeddings": [[1.0, 0.0]],
+        "documents": ["chunk 0"], "metadatas": [{"document_id": "1", "chunk_index": 0}]
+    }
+    service.get_collection = MagicMock(return_value=collection)
+    versions = {1: ("t1", 1)}
+    monkeypatch.setattr(service, "_document_version", lambda document_id: versions.get(document_id))
+
+    assert service._get_cached_document(1) is service._get_cached_document(1)
+    assert collection.get.call_count == 1
+
+    # Yeniden işleme satırın sürümünü değiştirir; girdi yeniden yüklenir
+    versions[1] = ("t2", 1)
+    assert service._get_cached_document(1).version == ("t2", 1)
+    assert collection.get.call_count == 2
+
+    # Satır silindiyse önbellekteki vektörler sunulmaz ve atılır
+    del versions[1]
+    assert service._get_cached_document(1) is None
+    assert service.vector_cache.get(1) is None
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from app.core.vector_store import LocalVectorStore
+
+
+def _store(tmp_path):
+    return LocalVectorStore(str(tmp_path), "documents", metadata={"hnsw:space": "cosine"})
+
+
+def test_local_store_query_with_document_filter(tmp_path):
+    """Yerel vektör deposunda document_id filtresiyle sorguyu test eder."""
+    store = _store(tmp_path)
+    store.add(
+        ids=["doc_1_chunk_0", "doc_1_chunk_1", "doc_2_chunk_0"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 0.1]],
+        documents=["a", "b", "c"],
+        metadatas=[{"document_id": "1"}, {"document_id": "1"}, {"document_id": "2"}]
+    )
+
+    results = store.query(query_embeddings=[[1.0, 0.0]], n_results=5, where={"document_id": "1"})
+
+    assert results["ids"][0] == ["doc_1_chunk_0", "doc_1_chunk_1"]
+    assert results["documents"][0] == ["a", "b"]
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_local_store_upsert_delete_and_reload(tmp_path):
+    """Upsert, silme ve diskten yeniden yüklemeyi test eder."""
+    store = _store(tmp_path)
+    store.upsert(ids=["a", "b"], embeddings=[[1.0, 0.0], [0.0, 1.0]], metadatas=[{"document_id": "1"}, {"document_id": "2"}])
+    store.upsert(ids=["a"], embeddings=[[0.0, 1.0]], metadatas=[{"document_id": "3"}])
+    store.delete(where={"document_id": "2"})
+
+    reloaded = _store(tmp_path)
+
+    assert reloaded.count() == 1
+    assert reloaded.get(where={"document_id": "3"})["ids"] == ["a"]
+    assert reloaded.get(where={"document_id": "1"})["ids"] == []
+    embedding = reloaded.get(ids=["a"], include=["embeddings"])["embeddings"][0]
+    assert np.allclose(embedding, [0.0, 1.0])
+
+
+def test_local_store_compact_switches_generation_atomically(tmp_path):
+    """Sıkıştırmanın silinen satırları attığını ve yeni nesli yeniden yüklenebilir bıraktığını test eder."""
+    store = _store(tmp_path)
+    store.upsert(
+        ids=["a", "b", "c"],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+        documents=["x", "y", "z"],
+        metadatas=[{"document_id": "1"}, {"document_id": "2"}, {"document_id": "2"}]
+    )
+    store.delete(where={"document_id": "2"})
+    store.compact()
+    store.upsert(ids=["d"], embeddings=[[0.0, 1.0]], metadatas=[{"document_id": "4"}])
+
+    reloaded = _store(tmp_path)
+    assert sorted(reloaded.get()["ids"]) == ["a", "d"]
+    assert reloaded.get(ids=["a"])["documents"] == ["x"]
+    assert not (tmp_path / "documents" / "vectors.npy").exists()
@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.core.vector_store import LocalVectorStore
+from app.services import ai_service as ai_service_module
+from app.services.ai_service import AIService
+from app.services.lexical_index import BM25Index
+from app.services.vector_cache import DocumentVectorCache
+
+
+class FlakyStore(LocalVectorStore):
+    """İlk `failures` upsert çağrısında hata veren yerel depo"""
+
+    def __init__(self, *args, failures=0, before_upsert=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failures = failures
+        self.before_upsert = before_upsert
+        self.upserts = []
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        if self.before_upsert is not None:
+            self.before_upsert(ids)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("vector store unavailable")
+        self.upserts.append(list(ids))
+        return super().upsert(ids, embeddings, documents=documents, metadatas=metadatas)
+
+
+def _service(tmp_path, store, embedding_function=None):
+    service = AIService.__new__(AIService)
+    service.collection_name = settings.VECTOR_COLLECTION_NAME
+    service.lexical_index = BM25Index(str(tmp_path / "bm25.idx"))
+    service.vector_cache = DocumentVectorCache(max_bytes=0)
+    service._uncacheable_documents = {}
+    service.embedding_function = embedding_function or (lambda texts: [[1.0, float(len(text))] for text in texts])
+    service.get_collection = lambda user_id=None, collection_name=None: store
+    return service
+
+
+def test_plan_write_batches_respects_count_and_bytes(tmp_path, monkeypatch):
+    """Batch'lerin hem adet hem bayt sınırında bölündüğünü test eder."""
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 1)
+    monkeypatch.setattr(settings, "VECTOR_WRITE_BATCH_SIZE", 3)
+    monkeypatch.setattr(settings, "VECTOR_WRITE_BATCH_BYTES", 24)
+    service = AIService.__new__(AIService)
+
+    # Her chunk 4 bayt vektör + metin baytı
+    assert service._plan_write_batches(["a"] * 7) == [(0, 3), (3, 6), (6, 7)]
+    assert service._plan_write_batches(["x" * 10, "y" * 10, "z"]) == [(0, 1), (1, 3)]
+    # Sınırı tek başına aşan chunk kendi batch'inde yazılır
+    assert service._plan_write_batches(["x" * 100, "a"]) == [(0, 1), (1, 2)]
+    assert service._plan_write_batches([]) == []
+
+
+def test_upsert_batch_retries_with_backoff(tmp_path, monkeypatch):
+    """Geçici hatalarda üstel geri çekilmeyle tekrar denendiğini test eder."""
+    monkeypatch.setattr(settings, "VECTOR_WRITE_RETRIES", 3)
+    monkeypatch.setattr(settings, "VECTOR_WRITE_BACKOFF_SECONDS", 0.5)
+    monkeypatch.setattr(ai_service_module.random, "random", lambda: 0.0)
+    delays = []
+    monkeypatch.setattr(ai_service_module.time, "sleep", delays.append)
+    store = FlakyStore(str(tmp_path), "documents", failures=2)
+    service = _service(tmp_path, store)
+
+    service._upsert_batch(store, 1, 0, [[1.0, 0.0]], ["metin"], user_id=10)
+
+    assert delays == [0.5, 1.0]
+    assert store.get(ids=["doc_1_chunk_0"])["metadatas"][0]["user_id"] == "10"
+
+    store.failures = 5
+    with pytest.raises(ConnectionError):
+        service._upsert_batch(store, 1, 0, [[1.0, 0.0]], ["metin"], user_id=10)
+    assert len(delays) == 2 + 3
+
+
+def test_embed_and_store_overlaps_embedding_with_writes(tmp_path, monkeypatch):
+    """Batch N yazılırken batch N+1'in embedding'inin hesaplandığını test eder."""
+    monkeypatch.setattr(settings, "VECTOR_WRITE_BATCH_SIZE", 2)
+    second_embedding_started = threading.Event()
+    overlapped = []
+    embedded = []
+
+    def embedding_function(texts):
+        embedded.append(list(texts))
+        if len(embedded) == 2:
+            second_embedding_started.set()
+        return [[1.0, float(len(text))] for text in texts]
+
+    def before_upsert(ids):
+        if ids[0] == "doc_1_chunk_0":
+            # İlk yazma, ikinci batch'in embedding'i başlayana kadar sürer
+            overlapped.append(second_embedding_started.wait(timeout=5))
+
+    store = FlakyStore(str(tmp_path), "documents", before_upsert=before_upsert)
+    service = _service(tmp_path, store, embedding_function)
+
+    count, vector_bytes = service.embed_and_store_chunks(1, ["a", "bb", "ccc", "dddd", "e"], user_id=10)
+
+    assert (count, vector_bytes) == (5, 5 * 2 * 4)
+    assert overlapped == [True]
+    assert store.upserts == [
+        ["doc_1_chunk_0", "doc_1_chunk_1"],
+        ["doc_1_chunk_2", "doc_1_chunk_3"],
+        ["doc_1_chunk_4"],
+    ]
+
+
+def test_finish_document_write_removes_stale_chunks(tmp_path):
+    """Yeniden işlenen dokümanın fazla kalan eski chunk'larının silindiğini test eder."""
+    store = FlakyStore(str(tmp_path), "documents")
+    service = _service(tmp_path, store)
+    service.embed_and_store_chunks(1, ["bir", "iki", "üç", "dört"], user_id=10)
+    service.embed_and_store_chunks(2, ["başka"], user_id=10)
+
+    service.embed_and_store_chunks(1, ["yeni bir", "yeni iki"], user_id=10)
+
+    assert sorted(store.get(where={"document_id": "1"})["ids"]) == ["doc_1_chunk_0", "doc_1_chunk_1"]
+    assert store.get(where={"document_id": "2"})["ids"] == ["doc_2_chunk_0"]
+    assert [hit["id"] for hit in service.lexical_index.search("dört")] == []
+    assert [hit["id"] for hit in service.lexical_index.search("yeni", n_results=5)] == ["doc_1_chunk_0", "doc_1_chunk_1"]